@@ -0,0 +1,164 @@
+import math, random
+from Proteum import Proteum
+from MutantList import MutantList
+
+def normal_quantile(p):
+    """ Inverse of the standard normal CDF, by bisection on math.erf. """
+    low, high = -10.0, 10.0
+    for _ in range(100):
+        middle = (low + high) / 2.0
+        if 0.5 * (1 + math.erf(middle / math.sqrt(2))) < p:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2.0
+
+class ScoreEstimate(object):
+    """ Mutation score estimated from a sample of mutants.
+        Attributes:
+        score: fraction of the sampled mutants that are dead
+        low, high: confidence interval of the score of the whole population
+        sampled, population: mutants executed and mutants considered
+    """
+
+    def __init__(self, dead, sampled, population, z):
+        self.dead = dead
+        self.sampled = sampled
+        self.population = population
+        self.score = dead / float(sampled) if sampled else 0.0
+        self.low, self.high = self.wilson(dead, sampled, population, z)
+
+    @staticmethod
+    def wilson(dead, n, population, z):
+        """ Wilson score interval, narrowed by the finite population correction. """
+        if n == 0:
+            return 0.0, 1.0
+        if n >= population:
+            p = dead / float(n)
+            return p, p
+        p = dead / float(n)
+        denominator = 1 + z * z / n
+        center = (p + z * z / (2 * n)) / denominator
+        half = z / denominator * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n))
+        if population > 1:
+            half *= math.sqrt((population - n) / float(population - 1))
+        return max(0.0, center - half), min(1.0, center + half)
+
+    @property
+    def margin(self):
+        """ Half the width of the interval. """
+        return (self.high - self.low) / 2
+
+    def __repr__(self):
+        return "ScoreEstimate(%.4f [%.4f, %.4f], %d of %d mutants)" % (
+            self.score, self.low, self.high, self.sampled, self.population)
+
+class AdaptiveSampler(object):
+    """ Mutation score estimation with early stopping
+        Executes the mutants in a random order, in growing batches, keeping a confidence interval
+        of the mutation score (overall and for each group of operators, given by preffixes as in
+        Proteum.operators(preffix)). Stops as soon as the interval is narrow enough, instead of
+        executing every mutant, and returns the estimates.
+
+        Each batch is executed by selecting its mutants (exemuta -select -x), running exemuta -exec
+        and reading their status (muta -l -x). At the end the mutants active before are selected again.
+    """
+
+    def __init__(self, proteum, D="", session=None, precision=0.02, confidence=0.95, preffixes=None,
+                 preffix_precision=None, batch_size=20, growth=2.0, max_batch_size=1000, seed=0):
+        """ Arguments:
+            proteum: Proteum object used to run the commands
+            D: directory where the session is located (default is ".")
+            precision: wanted margin of the overall score (0.02 means +-2%)
+            confidence: confidence level of the intervals
+            preffixes: operator preffixes with their own estimate (e.g. ['u-O', 'u-S', 'I-', 'II-'])
+            preffix_precision: if given, the margin of every group must also reach it before stopping
+            batch_size, growth, max_batch_size: first batch size, how much it grows and its limit
+            seed: seed of the random order of the mutants
+        """
+        self.proteum = proteum
+        self.D = D
+        self.session = session if session is not None else proteum.session
+        self.precision = precision
+        self.z = normal_quantile((1 + confidence) / 2.0)
+        self.preffixes = preffixes or []
+        self.preffix_precision = preffix_precision
+        self.batch_size = batch_size
+        self.growth = growth
+        self.max_batch_size = max_batch_size
+        self.seed = seed
+        self.history = []
+
+    def groups(self, mutants):
+        """ Dictionary {preffix: set of mutant numbers with an operator of that group}. """
+        groups = {}
+        for preffix in self.preffixes:
+            operators = set(Proteum.operators(preffix))
+            groups[preffix] = set(mutant.number for mutant in mutants if mutant.operator in operators)
+        return groups
+
+    def estimates(self, statuses, population, groups):
+        dead = sum(1 for status in statuses.values() if status)
+        overall = ScoreEstimate(dead, len(statuses), len(population), self.z)
+        by_group = {}
+        for preffix, numbers in groups.items():
+            sampled = [statuses[number] for number in numbers if number in statuses]
+            by_group[preffix] = ScoreEstimate(sum(1 for status in sampled if status), len(sampled),
+                len(numbers), self.z)
+        return overall, by_group
+
+    def done(self, overall, by_group):
+        if overall.margin > self.precision:
+            return False
+        if self.preffix_precision is not None:
+            return all(estimate.margin <= self.preffix_precision
+                       for estimate in by_group.values() if estimate.population)
+        return True
+
+    def check(self, result, command):
+        if result is None or not result.ok:
+            raise RuntimeError('%s failed for session %s: %s' % (command, self.session,
+                result.stderr.strip() if result is not None else 'no result'))
+
+    def select(self, numbers):
+        self.check(self.proteum.exemuta_select([{'filter': '-all', 'percent': 1.0}],
+            x=" ".join(str(number) for number in sorted(numbers)), D=self.D, session=self.session),
+            'exemuta -select')
+
+    def run(self, **exec_args):
+        """ Sample and execute mutants until the wanted precision is reached (or every mutant ran).
+            exec_args are passed to Proteum.exemuta_exec (trace, T, ...).
+            Returns (overall ScoreEstimate, {preffix: ScoreEstimate}); every step is kept in history.
+            Raises RuntimeError if a batch cannot be selected or executed (the selection of active
+            mutants is restored).
+        """
+        mutants = MutantList.load(self.proteum, D=self.D, session=self.session)
+        active = [mutant.number for mutant in mutants if mutant.active]
+        population = [mutant for mutant in mutants
+                      if mutant.active and mutant.status not in ('equivalent', 'anomalous')]
+        groups = self.groups(population)
+        order = [mutant.number for mutant in population]
+        random.Random(self.seed).shuffle(order)
+
+        statuses = {}
+        self.history = []
+        overall, by_group = self.estimates(statuses, population, groups)
+        size = self.batch_size
+        position = 0
+        try:
+            while position < len(order) and not self.done(overall, by_group):
+                batch = order[position:position + int(size)]
+                position += len(batch)
+                self.select(batch)
+                # a batch that did not run must not count as sampled (its mutants would look alive)
+                self.check(self.proteum.exemuta_exec(D=self.D, session=self.session, **exec_args), 'exemuta -exec')
+                for mutant in MutantList.load(self.proteum, x=" ".join(str(number) for number in batch),
+                                              D=self.D, session=self.session):
+                    statuses[mutant.number] = mutant.dead
+                overall, by_group = self.estimates(statuses, population, groups)
+                self.history.append(overall)
+                size = min(self.max_batch_size, size * self.growth)
+        finally:
+            if position:
+                self.select(active)
+        return overall, by_group
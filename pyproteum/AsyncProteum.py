@@ -0,0 +1,97 @@
+import asyncio, subprocess, sys, time
+from CommandRunner import CommandRunner, CommandResult, DEVNULL
+from Proteum import Proteum
+
+class AsyncCommandRunner(CommandRunner):
+    """ CommandRunner with an asyncio API: run_async and run_many run many commands
+        concurrently from the same event loop. Kept apart from CommandRunner because it
+        needs Python 3.
+    """
+
+    async def run_async(self, argv, input=None, cwd=None, timeout=None, on_stdout=None, on_stderr=None,
+                        on_start=None):
+        """ Coroutine version of run. Many commands can run concurrently from the same event loop. """
+        started = time.time()
+        process = await asyncio.create_subprocess_exec(*argv, cwd=cwd or self.cwd, env=self.env,
+            stdin=subprocess.PIPE if input is not None else DEVNULL,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if on_start:
+            on_start(process)
+
+        stdout, stderr = [], []
+
+        async def read_stream(stream, chunks, callback):
+            decoder = self.decoder()
+            while True:
+                data = await stream.read(self.chunk_size)
+                text = decoder.decode(data, not data)
+                if text:
+                    chunks.append(text)
+                    if callback:
+                        callback(text)
+                if not data:
+                    break
+
+        async def write_input():
+            if input is not None:
+                process.stdin.write(input if isinstance(input, bytes) else input.encode(self.encoding))
+                try:
+                    await process.stdin.drain()
+                    process.stdin.close()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+        communicate = asyncio.gather(write_input(),
+            read_stream(process.stdout, stdout, on_stdout),
+            read_stream(process.stderr, stderr, on_stderr))
+        try:
+            await asyncio.wait_for(communicate, timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+        returncode = await process.wait()
+
+        return self.notify(CommandResult(list(argv), returncode, ''.join(stdout), ''.join(stderr),
+            started, time.time()))
+
+    async def run_many(self, commands, limit=None, **kwargs):
+        """ Run many commands (a list of argv lists) concurrently.
+            limit: maximum number of commands running at the same time (default is no limit)
+            Returns the list of results, in the same order of commands.
+        """
+        semaphore = asyncio.Semaphore(limit) if limit else None
+
+        async def run_one(argv):
+            if semaphore is None:
+                return await self.run_async(argv, **kwargs)
+            async with semaphore:
+                return await self.run_async(argv, **kwargs)
+
+        return await asyncio.gather(*[run_one(argv) for argv in commands])
+
+class AsyncProteum(Proteum):
+    """ Proteum with coroutine versions of its commands (see AsyncCommandRunner).
+        Every synchronous method of Proteum works as well.
+    """
+
+    def __init__(self, of=None):
+        Proteum.__init__(self, of)
+        self.runner = AsyncCommandRunner()
+
+    async def run_async(self, command, session=None, of=None, input=None, on_output=None, on_start=None):
+        """ Coroutine version of exec_command.
+            Many commands can be awaited concurrently from the same event loop, for example:
+            > await asyncio.gather(proteum.run_async('report -tcase', 's1'),
+            >                      proteum.run_async('report -tcase', 's2'))
+        """
+        if session is None:
+            session = self.session
+
+        if of is None:
+            of = self.of
+        if session:
+            argv = self.command_argv(command, session)
+            self.echo('[proteumIM executing]:' + ' '.join(argv))
+            return await self.runner.run_async(argv, input=input, on_stdout=self.output_callback(of, on_output),
+                on_stderr=self.output_writer(of, sys.stderr), on_start=on_start)
+        else:
+            self.echo('Error: First create a test session with test-new!')
@@ -0,0 +1,134 @@
+import hashlib, os, tempfile, zlib
+try:
+    import lzma
+except ImportError:
+    lzma = None
+from compat import string_types
+
+class BlobRef(object):
+    """ Reference to a payload kept in a BlobStore.
+        Holds only the digest; the text is read from the store when it is used (str(ref) or
+        ref.text). Comparisons use the digests, so equal payloads are found without loading them.
+    """
+
+    __slots__ = ('store', 'digest')
+
+    def __init__(self, store, digest):
+        self.store = store
+        self.digest = digest
+
+    @property
+    def text(self):
+        return self.store.text(self.digest)
+
+    def __str__(self):
+        return self.text
+
+    def __eq__(self, other):
+        if isinstance(other, BlobRef):
+            return self.digest == other.digest
+        if isinstance(other, string_types):
+            return self.digest == BlobStore.digest(other if isinstance(other, bytes) else other.encode('utf-8'))
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __hash__(self):
+        return hash(self.digest)
+
+    def __repr__(self):
+        return "BlobRef(%s)" % self.digest[:12]
+
+class BlobStore(object):
+    """ Content-addressed store of compressed payloads
+        Every payload is stored once, under the SHA-256 of its content (blobs/<digest[:2]>/<digest>),
+        compressed with zlib or lzma when that makes it smaller. Identical payloads, such as the
+        same output of many test cases, take the space of one.
+
+        Test cases keep BlobRefs instead of their input, output and stderr (see
+        TestCaseInfo.store_payloads and ProteumReport.set_blob_store).
+    """
+
+    codecs = {
+        b'n': (lambda data, level: data, lambda data: data),
+        b'z': (lambda data, level: zlib.compress(data, level), zlib.decompress),
+        b'x': (lambda data, level: lzma.compress(data, preset=level), lambda data: lzma.decompress(data)),
+    }
+    codec_names = {None: b'n', 'zlib': b'z', 'lzma': b'x'}
+
+    def __init__(self, directory, compression='zlib', level=6, min_size=64):
+        """ Arguments:
+            directory: where the blobs are kept
+            compression: 'zlib', 'lzma' or None
+            level: compression level
+            min_size: payloads smaller than this are stored without compression
+        """
+        if compression == 'lzma' and lzma is None:
+            raise ImportError('lzma compression needs the lzma module (Python 3)')
+        self.directory = directory
+        self.codec = self.codec_names[compression]
+        self.level = level
+        self.min_size = min_size
+        self.stored = 0
+        self.deduplicated = 0
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    @staticmethod
+    def digest(data):
+        return hashlib.sha256(data).hexdigest()
+
+    def path(self, digest):
+        return os.path.join(self.directory, 'blobs', digest[:2], digest)
+
+    def __contains__(self, digest):
+        return os.path.isfile(self.path(digest))
+
+    def put(self, data):
+        """ Store a payload (bytes or text) and return its digest. """
+        if not isinstance(data, bytes):
+            data = data.encode('utf-8')
+        digest = self.digest(data)
+        path = self.path(digest)
+        if os.path.isfile(path):
+            self.deduplicated += 1
+            return digest
+
+        codec = self.codec if len(data) >= self.min_size else b'n'
+        compressed = self.codecs[codec][0](data, self.level)
+        if len(compressed) >= len(data):
+            codec, compressed = b'n', data
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(codec + compressed)
+        os.rename(tmp, path)
+        self.stored += 1
+        return digest
+
+    def get(self, digest):
+        """ The payload of a digest, as bytes. """
+        with open(self.path(digest), 'rb') as f:
+            data = f.read()
+        return self.codecs[data[:1]][1](data[1:])
+
+    def text(self, digest):
+        return self.get(digest).decode('utf-8')
+
+    def ref(self, data):
+        """ Store a payload and return a BlobRef to it. """
+        return BlobRef(self, self.put(data))
+
+    def stats(self):
+        """ {'stored': new blobs, 'deduplicated': payloads already stored, 'blobs': blobs on disk,
+            'disk_bytes': their size}
+        """
+        blobs = disk = 0
+        for path, _, names in os.walk(os.path.join(self.directory, 'blobs')):
+            for name in names:
+                blobs += 1
+                disk += os.path.getsize(os.path.join(path, name))
+        return {'stored': self.stored, 'deduplicated': self.deduplicated, 'blobs': blobs, 'disk_bytes': disk}
@@ -0,0 +1,138 @@
+import json, os, time
+from ParallelExecutor import ParallelExecutor
+
+class CheckpointedExecutor(object):
+    """ Checkpointed execution of mutants
+        Executes the mutants in chunks (exemuta -exec -f/-t) and records every finished chunk
+        in a journal next to the session (.<session>.journal, one JSON line per event, synced
+        to disk). If the run dies, resume() skips the chunks already done. A chunk whose
+        exemuta -exec fails is not recorded: RuntimeError is raised and resume() retries it.
+
+        The chunk size adapts to the observed time per mutant, so that each chunk takes about
+        target_seconds: long enough to amortize the start of exemuta, short enough to lose
+        little work on a crash.
+    """
+
+    def __init__(self, proteum, D="", session=None, chunk_size=50, target_seconds=60.0,
+                 max_chunk_size=5000, **exec_args):
+        """ Arguments:
+            proteum: Proteum object used to run the commands
+            D: directory where the session is located (default is ".")
+            chunk_size: size of the first chunk
+            target_seconds: how long each chunk should take
+            max_chunk_size: upper bound for the adapted chunk size
+            exec_args: other arguments passed to Proteum.exemuta_exec (trace, T, workers, ...)
+        """
+        self.proteum = proteum
+        self.D = D
+        self.session = session if session is not None else proteum.session
+        self.chunk_size = chunk_size
+        self.target_seconds = target_seconds
+        self.max_chunk_size = max_chunk_size
+        self.exec_args = exec_args
+
+    def journal_path(self):
+        return os.path.join(self.D if self.D else ".", ".%s.journal" % self.session)
+
+    def write(self, event, truncate=False):
+        with open(self.journal_path(), 'w' if truncate else 'a') as f:
+            f.write(json.dumps(event) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def read(self):
+        """ The journal as (run, chunks, finished): the run range, the chunks done and
+            whether the run completed. An incomplete last line (crash while writing) is ignored.
+        """
+        run, chunks, finished = None, [], False
+        if not os.path.isfile(self.journal_path()):
+            return run, chunks, finished
+        with open(self.journal_path()) as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    break
+                if 'run' in event:
+                    run, chunks, finished = event['run'], [], False
+                elif 'chunk' in event:
+                    chunks.append(event['chunk'])
+                elif event.get('finished'):
+                    finished = True
+        return run, chunks, finished
+
+    def start(self, f=0, t=0):
+        """ Start a new checkpointed run over the mutants from f to t (t equals to 0 means up
+            to the last one), forgetting any previous journal.
+        """
+        if t <= 0:
+            t = ParallelExecutor(self.proteum).last_mutant(self.D, self.session)
+        self.write({'run': {'f': f, 't': t, 'started': time.time()}}, truncate=True)
+        return self.resume()
+
+    def remaining(self, run, chunks):
+        """ Ranges (first, last) of the run not covered by any finished chunk. """
+        done = sorted((chunk['f'], chunk['t']) for chunk in chunks)
+        gaps = []
+        first = run['f']
+        for chunk_first, chunk_last in done:
+            if chunk_first > first:
+                gaps.append((first, chunk_first - 1))
+            first = max(first, chunk_last + 1)
+        if first <= run['t']:
+            gaps.append((first, run['t']))
+        return gaps
+
+    def seconds_per_mutant(self, chunks):
+        mutants = sum(chunk['t'] - chunk['f'] + 1 for chunk in chunks)
+        seconds = sum(chunk['seconds'] for chunk in chunks)
+        return seconds / mutants if mutants else None
+
+    def next_size(self, chunks):
+        per_mutant = self.seconds_per_mutant(chunks[-5:])
+        if not per_mutant:
+            return self.chunk_size
+        return int(max(1, min(self.max_chunk_size, self.target_seconds / per_mutant)))
+
+    def check(self, result, command):
+        if result is None or not result.ok:
+            raise RuntimeError('%s failed for session %s: %s' % (command, self.session,
+                result.stderr.strip() if result is not None else 'no result'))
+
+    def resume(self):
+        """ Execute what is left of the run in the journal. Returns the progress at the end. """
+        run, chunks, finished = self.read()
+        if run is None:
+            raise RuntimeError('no checkpointed run to resume for session %s' % self.session)
+
+        executor = ParallelExecutor(self.proteum)
+        for first, last in self.remaining(run, chunks):
+            while first <= last:
+                chunk_last = executor.shards(first, last, self.next_size(chunks))[0][1]
+                started = time.time()
+                result = self.proteum.exemuta_exec(D=self.D, f=first, t=chunk_last, session=self.session,
+                    **self.exec_args)
+                self.check(result, 'exemuta -exec -f %d -t %d' % (first, chunk_last))
+                chunk = {'f': first, 't': chunk_last, 'seconds': time.time() - started}
+                self.write({'chunk': chunk})
+                chunks.append(chunk)
+                first = chunk_last + 1
+
+        if not finished:
+            self.check(self.proteum.exemuta_update(D=self.D, session=self.session), 'exemuta -update')
+            self.write({'finished': True})
+        return self.progress()
+
+    def progress(self):
+        """ Progress of the run in the journal: total and done mutants, fraction done,
+            seconds per mutant and estimated seconds to finish.
+        """
+        run, chunks, finished = self.read()
+        if run is None:
+            return None
+        total = run['t'] - run['f'] + 1
+        done = sum(chunk['t'] - chunk['f'] + 1 for chunk in chunks)
+        per_mutant = self.seconds_per_mutant(chunks)
+        return {'total': total, 'done': done, 'fraction': done / float(total) if total else 1.0,
+                'seconds_per_mutant': per_mutant, 'finished': finished,
+                'eta': per_mutant * (total - done) if per_mutant is not None else None}
@@ -0,0 +1,160 @@
+import codecs, os, subprocess, threading, time
+
+try:
+    from subprocess import DEVNULL
+except ImportError:
+    DEVNULL = open(os.devnull, 'rb')
+
+class CommandResult(object):
+    """ Result of a command executed by CommandRunner.
+        Attributes:
+        argv: the command line executed, as a list of arguments
+        returncode: exit code of the command (negative if it was killed by a signal)
+        stdout, stderr: output captured, as text
+        started, finished: wall clock time (time.time()) when the command started and finished
+        rusage: resource usage of the command (see os.wait4), when available
+    """
+
+    def __init__(self, argv, returncode, stdout, stderr, started, finished, rusage=None):
+        self.argv = argv
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.started = started
+        self.finished = finished
+        self.rusage = rusage
+
+    @property
+    def elapsed(self):
+        return self.finished - self.started
+
+    @property
+    def ok(self):
+        return self.returncode == 0
+
+    def __repr__(self):
+        return "CommandResult(%r, returncode=%d, elapsed=%.3f)" % (self.argv, self.returncode, self.elapsed)
+
+class CommandRunner(object):
+    """ Shell-free command engine.
+        Commands are executed from a list of arguments (no shell is involved), their
+        stdout and stderr are captured as streams and every execution returns a CommandResult.
+        The asyncio API (run_async, run_many) is in AsyncProteum.AsyncCommandRunner, so this
+        module keeps working on Python 2.
+
+        on_stdout and on_stderr are optional callbacks receiving each chunk of text as soon as
+        it is read from the command, which allows consuming the output while the command runs.
+        Every listener (a callable in self.listeners) receives each CommandResult.
+    """
+
+    chunk_size = 4096
+
+    def __init__(self, cwd=None, env=None, encoding='utf-8'):
+        self.cwd = cwd
+        self.env = env
+        self.encoding = encoding
+        self.listeners = []
+
+    def notify(self, result):
+        for listener in self.listeners:
+            listener(result)
+        return result
+
+    def decoder(self):
+        """ Incremental decoder for a stream: a character split between two chunks is kept
+            until the rest of it arrives instead of being replaced.
+        """
+        return codecs.getincrementaldecoder(self.encoding)('replace')
+
+    def run(self, argv, input=None, cwd=None, timeout=None, on_stdout=None, on_stderr=None, on_start=None,
+            preexec_fn=None):
+        """ Execute a command and wait for it to finish.
+            Arguments:
+            argv: list of arguments, the first one is the program to execute
+            input: text (or bytes) to send to the command's stdin
+            cwd: working directory (default is the runner's one)
+            timeout: seconds to wait before killing the command
+            on_start: callable receiving the process (subprocess.Popen) as soon as it starts
+            preexec_fn: callable run in the child before the program is executed (POSIX only)
+        """
+        started = time.time()
+        process = subprocess.Popen(argv, cwd=cwd or self.cwd, env=self.env,
+            stdin=subprocess.PIPE if input is not None else DEVNULL,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, preexec_fn=preexec_fn)
+        if on_start:
+            on_start(process)
+
+        stdout, stderr = [], []
+        readers = [
+            threading.Thread(target=self.read_stream, args=(process.stdout, stdout, on_stdout)),
+            threading.Thread(target=self.read_stream, args=(process.stderr, stderr, on_stderr)),
+        ]
+        for reader in readers:
+            reader.daemon = True
+            reader.start()
+
+        if input is not None:
+            self.write_input(process.stdin, input)
+
+        returncode, rusage = self.wait(process, timeout)
+        for reader in readers:
+            reader.join()
+
+        return self.notify(CommandResult(list(argv), returncode, ''.join(stdout), ''.join(stderr),
+            started, time.time(), rusage))
+
+    @staticmethod
+    def wait(process, timeout=None):
+        """ Wait for a process (killing it after timeout seconds) and collect its resource usage.
+            Returns (returncode, rusage); rusage is None where os.wait4 is not available.
+        """
+        if not hasattr(os, 'wait4'):
+            try:
+                return process.wait(timeout), None
+            except subprocess.TimeoutExpired:
+                process.kill()
+                return process.wait(), None
+
+        deadline = None if timeout is None else time.time() + timeout
+        delay = 0.001
+        while True:
+            if deadline is None:
+                pid, status, rusage = os.wait4(process.pid, 0)
+            else:
+                pid, status, rusage = os.wait4(process.pid, os.WNOHANG)
+                if pid == 0:
+                    if time.time() >= deadline:
+                        process.kill()
+                        deadline = None
+                    else:
+                        time.sleep(delay)
+                        delay = min(delay * 2, 0.05)
+                    continue
+            break
+        process.returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+        return process.returncode, rusage
+
+    def read_stream(self, stream, chunks, callback):
+        decoder = self.decoder()
+        with stream:
+            for data in iter(lambda: os.read(stream.fileno(), self.chunk_size), b''):
+                text = decoder.decode(data)
+                if not text:
+                    continue
+                chunks.append(text)
+                if callback:
+                    callback(text)
+        text = decoder.decode(b'', True)
+        if text:
+            chunks.append(text)
+            if callback:
+                callback(text)
+
+    def write_input(self, stream, input):
+        if not isinstance(input, bytes):
+            input = input.encode(self.encoding)
+        try:
+            stream.write(input)
+            stream.close()
+        except (IOError, OSError):
+            pass
@@ -0,0 +1,296 @@
+import base64, hmac, io, json, os, socket, tarfile, threading, time
+try:
+    import socketserver
+except ImportError:
+    import SocketServer as socketserver
+from SessionWorkspace import SessionWorkspace
+from ParallelExecutor import ParallelExecutor
+
+def parse_address(address):
+    """ 'host:port' or (host, port) for TCP, a path for a Unix socket. """
+    if isinstance(address, tuple):
+        return address
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit():
+        return (host or 'localhost', int(port))
+    return address
+
+def send(stream, message):
+    stream.write((json.dumps(message) + '\n').encode())
+    stream.flush()
+
+def receive(stream):
+    line = stream.readline()
+    if not line:
+        return None
+    return json.loads(line.decode())
+
+def encode_patch(patch):
+    return dict((name, [size, [[offset, base64.b64encode(data).decode()] for offset, data in runs]])
+                for name, (size, runs) in patch.items())
+
+def decode_patch(patch):
+    return dict((name, (size, [(offset, base64.b64decode(data)) for offset, data in runs]))
+                for name, (size, runs) in patch.items())
+
+class ExecutionCoordinator(object):
+    """ Coordinator for distributed mutant execution
+        Splits the mutants of a session into work units (ranges for exemuta -exec -f/-t) and
+        serves them to ExecutionWorker processes over a TCP or Unix socket, using one JSON
+        message per line:
+
+            worker                                    coordinator
+            {"op": "hello"}                      ->   {"session": ..., "archive": ..., "exec_args": ..., "revision": 0}
+            {"op": "next", "revision": r}        ->   {"unit": n, "f": ..., "t": ..., "revision": ..., "patches": [...]}
+                                                      / {"wait": true} / {"done": true}
+            {"op": "result", "unit": n, "revision": ..., "patch": ...}   ->   {"ok": true}
+            {"op": "failed", "unit": n, ...}     ->   {"ok": true}
+
+        The archive is the session directory (tar.gz, base64), so workers need no shared file
+        system. Results are merged into the coordinator's copy of the session files as they
+        arrive, each merge making a new revision. A unit is served with the changes its worker
+        has not seen yet ("patches", from the worker's revision to the current one), so the
+        worker copy is at the current revision when the unit is executed; the result carries
+        the bytes the unit changed and that revision. A result made on an older revision is
+        merged with the changes made since then (see SessionWorkspace.merged): a conflict fails
+        the run. The session files are written and exemuta -update is called at the end.
+
+        Since workers run exemuta -exec on what they are sent and the coordinator writes what
+        they send back, a TCP address is only served with a token: every message must then carry
+        it ({"token": ..., "op": ...}). Files of a result must be plain <session>.* names.
+
+        When a worker disconnects (or holds a unit longer than 'lease' seconds), its units go back
+        to the queue and are served to another worker. A unit whose execution failed is served
+        again too, up to 'attempts' times; after that the whole run fails.
+    """
+
+    def __init__(self, proteum, unit_size=50, lease=None, attempts=3, D="", session=None, token=None,
+                 **exec_args):
+        """ Arguments:
+            proteum: Proteum object used on the coordinator side
+            unit_size: how many mutants in each work unit
+            lease: seconds a worker may keep a unit before it is served again (default is no limit)
+            attempts: how many times a unit may fail before the run is given up
+            D: directory where the session is located (default is ".")
+            token: secret every message must carry (required to listen on TCP)
+            exec_args: arguments passed by the workers to Proteum.exemuta_exec (trace, T, ...)
+        """
+        self.proteum = proteum
+        self.token = token
+        self.unit_size = unit_size
+        self.lease = lease
+        self.attempts = attempts
+        self.D = D
+        self.session = session if session is not None else proteum.session
+        self.exec_args = exec_args
+        self.lock = threading.Lock()
+        self.finished = threading.Event()
+        self.server = None
+
+    def work_units(self, f, t):
+        """ List of (first, last) ranges of unit_size mutants. The first unit starts at mutant 0
+            with at least two mutants, since '-t 0' means "up to the last mutant".
+        """
+        return ParallelExecutor(self.proteum).shards(f, t, self.unit_size)
+
+    def archive(self):
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode='w:gz') as tar:
+            tar.add(self.workspace.directory, arcname='session')
+        return base64.b64encode(buffer.getvalue()).decode()
+
+    def run(self, address, f=0, t=0, timeout=None):
+        """ Serve the work units of the mutants from f to t (t equals to 0 means up to the last one)
+            at address and block until every unit is done. Returns the result of exemuta -update.
+        """
+        if t <= 0:
+            t = ParallelExecutor(self.proteum).last_mutant(self.D, self.session)
+
+        self.workspace = SessionWorkspace(self.session, self.D)
+        self.base = self.workspace.snapshot()
+        self.units = self.work_units(f, t)
+        self.pending = list(range(len(self.units)))
+        self.assigned = {}
+        self.results = set()
+        self.failures = {}
+        self.error = None
+        # merged session files, the changes that made each revision, and the files of the
+        # revisions units are being executed on
+        self.state = dict(self.base)
+        self.history = []
+        self.states = {0: self.state}
+        self.payload = {'session': self.session, 'archive': self.archive(), 'exec_args': self.exec_args,
+                        'revision': 0}
+        self.finished.clear()
+
+        self.start(address)
+        try:
+            if not self.finished.wait(timeout):
+                raise RuntimeError('distributed execution of %s did not finish in %s seconds' % (self.session, timeout))
+        finally:
+            self.stop()
+        if self.error:
+            raise RuntimeError(self.error)
+
+        self.workspace.merge(self.base, [SessionWorkspace.changes(self.base, self.state)])
+        return self.proteum.exemuta_update(D=self.D, session=self.session)
+
+    def start(self, address):
+        address = parse_address(address)
+        coordinator = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                coordinator.handle(self.rfile, self.wfile)
+
+        if isinstance(address, tuple):
+            if not self.token:
+                raise ValueError('a token is required to listen on TCP (%s:%s)' % address)
+            server_class = socketserver.ThreadingTCPServer
+        else:
+            server_class = socketserver.ThreadingUnixStreamServer
+            if os.path.exists(address):
+                os.remove(address)
+        server_class.allow_reuse_address = True
+        server_class.daemon_threads = True
+        self.server = server_class(address, Handler)
+        self.address = self.server.server_address
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            if isinstance(self.address, str) and os.path.exists(self.address):
+                os.remove(self.address)
+            self.server = None
+
+    def handle(self, rfile, wfile):
+        owned = set()
+        try:
+            while True:
+                try:
+                    message = receive(rfile)
+                except (ValueError, socket.error):
+                    break
+                if message is None:
+                    break
+                if not self.authorized(message):
+                    send(wfile, {'error': 'invalid token'})
+                    break
+                op = message.get('op')
+                if op == 'hello':
+                    send(wfile, self.payload)
+                elif op == 'next':
+                    send(wfile, self.next_unit(owned, message.get('revision', 0)))
+                elif op == 'result':
+                    patch = decode_patch(message['patch'])
+                    invalid = [name for name in patch if not self.workspace.valid_name(name)]
+                    if invalid:
+                        send(wfile, {'error': 'not a file of session %s: %s' % (self.session, ', '.join(invalid))})
+                        break
+                    self.complete(message['unit'], message['revision'], patch, owned)
+                    send(wfile, {'ok': True})
+                elif op == 'failed':
+                    self.fail(message['unit'], message.get('error', ''), owned)
+                    send(wfile, {'ok': True})
+                else:
+                    send(wfile, {'error': 'unknown op %r' % op})
+        finally:
+            self.release(owned)
+
+    def authorized(self, message):
+        if self.token is None:
+            return True
+        token = message.get('token')
+        # JSON strings are unicode on Python 2 too
+        return isinstance(token, type(u'')) and hmac.compare_digest(token.encode('utf-8'), self.token.encode('utf-8'))
+
+    def next_unit(self, owned, revision):
+        """ The next unit to execute, with the changes from the worker's revision to the current one. """
+        with self.lock:
+            self.expire_leases()
+            if self.finished.is_set():
+                return {'done': True}
+            if not self.pending:
+                return {'wait': True}
+            unit = self.pending.pop(0)
+            current = len(self.history)
+            self.assigned[unit] = (time.time(), current)
+            self.states[current] = self.state
+            owned.add(unit)
+            first, last = self.units[unit]
+            return {'unit': unit, 'f': first, 't': last, 'revision': current,
+                    'patches': [encode_patch(patch) for patch in self.history[revision:]]}
+
+    def complete(self, unit, revision, patch, owned):
+        """ Merge the result of a unit executed on a revision into the current state. """
+        with self.lock:
+            owned.discard(unit)
+            if unit in self.results or revision not in self.states:
+                # done by another worker, or served again after its lease expired
+                return
+            files, conflicts = self.workspace.merged(self.states[revision],
+                [SessionWorkspace.changes(self.states[revision], self.state), patch])
+            if conflicts:
+                first, last = self.units[unit]
+                self.error = 'mutants %d-%d of %s conflict with the units executed meanwhile: %s' % (first, last,
+                    self.session, ', '.join('%s@%d' % conflict for conflict in conflicts[:10]))
+                self.finished.set()
+                return
+            state = dict(self.state)
+            state.update(files)
+            self.history.append(SessionWorkspace.changes(self.state, state))
+            self.state = state
+            self.results.add(unit)
+            self.assigned.pop(unit, None)
+            if unit in self.pending:
+                self.pending.remove(unit)
+            self.prune()
+            if len(self.results) == len(self.units):
+                self.finished.set()
+
+    def prune(self):
+        """ Forget the files of the revisions no unit is executed on. """
+        revisions = set(revision for _, revision in self.assigned.values())
+        for revision in list(self.states):
+            if revision not in revisions:
+                del self.states[revision]
+
+    def fail(self, unit, error, owned):
+        """ Serve a failed unit again, or give up the run after too many attempts. """
+        with self.lock:
+            owned.discard(unit)
+            if unit in self.results or self.assigned.pop(unit, None) is None:
+                return
+            self.prune()
+            self.failures[unit] = self.failures.get(unit, 0) + 1
+            if self.failures[unit] >= self.attempts:
+                first, last = self.units[unit]
+                self.error = 'mutants %d-%d of %s failed %d times: %s' % (first, last, self.session,
+                    self.failures[unit], error)
+                self.finished.set()
+            else:
+                self.pending.append(unit)
+
+    def release(self, owned):
+        """ Put back in the queue the units of a worker that went away. """
+        with self.lock:
+            for unit in sorted(owned):
+                if unit not in self.results and unit in self.assigned:
+                    del self.assigned[unit]
+                    self.pending.insert(0, unit)
+            owned.clear()
+            self.prune()
+
+    def expire_leases(self):
+        if not self.lease:
+            return
+        now = time.time()
+        for unit, (started, _) in list(self.assigned.items()):
+            if now - started > self.lease:
+                del self.assigned[unit]
+                self.pending.append(unit)
+        self.prune()
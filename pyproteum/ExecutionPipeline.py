@@ -0,0 +1,176 @@
+import threading, time
+try:
+    from queue import Queue, Empty
+except ImportError:
+    from Queue import Queue, Empty
+from SessionWorkspace import SessionWorkspace
+from ParallelExecutor import ParallelExecutor
+
+class StageMetrics(object):
+    """ Throughput of a pipeline stage. busy is the sum of the time spent by its workers. """
+
+    def __init__(self, name):
+        self.name = name
+        self.batches = 0
+        self.mutants = 0
+        self.busy = 0.0
+        self.started = None
+        self.finished = None
+        self.lock = threading.Lock()
+
+    def add(self, mutants, started, finished):
+        with self.lock:
+            self.batches += 1
+            self.mutants += mutants
+            self.busy += finished - started
+            self.started = started if self.started is None else min(self.started, started)
+            self.finished = finished if self.finished is None else max(self.finished, finished)
+
+    @property
+    def wall(self):
+        if self.started is None:
+            return 0.0
+        return self.finished - self.started
+
+    @property
+    def throughput(self):
+        """ Mutants per second while the stage was running. """
+        return self.mutants / self.wall if self.wall > 0 else 0.0
+
+    def __repr__(self):
+        return "%s: %d batches, %d mutants, %.2fs wall, %.2fs busy, %.2f mutants/s" % (
+            self.name, self.batches, self.mutants, self.wall, self.busy, self.throughput)
+
+class ExecutionPipeline(object):
+    """ Pipelined compilation and execution of mutants
+        The mutants are split in batches (f/t ranges) which go through two stages running
+        at the same time: exemuta -compile and exemuta -exec. While batch N is executed,
+        batch N+1 is compiled, so the total time gets close to the time of the slower stage.
+
+        Each batch in flight works on its own copy of the session (see SessionWorkspace), so
+        stages never touch the same files. Copies are reused: when a batch is executed, its
+        copy goes back to a pool and the next batch compiled in it only diffs against what
+        the copy held before. The changes are merged in batch order at the end and
+        exemuta -update is called. The queue between the stages is bounded (queue_size), so
+        compilation does not get too far ahead of execution (and at most compile_workers +
+        queue_size + exec_workers copies are made).
+    """
+
+    def __init__(self, proteum, batch_size=100, compile_workers=1, exec_workers=1, queue_size=2,
+                 D="", session=None, **exec_args):
+        """ Arguments:
+            proteum: Proteum object used to run the commands
+            batch_size: how many mutants in each batch
+            compile_workers, exec_workers: how many batches each stage handles at the same time
+            queue_size: how many compiled batches may wait for execution
+            D: directory where the session is located (default is ".")
+            exec_args: other arguments passed to Proteum.exemuta_exec (trace, T, ...)
+        """
+        self.proteum = proteum
+        self.batch_size = batch_size
+        self.compile_workers = compile_workers
+        self.exec_workers = exec_workers
+        self.queue_size = queue_size
+        self.D = D
+        self.session = session if session is not None else proteum.session
+        self.exec_args = exec_args
+        self.metrics = {'compile': StageMetrics('compile'), 'exec': StageMetrics('exec')}
+
+    def batches(self, f, t):
+        """ List of (first, last) ranges of batch_size mutants (see ParallelExecutor.shards). """
+        return ParallelExecutor(self.proteum).shards(f, t, self.batch_size)
+
+    @staticmethod
+    def check(result, command):
+        if result is None or not result.ok:
+            raise RuntimeError('%s failed: %s' % (command, result.stderr.strip() if result is not None else 'no result'))
+
+    def run(self, f=0, t=0):
+        """ Compile and execute the mutants from f to t (t equals to 0 means up to the last one).
+            Returns the metrics of each stage.
+        """
+        if t <= 0:
+            t = ParallelExecutor(self.proteum).last_mutant(self.D, self.session)
+
+        main = SessionWorkspace(self.session, self.D)
+        base = main.snapshot()
+        batches = self.batches(f, t)
+        patches = [None] * len(batches)
+        errors = []
+
+        # copies of the session not in use, each with the snapshot of what it holds
+        pool = Queue()
+        clones = []
+        lock = threading.Lock()
+
+        def take():
+            try:
+                return pool.get_nowait()
+            except Empty:
+                clone = main.clone()
+                with lock:
+                    clones.append(clone)
+                return clone, base
+
+        todo = Queue()
+        for batch in enumerate(batches):
+            todo.put(batch)
+        for _ in range(self.compile_workers):
+            todo.put(None)
+        compiled = Queue(self.queue_size)
+
+        def compile_stage():
+            while True:
+                item = todo.get()
+                if item is None:
+                    break
+                index, (first, last) = item
+                clone, before = take()
+                try:
+                    started = time.time()
+                    self.check(self.proteum.exemuta_compile(D=clone.directory, f=first, t=last,
+                        session=self.session), 'exemuta -compile -f %d -t %d' % (first, last))
+                    self.metrics['compile'].add(last - first + 1, started, time.time())
+                except Exception as e:
+                    # the copy is left half-changed, so it is not reused
+                    errors.append(e)
+                    continue
+                compiled.put((index, (first, last), clone, before))
+
+        def exec_stage():
+            while True:
+                item = compiled.get()
+                if item is None:
+                    break
+                index, (first, last), clone, before = item
+                try:
+                    started = time.time()
+                    self.check(self.proteum.exemuta_exec(D=clone.directory, f=first, t=last,
+                        session=self.session, **self.exec_args), 'exemuta -exec -f %d -t %d' % (first, last))
+                    self.metrics['exec'].add(last - first + 1, started, time.time())
+                    patches[index] = clone.diff(before)
+                    pool.put((clone, clone.snapshot()))
+                except Exception as e:
+                    errors.append(e)
+
+        compilers = [threading.Thread(target=compile_stage) for _ in range(self.compile_workers)]
+        executors = [threading.Thread(target=exec_stage) for _ in range(self.exec_workers)]
+        try:
+            for thread in compilers + executors:
+                thread.start()
+            for thread in compilers:
+                thread.join()
+            for _ in executors:
+                compiled.put(None)
+            for thread in executors:
+                thread.join()
+        finally:
+            for clone in clones:
+                clone.remove()
+
+        if errors:
+            raise errors[0]
+
+        main.merge(base, patches)
+        self.proteum.exemuta_update(D=self.D, session=self.session)
+        return self.metrics
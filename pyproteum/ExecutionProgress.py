@@ -0,0 +1,191 @@
+import asyncio, threading, time
+from collections import deque
+from MutantList import MutantList
+from ParallelExecutor import ParallelExecutor
+
+class ProgressEvent(object):
+    """ Progress of a mutant execution.
+        Attributes:
+        kind: 'progress' (a mutant finished), 'stalled' (no mutant finished for a while) or 'finished'
+        done, total: mutants executed so far and mutants to execute
+        elapsed: seconds since the execution started
+        rate: mutants per second since the execution started
+        latency: moving average of the seconds per mutant (last window mutants)
+        eta: estimated seconds to finish (None while unknown)
+        dead, alive: counts of the executed range, only known in the 'finished' event
+    """
+
+    __slots__ = ('kind', 'done', 'total', 'elapsed', 'rate', 'latency', 'eta', 'dead', 'alive')
+
+    def __init__(self, kind, done, total, elapsed, rate, latency, eta, dead=None, alive=None):
+        self.kind = kind
+        self.done = done
+        self.total = total
+        self.elapsed = elapsed
+        self.rate = rate
+        self.latency = latency
+        self.eta = eta
+        self.dead = dead
+        self.alive = alive
+
+    def __repr__(self):
+        return "ProgressEvent(%s, %d/%s, %.2f mutants/s, eta=%s)" % (self.kind, self.done, self.total,
+            self.rate, "%.1fs" % self.eta if self.eta is not None else None)
+
+class ExecutionProgress(object):
+    """ Live progress of exemuta -exec
+        Runs exemuta in verbose mode (-v), where ProteumIM prints a character every time a
+        mutant execution ends, and turns that stream into ProgressEvents with throughput,
+        moving-average latency and ETA, delivered while the command is still running.
+        Only that character is counted in the output, so it must not appear in anything else
+        exemuta prints: the default is a control character (SOH), and a printable one such as
+        '.' would also count the periods of exemuta's messages.
+
+        Consumers subscribe callbacks, or iterate over the events from asyncio:
+        > async for event in ExecutionProgress(proteum, D='dir').events(f=0, t=99):
+        >     ...
+
+        The verbose character does not tell whether the mutant died, so dead/alive counts are
+        read (muta -l) once the execution ends and sent in the 'finished' event.
+        If stall_seconds is set, a 'stalled' event is sent whenever no mutant finishes in that time.
+    """
+
+    marker = '\x01'
+
+    def __init__(self, proteum, D="", session=None, char=marker, window=20, stall_seconds=None, count_status=True):
+        """ Arguments:
+            proteum: Proteum object used to run the commands
+            D: directory where the session is located (default is ".")
+            char: character printed by ProteumIM for each mutant executed (see marker)
+            window: how many of the last mutants are used for the moving-average latency
+            stall_seconds: seconds without progress before a 'stalled' event (default is never)
+            count_status: if True, the 'finished' event has the dead/alive counts of the range
+        """
+        self.proteum = proteum
+        self.D = D
+        self.session = session if session is not None else proteum.session
+        self.char = char
+        self.window = window
+        self.stall_seconds = stall_seconds
+        self.count_status = count_status
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.reset(None)
+
+    def subscribe(self, callback):
+        """ Register a callable receiving every ProgressEvent. """
+        self.subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def reset(self, total):
+        self.total = total
+        self.done = 0
+        self.started = time.time()
+        self.last = self.started
+        self.warned = self.started
+        self.latencies = deque(maxlen=self.window)
+
+    def event(self, kind, dead=None, alive=None):
+        now = time.time()
+        elapsed = now - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        latency = sum(self.latencies) / len(self.latencies) if self.latencies else None
+        eta = None
+        if latency is not None and self.total is not None:
+            eta = max(0, self.total - self.done) * latency
+        return ProgressEvent(kind, self.done, self.total, elapsed, rate, latency, eta, dead, alive)
+
+    def emit(self, event):
+        for callback in list(self.subscribers):
+            callback(event)
+
+    def feed(self, text):
+        """ Consume a chunk of the verbose output (used as the on_output callback of exemuta). """
+        for _ in range(text.count(self.char)):
+            with self.lock:
+                if self.total is not None and self.done >= self.total:
+                    break
+                now = time.time()
+                self.latencies.append(now - self.last)
+                self.last = now
+                self.done += 1
+                event = self.event('progress')
+            self.emit(event)
+
+    def watch(self, stop):
+        """ Send 'stalled' events while the execution runs (see stall_seconds). """
+        while not stop.wait(min(1.0, self.stall_seconds)):
+            with self.lock:
+                now = time.time()
+                stalled = now - max(self.last, self.warned) >= self.stall_seconds
+                event = self.event('stalled') if stalled else None
+                if stalled:
+                    self.warned = now
+            if event:
+                self.emit(event)
+
+    def run(self, f=0, t=0, **exec_args):
+        """ Execute the mutants from f to t (t equals to 0 means up to the last one) sending
+            events to the subscribers. exec_args are passed to Proteum.exemuta_exec (trace, T, ...).
+            Returns the result of exemuta.
+        """
+        if t <= 0:
+            t = ParallelExecutor(self.proteum).last_mutant(self.D, self.session)
+        self.reset(t - f + 1)
+
+        stop = threading.Event()
+        watcher = None
+        if self.stall_seconds:
+            watcher = threading.Thread(target=self.watch, args=(stop,))
+            watcher.daemon = True
+            watcher.start()
+        try:
+            result = self.proteum.exemuta_exec(D=self.D, f=f, t=t, v=self.char, session=self.session,
+                on_output=self.feed, **exec_args)
+        finally:
+            stop.set()
+            if watcher:
+                watcher.join()
+
+        dead = alive = None
+        if self.count_status:
+            mutants = MutantList.load(self.proteum, f=f, t=t, D=self.D, session=self.session)
+            dead = sum(1 for mutant in mutants if mutant.dead)
+            alive = sum(1 for mutant in mutants if mutant.alive)
+        self.emit(self.event('finished', dead, alive))
+        return result
+
+    async def events(self, f=0, t=0, **exec_args):
+        """ Asynchronous iterator over the events of an execution (see run).
+            The command runs in a thread, so the event loop is free while it executes.
+        """
+        loop = asyncio.get_event_loop()
+        queue = asyncio.Queue()
+
+        def push(event):
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+        self.subscribe(push)
+        task = loop.run_in_executor(None, lambda: self.run(f, t, **exec_args))
+        try:
+            while True:
+                getter = asyncio.ensure_future(queue.get())
+                await asyncio.wait([getter, task], return_when=asyncio.FIRST_COMPLETED)
+                if getter.done():
+                    event = getter.result()
+                    yield event
+                    if event.kind == 'finished':
+                        break
+                else:
+                    getter.cancel()
+                    if queue.empty():
+                        # the execution ended without a 'finished' event: raise its error
+                        task.result()
+                        break
+            await task
+        finally:
+            self.unsubscribe(push)
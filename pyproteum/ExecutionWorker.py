@@ -0,0 +1,136 @@
+from __future__ import print_function
+import base64, io, os, shutil, socket, sys, tarfile, tempfile, time
+from Proteum import Proteum
+from SessionWorkspace import SessionWorkspace
+from ExecutionCoordinator import parse_address, send, receive, encode_patch, decode_patch
+
+class ExecutionWorker(object):
+    """ Worker for distributed mutant execution (see ExecutionCoordinator)
+        Connects to a coordinator, unpacks the session it serves into a local directory and
+        executes the work units it receives with exemuta -exec, sending back the changes of
+        the session files made by each unit. Before a unit, the local copy is brought to the
+        coordinator's current revision with the changes sent along with the unit; after it, the
+        copy goes back to that revision, since the unit's changes come back merged in the next
+        ones.
+
+        Usage: python ExecutionWorker.py host:port|/path/to/socket [proteum bin dir]
+        The token is taken from $PROTEUM_EXECUTION_TOKEN.
+    """
+
+    def __init__(self, address, proteum=None, workdir=None, poll=0.5, token=None):
+        self.address = parse_address(address)
+        self.proteum = proteum if proteum is not None else Proteum()
+        self.workdir = workdir
+        self.token = token
+        self.poll = poll
+        self.executed = 0
+        self.failed = 0
+
+    def connect(self):
+        if isinstance(self.address, tuple):
+            sock = socket.create_connection(self.address)
+        else:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(self.address)
+        return sock
+
+    @staticmethod
+    def check_members(tar, directory):
+        """ Members of a session archive, refusing the ones that would be written (or link)
+            outside of directory, and devices.
+        """
+        root = os.path.realpath(directory)
+
+        def inside(path):
+            path = os.path.realpath(path)
+            return path == root or path.startswith(root + os.sep)
+
+        members = tar.getmembers()
+        for member in members:
+            path = os.path.join(directory, member.name)
+            target = None
+            if member.issym():
+                target = os.path.join(os.path.dirname(path), member.linkname)
+            elif member.islnk():
+                target = os.path.join(directory, member.linkname)
+            if (os.path.isabs(member.name) or not inside(path) or member.isdev()
+                    or (target is not None and (os.path.isabs(member.linkname) or not inside(target)))):
+                raise ValueError('unsafe member in session archive: %s' % member.name)
+        return members
+
+    def unpack(self, archive):
+        directory = tempfile.mkdtemp(prefix='pyproteum-worker-', dir=self.workdir)
+        try:
+            with tarfile.open(fileobj=io.BytesIO(base64.b64decode(archive)), mode='r:gz') as tar:
+                members = self.check_members(tar, directory)
+                if hasattr(tarfile, 'data_filter'):
+                    tar.extractall(directory, members, filter='data')
+                else:
+                    tar.extractall(directory, members)
+        except Exception:
+            shutil.rmtree(directory, ignore_errors=True)
+            raise
+        return os.path.join(directory, 'session'), directory
+
+    def request(self, stream, message):
+        if self.token is not None:
+            message['token'] = self.token
+        send(stream, message)
+        reply = receive(stream)
+        if reply is not None and 'error' in reply:
+            raise RuntimeError('coordinator: %s' % reply['error'])
+        return reply
+
+    def run(self):
+        """ Execute work units until the coordinator says everything is done. """
+        sock = self.connect()
+        stream = sock.makefile('rwb')
+        directory = None
+        try:
+            hello = self.request(stream, {'op': 'hello'})
+            session_dir, directory = self.unpack(hello['archive'])
+            workspace = SessionWorkspace(hello['session'], session_dir)
+            revision = hello['revision']
+
+            while True:
+                message = self.request(stream, {'op': 'next', 'revision': revision})
+                if message is None or message.get('done'):
+                    break
+                if message.get('wait'):
+                    time.sleep(self.poll)
+                    continue
+
+                for patch in message['patches']:
+                    workspace.apply(decode_patch(patch))
+                revision = message['revision']
+                before = workspace.snapshot()
+                result = self.proteum.exemuta_exec(D=session_dir, f=message['f'], t=message['t'],
+                    session=workspace.session, **hello['exec_args'])
+                if result is None or not result.ok:
+                    # undo what the failed run changed and let the coordinator serve the unit again
+                    workspace.restore(before)
+                    self.request(stream, {'op': 'failed', 'unit': message['unit'],
+                                          'error': 'exit code %d' % result.returncode if result is not None else 'no session'})
+                    self.failed += 1
+                    continue
+                patch = workspace.diff(before)
+                workspace.restore(before)
+                self.request(stream, {'op': 'result', 'unit': message['unit'], 'revision': revision,
+                                      'patch': encode_patch(patch)})
+                self.executed += 1
+        finally:
+            stream.close()
+            sock.close()
+            if directory:
+                shutil.rmtree(directory, ignore_errors=True)
+        return self.executed
+
+# Main to run a worker:
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: %s host:port|/path/to/socket [proteum bin dir]" % sys.argv[0])
+        sys.exit(1)
+    proteum = Proteum()
+    if len(sys.argv) > 2:
+        proteum.set_bin_dir(sys.argv[2])
+    ExecutionWorker(sys.argv[1], proteum, token=os.environ.get('PROTEUM_EXECUTION_TOKEN')).run()
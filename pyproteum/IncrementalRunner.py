@@ -0,0 +1,287 @@
+import os, re, shlex, shutil
+from MutantList import MutantList
+from TestCaseInfo import TestCaseInfo
+from SessionWorkspace import SessionWorkspace
+
+class IncrementalPlan(object):
+    """ What an incremental run has to do after a source change.
+        Attributes:
+        changed_units: units (C functions) whose code changed, was added or was removed
+        full: True when a change happened outside of any unit (globals, macros, includes),
+              in which case every mutant has to be executed again
+        stale: numbers of the mutants generated for the old code of the changed units
+        first_new: number of the first mutant generated for the new code
+        changed_tests: numbers of the test cases whose output or return code changed when
+                       they were recorded again with the new program
+    """
+
+    def __init__(self, changed_units, full=False):
+        self.changed_units = changed_units
+        self.full = full
+        self.stale = []
+        self.first_new = 0
+        self.changed_tests = []
+
+    def __repr__(self):
+        return "IncrementalPlan(units=%r, full=%r, stale=%d, changed_tests=%d)" % (
+            self.changed_units, self.full, len(self.stale), len(self.changed_tests))
+
+class IncrementalRunner(object):
+    """ Incremental mutation testing
+        Compares the source program with the copy stored at the last run, unit (C function)
+        by unit: a unit changed when its code differs or it was added or removed, wherever it
+        is in the file. Only the mutants of the changed units are regenerated (muta-gen -unit)
+        and executed; the statuses of all other mutants are kept.
+
+        Before generating mutants, the session program is built again from the new source
+        as test-new does (compilation of the original program, li and instrum), and the test
+        cases are recorded again, so their expected outputs come from the new program. If any
+        of them changed, every active mutant is executed again.
+
+        The mutants generated for the old code of a changed unit are made inactive
+        (exemuta -select/-invert), and the new ones, appended at the end of the session,
+        are executed with exemuta -exec -f.
+    """
+
+    function_header = re.compile(r'([A-Za-z_]\w*)\s*\([^{};]*\)\s*$')
+    not_a_function = re.compile(r'(=|\b(?:struct|union|enum)\b[^()]*$)')
+
+    def __init__(self, proteum):
+        self.proteum = proteum
+
+    @staticmethod
+    def snapshot_path(D, session):
+        return os.path.join(D if D else ".", ".%s.source" % session)
+
+    @classmethod
+    def units(cls, text):
+        """ List (name, first line, last line) of the functions defined in a C source. """
+        units = []
+        depth = 0
+        line = 1
+        header = []
+        header_line = 1
+        name = None
+        start = 0
+        i = 0
+        n = len(text)
+        line_start = True
+        while i < n:
+            c = text[i]
+            if text.startswith('/*', i):
+                end = text.find('*/', i + 2)
+                end = n if end < 0 else end + 2
+                line += text.count('\n', i, end)
+                i = end
+                continue
+            if text.startswith('//', i):
+                end = text.find('\n', i)
+                i = n if end < 0 else end
+                continue
+            if c == '#' and line_start:
+                end = i
+                while True:
+                    end = text.find('\n', end)
+                    if end < 0 or text[end - 1] != '\\':
+                        break
+                    end += 1
+                end = n if end < 0 else end
+                line += text.count('\n', i, end)
+                i = end
+                continue
+            if c in '"\'':
+                end = i + 1
+                while end < n and text[end] != c:
+                    end += 2 if text[end] == '\\' else 1
+                line += text.count('\n', i, end)
+                if depth == 0:
+                    header.append(text[i:end + 1])
+                i = end + 1
+                line_start = False
+                continue
+
+            if c == '\n':
+                line += 1
+                line_start = True
+            elif not c.isspace():
+                line_start = False
+
+            if depth == 0:
+                if c == '{':
+                    head = ''.join(header)
+                    match = cls.function_header.search(head)
+                    if match and not cls.not_a_function.search(head):
+                        name = match.group(1)
+                        start = header_line + head[:match.start()].count('\n')
+                    else:
+                        name = None
+                    depth = 1
+                    header = []
+                elif c in ';}':
+                    header = []
+                else:
+                    if not header and c.isspace():
+                        pass
+                    else:
+                        if not header:
+                            header_line = line
+                        header.append(c)
+            elif c == '{':
+                depth += 1
+            elif c == '}':
+                depth -= 1
+                if depth == 0:
+                    if name:
+                        units.append((name, start, line))
+                    name = None
+            i += 1
+        return units
+
+    @classmethod
+    def unit_code(cls, text):
+        """ Dictionary {name: code} of the functions defined in a C source (trailing blanks removed). """
+        lines = text.splitlines()
+        return dict((name, '\n'.join(line.rstrip() for line in lines[first - 1:last]))
+                    for name, first, last in cls.units(text))
+
+    @classmethod
+    def outside_units(cls, text):
+        """ Non-blank lines of a C source that are not part of any function (globals, macros, ...). """
+        covered = set()
+        for name, first, last in cls.units(text):
+            covered.update(range(first, last + 1))
+        return [line.strip() for number, line in enumerate(text.splitlines(), 1)
+                if number not in covered and line.strip()]
+
+    @classmethod
+    def plan(cls, old, new):
+        """ Compute the IncrementalPlan (without mutants) for a change from old to new source.
+            Units are matched by name and compared by content, so a unit that only moved
+            (e.g. because a function was inserted before it) is not changed.
+        """
+        old_units, new_units = cls.unit_code(old), cls.unit_code(new)
+        changed = [name for name in sorted(set(old_units) | set(new_units))
+                   if old_units.get(name) != new_units.get(name)]
+        return IncrementalPlan(changed, cls.outside_units(old) != cls.outside_units(new))
+
+    def check(self, result, step):
+        if result is None or not result.ok:
+            raise RuntimeError('incremental run failed at %s%s' % (step,
+                ': exit code %d' % result.returncode if result is not None else ''))
+        return result
+
+    def rebuild(self, source, D="", session=None, executable=None, compile_command=None):
+        """ Build the session program again from the current source, as test-new does, without
+            touching the test cases and mutants: compile the original program and recreate the
+            preprocessed (li) and instrumented (instrum) sources muta-gen and exemuta work on.
+            Arguments:
+            source: path of the source program
+            executable: name of the original executable (default is the source name without ".c")
+            compile_command: command compiling the original program (default is
+                             "gcc <source>.c -o <executable>", as test-new)
+        """
+        if session is None:
+            session = self.proteum.session
+        name = os.path.splitext(os.path.basename(source))[0]
+        executable = executable or name
+        command = compile_command or "gcc %s.c -o %s" % (name, executable)
+        li = '__' + name
+        directory = ['-D', D] if D else []
+
+        self.check(self.proteum.runner.run(shlex.split(command), cwd=D or None), command)
+        # li and instrum name the preprocessed source last, the way test-new calls them
+        self.check(self.proteum.exec_command(['li'] + directory + ['-P', li, name], li), 'li -P')
+        self.check(self.proteum.exec_command(['li', '-l'] + directory + [li, li], 'convert'), 'li -l')
+        self.check(self.proteum.exec_command(['instrum'] + directory + ['-EE', session], li), 'instrum')
+        self.check(self.proteum.exec_command(['instrum', '-build'] + directory + [li], session), 'instrum -build')
+
+    def record_tests(self, D="", session=None, trace=True):
+        """ Record every test case again with the current program (tcase -create, then tcase-add
+            with the same parameters, input and label, in the same order), so their expected outputs
+            come from it. Disabled test cases are disabled again.
+            The session files are backed up first and restored if any step fails, so the test
+            cases are never lost half way.
+            Returns the numbers of the test cases whose output or return code changed.
+        """
+        if session is None:
+            session = self.proteum.session
+        report = self.proteum.report(D=D, session=session)
+        tests = list(report.test_cases)
+        if not tests:
+            return []
+
+        workspace = SessionWorkspace(session, D)
+        backup = workspace.snapshot()
+        try:
+            self.check(self.proteum.tcase_create(D, session), 'tcase -create')
+            for test in tests:
+                self.check(self.proteum.tcase_add(p=test.parameters, trace=trace, label=test.label or "", D=D,
+                    session=session, input=str(test.input) if test.input else None),
+                    'tcase-add of test case %d' % test.number)
+            disabled = [test.number for test in tests if not test.enabled]
+            if disabled:
+                self.check(self.proteum.tcase_disable(x=" ".join(str(number) for number in disabled), D=D,
+                    session=session), 'tcase -d')
+            report = self.proteum.report(D=D, session=session)
+        except BaseException:
+            workspace.restore(backup)
+            raise
+        return [new.number for old, new in zip(tests, report.test_cases) if not TestCaseInfo.same_output(old, new)]
+
+    def run(self, source, operators, D="", session=None, executable=None, compile_command=None, **exec_args):
+        """ Bring a session up to date with the current version of the source program.
+            Arguments:
+            source: path of the source program (the same file used by the session)
+            operators: operators used to generate the mutants (see Proteum.muta_gen)
+            D: directory where the session is located (default is ".")
+            executable, compile_command: how the original program is built (see rebuild)
+            exec_args: other arguments passed to Proteum.exemuta_exec (trace, T, workers, ...);
+                       the range of mutants (f, t) is chosen by the incremental run
+            The first call only stores the source; returns the IncrementalPlan executed.
+            Raises RuntimeError if a step fails; the source is then stored only when every step
+            succeeded, so the next run starts again from the same version.
+        """
+        if 'f' in exec_args or 't' in exec_args:
+            raise TypeError('the range of mutants (f, t) is chosen by the incremental run')
+        if session is None:
+            session = self.proteum.session
+        snapshot = self.snapshot_path(D, session)
+        with open(source) as f:
+            new = f.read()
+
+        if not os.path.isfile(snapshot):
+            shutil.copyfile(source, snapshot)
+            return IncrementalPlan([])
+        with open(snapshot) as f:
+            old = f.read()
+
+        plan = self.plan(old, new)
+        if plan.full or plan.changed_units:
+            self.rebuild(source, D, session, executable, compile_command)
+            plan.changed_tests = self.record_tests(D, session, exec_args.get('trace', True))
+
+        generated = []
+        if plan.changed_units and not plan.full:
+            mutants = MutantList.load(self.proteum, D=D, session=session)
+            plan.stale = [m.number for m in mutants if m.unit in plan.changed_units]
+            plan.first_new = max([m.number for m in mutants] + [-1]) + 1
+
+            if plan.stale:
+                self.check(self.proteum.exemuta_inactivate(plan.stale, mutants, D, session), 'exemuta -select')
+
+            units = self.unit_code(new)
+            generated = [unit for unit in plan.changed_units if unit in units]
+            for unit in generated:
+                self.check(self.proteum.muta_gen(operators, unit=unit, D=D, session=session),
+                    'muta-gen -unit %s' % unit)
+
+        if plan.full or plan.changed_tests:
+            self.check(self.proteum.exemuta_exec(D=D, session=session, **exec_args), 'exemuta -exec')
+        elif plan.changed_units:
+            if generated:
+                self.check(self.proteum.exemuta_exec(D=D, f=plan.first_new, session=session, **exec_args),
+                    'exemuta -exec')
+            self.check(self.proteum.exemuta_update(D=D, session=session), 'exemuta -update')
+
+        shutil.copyfile(source, snapshot)
+        return plan
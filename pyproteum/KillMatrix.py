@@ -0,0 +1,136 @@
+from Proteum import Proteum
+from MutantList import MutantList
+from compat import int_to_bytes
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def popcount(bits):
+    return bin(bits).count('1')
+
+class KillMatrix(object):
+    """ Mutant x test case kill matrix
+        Stores which test cases kill which mutants as bitsets: one integer per mutant (a bit for
+        each test case) and one integer per test case (a bit for each mutant). Queries combine
+        whole bitsets at once instead of looping over mutants, so they take microseconds even
+        for large sessions. as_numpy() exports the matrix as a packed NumPy array.
+
+        The matrix is meant to be loaded from a session executed in research mode, where every
+        mutant is executed against every test case.
+    """
+
+    def __init__(self, mutants, tests=None):
+        """ Arguments:
+            mutants: list of MutantInfo (see MutantList)
+            tests: list of test case numbers (default is every test case killing some mutant;
+                   load gives every test case of the session, including those killing none)
+        """
+        if tests is None:
+            tests = sorted(set(test for mutant in mutants for test in mutant.killed_by))
+        self.mutants = [mutant.number for mutant in mutants]
+        self.tests = list(tests)
+        self.mutant_index = dict((number, i) for i, number in enumerate(self.mutants))
+        self.test_index = dict((number, i) for i, number in enumerate(self.tests))
+
+        self.rows = [0] * len(self.mutants)
+        self.cols = [0] * len(self.tests)
+        self.operators = {}
+        self.considered = 0
+        for i, mutant in enumerate(mutants):
+            bit = 1 << i
+            self.operators[mutant.operator] = self.operators.get(mutant.operator, 0) | bit
+            if mutant.status not in ('equivalent', 'anomalous') and mutant.active:
+                self.considered |= bit
+            for test in mutant.killed_by:
+                j = self.test_index.get(test)
+                if j is not None:
+                    self.rows[i] |= 1 << j
+                    self.cols[j] |= bit
+
+    @classmethod
+    def load(cls, proteum, D="", session=None):
+        """ Build the kill matrix of a session from the mutant listing ('muta -l'), with a column
+            for every test case of the session's report.
+        """
+        report = proteum.report(D=D, session=session)
+        return cls(MutantList.load(proteum, D=D, session=session), [test.number for test in report.test_cases])
+
+    def mutant_mask(self, mutants=None):
+        """ Bitset of the given mutant numbers (default is all considered mutants). """
+        if mutants is None:
+            return self.considered
+        mask = 0
+        for number in mutants:
+            mask |= 1 << self.mutant_index[number]
+        return mask
+
+    def killed(self, tests=None):
+        """ Bitset of the mutants killed by a set of test cases (default is all of them). """
+        cols = self.cols if tests is None else [self.cols[self.test_index[test]] for test in tests]
+        killed = 0
+        for col in cols:
+            killed |= col
+        return killed
+
+    def numbers(self, mask):
+        """ Mutant numbers of a bitset. """
+        numbers = []
+        while mask:
+            low = mask & -mask
+            numbers.append(self.mutants[low.bit_length() - 1])
+            mask ^= low
+        return numbers
+
+    def score(self, tests=None, mutants=None):
+        """ Mutation score obtained by a subset of test cases on a subset of mutants.
+            Equivalent and anomalous mutants are not considered.
+        """
+        considered = self.mutant_mask(mutants) & self.considered
+        total = popcount(considered)
+        if total == 0:
+            return 0.0
+        return popcount(self.killed(tests) & considered) / float(total)
+
+    def score_by_operator(self, tests=None, preffix=None):
+        """ Mutation score for each operator (as in Proteum.operators(preffix)) with mutants. """
+        killed = self.killed(tests)
+        scores = {}
+        for operator in Proteum.operators(preffix):
+            considered = self.operators.get(operator, 0) & self.considered
+            if considered:
+                scores[operator] = popcount(killed & considered) / float(popcount(considered))
+        return scores
+
+    def score_by_group(self, preffixes, tests=None):
+        """ Mutation score for groups of operators, given by their preffixes (e.g. ['u-O', 'u-S']). """
+        killed = self.killed(tests)
+        scores = {}
+        for preffix in preffixes:
+            considered = 0
+            for operator in Proteum.operators(preffix):
+                considered |= self.operators.get(operator, 0)
+            considered &= self.considered
+            if considered:
+                scores[preffix] = popcount(killed & considered) / float(popcount(considered))
+        return scores
+
+    def kills(self, test):
+        """ Numbers of the mutants killed by a test case. """
+        return self.numbers(self.cols[self.test_index[test]] & self.considered)
+
+    def killers(self, mutant):
+        """ Numbers of the test cases which kill a mutant. """
+        row = self.rows[self.mutant_index[mutant]]
+        return [test for j, test in enumerate(self.tests) if row >> j & 1]
+
+    def as_numpy(self):
+        """ The matrix as a NumPy uint8 array of shape (mutants, ceil(tests / 8)),
+            with the bits of each row packed as numpy.packbits(..., bitorder='little') does.
+        """
+        if numpy is None:
+            raise ImportError('NumPy is required to export the kill matrix')
+        width = (len(self.tests) + 7) // 8
+        data = b''.join(int_to_bytes(row, width) for row in self.rows)
+        return numpy.frombuffer(data, dtype=numpy.uint8).reshape(len(self.rows), width)
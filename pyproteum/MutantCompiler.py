@@ -0,0 +1,206 @@
+import hashlib, json, os, shutil
+from MutantList import MutantList
+
+class MutantCompiler(object):
+    """ Compile stage with Trivial Compiler Equivalence (TCE)
+        Compiles the mutants (exemuta -compile -x) and hashes the binary produced for each
+        of them:
+        - mutants whose binary is identical to the original program's are marked as
+          equivalent (muta -equiv);
+        - mutants whose binaries are identical to each other are duplicates: only the first
+          one of each group is kept active, the others are made inactive.
+
+        Binaries are stored in a content-addressed cache (blobs/<digest>), together with an
+        index from mutant key (source program + compilation command + original binary +
+        operator + descriptor) to digest, so a mutant already seen in another session, or in a
+        previous run, built the same way, is not compiled again: its binary is restored from
+        the cache to where exemuta -compile would have written it.
+
+        The binary of a mutant is found by its name ('binary', relative to the session
+        directory). When the name has the mutant number, several mutants are compiled by a
+        single exemuta -compile (batch_size at a time); otherwise every compilation would
+        overwrite the previous binary, so mutants are compiled one at a time. The name must
+        never be the original program's: compile() removes the binary before building it.
+
+        Notice: TCE needs a deterministic compilation command (avoid embedding timestamps or
+        the name of the mutant source file, as debug information does).
+    """
+
+    def __init__(self, proteum, cache_dir, D="", session=None, executable=None,
+                 binary="%(executable)s.mut%(number)d", batch_size=50, compile_command=""):
+        """ Arguments:
+            proteum: Proteum object used to run the commands
+            cache_dir: directory of the binary cache (shared by sessions)
+            D: directory where the session is located (default is ".")
+            executable: name of the session's executable (default is the session name, as test-new)
+            binary: name of the binary exemuta -compile writes for a mutant, relative to D;
+                    may use %(executable)s and %(number)d
+            batch_size: how many mutants each exemuta -compile compiles, when binary has the number
+            compile_command: compilation command of the session (test-new -C), part of the cache key
+        """
+        self.proteum = proteum
+        self.cache_dir = cache_dir
+        self.D = D
+        self.session = session if session is not None else proteum.session
+        self.executable = executable or self.session
+        self.binary = binary
+        self.batch_size = batch_size
+        self.compile_command = compile_command
+        self.original = None
+        self.index = {}
+        self.compiled = 0
+        self.reused = 0
+        self.equivalent = []
+        self.duplicates = {}
+        for directory in (cache_dir, os.path.join(cache_dir, 'blobs')):
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+        if os.path.isfile(self.index_path()):
+            with open(self.index_path()) as f:
+                self.index = json.load(f)
+
+    def index_path(self):
+        return os.path.join(self.cache_dir, 'index.json')
+
+    def save_index(self):
+        tmp = self.index_path() + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.index, f)
+        os.rename(tmp, self.index_path())
+
+    @staticmethod
+    def digest(path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def blob_path(self, digest):
+        return os.path.join(self.cache_dir, 'blobs', digest[:2], digest)
+
+    def store(self, path, digest):
+        blob = self.blob_path(digest)
+        if not os.path.isfile(blob):
+            if not os.path.isdir(os.path.dirname(blob)):
+                os.makedirs(os.path.dirname(blob))
+            shutil.copyfile(path, blob + '.tmp')
+            os.rename(blob + '.tmp', blob)
+        return blob
+
+    def binary_path(self, number):
+        return os.path.join(self.D if self.D else ".", self.binary % {'executable': self.executable, 'number': number})
+
+    def check_binary(self, number):
+        """ Refuse a binary name that is the original program (see run). """
+        path = self.binary_path(number)
+        if self.original is not None and (os.path.abspath(path) == os.path.abspath(self.original) or
+                (os.path.exists(path) and os.path.samefile(path, self.original))):
+            raise ValueError('the binary of mutant %d (%s) is the original program' % (number, path))
+        return path
+
+    def per_mutant(self):
+        """ True if every mutant has its own binary (the binary name has the mutant number). """
+        return self.binary_path(0) != self.binary_path(1)
+
+    def restore(self, number, digest):
+        """ Copy the cached binary of a mutant to its binary path. Returns the path, or None if
+            the binary is not in the cache.
+        """
+        blob = self.blob_path(digest)
+        if not os.path.isfile(blob):
+            return None
+        path = self.check_binary(number)
+        shutil.copyfile(blob, path + '.tmp')
+        shutil.copymode(blob, path + '.tmp')
+        os.rename(path + '.tmp', path)
+        return path
+
+    def mutant_key(self, source_digest, original_digest, mutant):
+        """ Key of a mutant in the cache. Binaries depend on how they were built, so the
+            compilation command and the original binary are part of it. Without a descriptor
+            the mutation cannot be identified across sessions, so the session and mutant number
+            are used instead.
+        """
+        build = (source_digest, self.compile_command, original_digest)
+        if mutant.descriptor:
+            parts = build + (mutant.operator, mutant.unit, mutant.descriptor)
+        else:
+            parts = build + (os.path.abspath(self.D or "."), self.session, mutant.number)
+        return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+    def compile(self, numbers):
+        """ Compile mutants with a single exemuta -compile and store their binaries in the cache.
+            Returns {number: digest} for the mutants whose binary was produced.
+        """
+        if len(numbers) > 1 and not self.per_mutant():
+            raise ValueError('mutants sharing the binary %s must be compiled one at a time' % self.binary)
+        for number in numbers:
+            # a binary left by an earlier compilation must not be taken for this one
+            if os.path.isfile(self.check_binary(number)):
+                os.remove(self.binary_path(number))
+        result = self.proteum.exemuta('-compile', D=self.D, x=" ".join(str(n) for n in numbers), session=self.session)
+        digests = {}
+        if result is None or not result.ok:
+            return digests
+        for number in numbers:
+            path = self.binary_path(number)
+            if os.path.isfile(path):
+                digests[number] = self.digest(path)
+                self.store(path, digests[number])
+        self.compiled += len(digests)
+        return digests
+
+    def run(self, source, original, f=0, t=0):
+        """ Compile the mutants from f to t (t equals to 0 means up to the last one), detect
+            trivially equivalent and duplicate mutants and update the session accordingly.
+            Arguments:
+            source: source program of the session (part of the cache key)
+            original: original program compiled with the same command used for the mutants
+            Returns a dictionary with the counts of compiled, reused, equivalent and duplicate mutants.
+        """
+        self.original = original
+        source_digest = self.digest(source)
+        original_digest = self.digest(original)
+        mutants = MutantList.load(self.proteum, D=self.D, session=self.session)
+
+        digests = {}
+        keys = {}
+        for mutant in mutants:
+            if mutant.number < f or (t > 0 and mutant.number > t):
+                continue
+            if not mutant.active or mutant.status in ('equivalent', 'anomalous'):
+                continue
+            key = self.mutant_key(source_digest, original_digest, mutant)
+            digest = self.index.get(key)
+            # with a single binary for every mutant, restoring it would only be overwritten
+            if digest is not None and (not self.per_mutant() or self.restore(mutant.number, digest)):
+                digests[mutant.number] = digest
+                self.reused += 1
+            else:
+                keys[mutant.number] = key
+
+        pending = sorted(keys)
+        size = self.batch_size if self.per_mutant() else 1
+        for start in range(0, len(pending), size):
+            for number, digest in self.compile(pending[start:start + size]).items():
+                self.index[keys[number]] = digest
+                digests[number] = digest
+        self.save_index()
+
+        groups = {}
+        for number in sorted(digests):
+            groups.setdefault(digests[number], []).append(number)
+
+        self.equivalent = sorted(groups.pop(original_digest, []))
+        if self.equivalent:
+            self.proteum.muta('-equiv', x=" ".join(str(n) for n in self.equivalent), D=self.D, session=self.session)
+
+        self.duplicates = dict((min(numbers), sorted(numbers)[1:])
+                               for numbers in groups.values() if len(numbers) > 1)
+        inactive = [n for numbers in self.duplicates.values() for n in numbers]
+        if inactive:
+            self.proteum.exemuta_inactivate(inactive, mutants, self.D, self.session)
+
+        return {'compiled': self.compiled, 'reused': self.reused,
+                'equivalent': len(self.equivalent), 'duplicates': len(inactive)}
@@ -0,0 +1,178 @@
+import json, mmap, os, struct
+from MutantList import MutantList, MutantInfo
+from compat import string_types
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+class MutantIndex(object):
+    """ Memory-mapped binary index of mutant statuses
+        Stores the status of every mutant of a session in a compact file with a fixed-width
+        record per mutant, at the position of its number, so a mutant is found in O(1) without
+        running report or parsing text:
+
+            header   magic, version, record size, records, offset and size of the names table
+            records  number, status, cause, active, operator, unit, first killing test case
+            names    JSON with the operator and unit names (records keep their indexes)
+
+        The file is opened with mmap (only the pages read are loaded) and as_numpy() gives a
+        zero-copy structured array, used by select() to answer queries such as "all alive
+        mutants of u-SSDL" over millions of mutants with vectorized comparisons.
+    """
+
+    magic = b'PYPMIDX1'
+    version = 1
+    header = struct.Struct('<8sHHIQQ')
+    record = struct.Struct('<IBBBxHHi')
+
+    statuses = ('alive', 'dead', 'equivalent', 'anomalous')
+    causes = ('', 'stdout', 'retcode', 'timeout', 'trap')
+    missing = 255
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size, self.count, names_offset, names_size = self.header.unpack_from(self.map, 0)
+        if magic != self.magic or record_size != self.record.size:
+            raise ValueError('%s is not a mutant index' % path)
+        names = json.loads(self.map[names_offset:names_offset + names_size].decode('utf-8'))
+        self.operators = names['operators']
+        self.units = names['units']
+
+    @classmethod
+    def write(cls, path, mutants):
+        """ Write the index of a list of MutantInfo (see MutantList) to path. """
+        mutants = list(mutants)
+        count = max(mutant.number for mutant in mutants) + 1 if mutants else 0
+        operators, units = [], []
+        operator_ids, unit_ids = {}, {}
+        records = bytearray(count * cls.record.size)
+        for i in range(count):
+            cls.record.pack_into(records, i * cls.record.size, i, cls.missing, 0, 0, 0, 0, -1)
+        for mutant in mutants:
+            if mutant.operator not in operator_ids:
+                operator_ids[mutant.operator] = len(operators)
+                operators.append(mutant.operator)
+            if mutant.unit not in unit_ids:
+                unit_ids[mutant.unit] = len(units)
+                units.append(mutant.unit)
+            cls.record.pack_into(records, mutant.number * cls.record.size, mutant.number,
+                cls.statuses.index(mutant.status) if mutant.status in cls.statuses else cls.missing,
+                cls.causes.index(mutant.cause) if mutant.cause in cls.causes else 0,
+                1 if mutant.active else 0, operator_ids[mutant.operator], unit_ids[mutant.unit],
+                min(mutant.killed_by) if mutant.killed_by else -1)
+
+        names = json.dumps({'operators': operators, 'units': units}).encode('utf-8')
+        names_offset = cls.header.size + len(records)
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(cls.header.pack(cls.magic, cls.version, cls.record.size, count, names_offset, len(names)))
+            f.write(records)
+            f.write(names)
+            f.flush()
+            os.fsync(f.fileno())
+        os.rename(tmp, path)
+        return path
+
+    @classmethod
+    def export(cls, proteum, path=None, D="", session=None):
+        """ List the mutants of a session (muta -l) and write their index, by default to
+            <session>.midx in the session directory. Returns the opened MutantIndex.
+        """
+        if session is None:
+            session = proteum.session
+        if path is None:
+            path = os.path.join(D, session + '.midx')
+        cls.write(path, MutantList.load(proteum, D=D, session=session))
+        return cls(path)
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def __len__(self):
+        return self.count
+
+    def raw(self, number):
+        """ The record of a mutant as a tuple (number, status, cause, active, operator, unit, killer). """
+        if not 0 <= number < self.count:
+            raise IndexError(number)
+        return self.record.unpack_from(self.map, self.header.size + number * self.record.size)
+
+    def status(self, number):
+        code = self.raw(number)[1]
+        return self.statuses[code] if code < len(self.statuses) else None
+
+    def __getitem__(self, number):
+        """ The MutantInfo of a mutant (killed_by has only the first test case that killed it). """
+        number, status, cause, active, operator, unit, killer = self.raw(number)
+        if status == self.missing:
+            raise KeyError(number)
+        return MutantInfo(number, self.operators[operator], self.units[unit], self.statuses[status],
+            self.causes[cause], bool(active), [killer] if killer >= 0 else [])
+
+    def dtype(self):
+        return numpy.dtype([('number', '<u4'), ('status', 'u1'), ('cause', 'u1'), ('active', 'u1'),
+                            ('reserved', 'u1'), ('operator', '<u2'), ('unit', '<u2'), ('killer', '<i4')])
+
+    def as_numpy(self):
+        """ The records as a NumPy structured array sharing memory with the mapped file
+            (the index cannot be closed while the array is in use).
+        """
+        if numpy is None:
+            raise ImportError('NumPy is required for numpy views of the index')
+        return numpy.frombuffer(self.map, dtype=self.dtype(), count=self.count, offset=self.header.size)
+
+    def select(self, status=None, operator=None, cause=None, active=None, unit=None):
+        """ Numbers of the mutants matching every criterion given, e.g.
+            > index.select(status='alive', operator='u-SSDL')
+            operator may also be a list of operators (such as Proteum.operators('u-S')).
+        """
+        operators = [operator] if isinstance(operator, string_types) else operator
+        criteria = {}
+        if status is not None:
+            criteria['status'] = [self.statuses.index(status)]
+        if cause is not None:
+            criteria['cause'] = [self.causes.index(cause)]
+        if active is not None:
+            criteria['active'] = [1 if active else 0]
+        if operators is not None:
+            criteria['operator'] = [self.operators.index(op) for op in operators if op in self.operators]
+        if unit is not None:
+            criteria['unit'] = [self.units.index(unit)] if unit in self.units else []
+
+        if numpy is not None:
+            records = self.as_numpy()
+            mask = records['status'] != self.missing
+            for field, values in criteria.items():
+                mask &= numpy.isin(records[field], values)
+            return records['number'][mask].tolist()
+
+        fields = ('number', 'status', 'cause', 'active', 'operator', 'unit', 'killer')
+        positions = [(fields.index(field), set(values)) for field, values in criteria.items()]
+        # unpack_from reads the records in place (memoryview of a mmap and iter_unpack are Python 3 only)
+        numbers = []
+        for offset in range(self.header.size, self.header.size + self.count * self.record.size, self.record.size):
+            values = self.record.unpack_from(self.map, offset)
+            if values[1] != self.missing and all(values[i] in wanted for i, wanted in positions):
+                numbers.append(values[0])
+        return numbers
+
+    def counts(self, field='status'):
+        """ How many mutants for each value of a field ('status', 'cause', 'operator' or 'unit'). """
+        names = {'status': self.statuses, 'cause': self.causes, 'operator': self.operators, 'unit': self.units}[field]
+        if numpy is not None:
+            records = self.as_numpy()
+            values = records[field][records['status'] != self.missing]
+            return dict(zip(names, numpy.bincount(values, minlength=len(names)).tolist()))
+        return dict((name, len(self.select(**{field: name}))) for name in names)
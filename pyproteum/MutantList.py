@@ -0,0 +1,113 @@
+import re
+
+class MutantInfo(object):
+    """ Information about a mutant, as listed by ProteumIM's 'muta -l'.
+        status is one of 'alive', 'dead', 'equivalent' or 'anomalous', and cause tells how
+        a dead mutant was killed: 'stdout', 'retcode', 'timeout' or 'trap'.
+        killed_by lists the test cases which killed the mutant (all of them in research mode,
+        only the first one in test mode).
+    """
+
+    __slots__ = ('number', 'operator', 'unit', 'status', 'cause', 'active', 'killed_by', 'descriptor')
+
+    def __init__(self, number=0, operator="", unit="", status="alive", cause="", active=True,
+                 killed_by=None, descriptor=""):
+        self.number = number
+        self.operator = operator
+        self.unit = unit
+        self.status = status
+        self.cause = cause
+        self.active = active
+        self.killed_by = killed_by if killed_by is not None else []
+        self.descriptor = descriptor
+
+    @property
+    def dead(self):
+        return self.status == 'dead'
+
+    @property
+    def alive(self):
+        return self.status == 'alive'
+
+    def __repr__(self):
+        return "MutantInfo(%d, %s, %s%s)" % (self.number, self.operator, self.status,
+            " by %s" % self.cause if self.cause else "")
+
+class MutantList(object):
+    """ Parser for the mutant listing printed by ProteumIM's 'muta -l'.
+        Every mutant starts with a 'MUTANT # n' line, followed by lines describing its
+        status, operator, unit and the test cases which killed it. Unknown lines are ignored.
+    """
+
+    mutant_start = re.compile(r'MUTANT\s*#?\s*:?\s*(\d+)', re.IGNORECASE)
+    status_line = re.compile(r'STATUS\s*:?\s*(.*)', re.IGNORECASE)
+    operator_line = re.compile(r'OPERATOR\s*:?\s*([^\s(]+)', re.IGNORECASE)
+    unit_line = re.compile(r'(?:FUNCTION|UNIT)\s*:?\s*([A-Za-z_]\w*)\s*$', re.IGNORECASE)
+    killed_line = re.compile(r'(?:KILLED|DEAD)\s+BY\s+(?:TEST\s*CASES?)?\s*#?\s*:?\s*([\d\s,]+)$', re.IGNORECASE)
+    descriptor_line = re.compile(r'DESCRIPTOR\s*:?\s*(.*)', re.IGNORECASE)
+
+    causes = (('stdout', 'stdout'), ('output', 'stdout'), ('retcode', 'retcode'),
+              ('return', 'retcode'), ('timeout', 'timeout'), ('time', 'timeout'), ('trap', 'trap'))
+
+    @classmethod
+    def parse(cls, lines):
+        """ Yield a MutantInfo for every mutant found in an iterable of lines. """
+        mutant = None
+        for line in lines:
+            text = line.strip()
+            match = cls.mutant_start.match(text)
+            if match:
+                if mutant is not None:
+                    yield mutant
+                mutant = MutantInfo(int(match.group(1)))
+                continue
+            if mutant is None:
+                continue
+
+            match = cls.status_line.match(text)
+            if match:
+                cls.parse_status(mutant, match.group(1))
+                continue
+            match = cls.killed_line.search(text)
+            if match:
+                mutant.killed_by = [int(n) for n in match.group(1).replace(',', ' ').split()]
+                continue
+            match = cls.operator_line.match(text)
+            if match:
+                mutant.operator = match.group(1)
+                continue
+            match = cls.unit_line.match(text)
+            if match:
+                mutant.unit = match.group(1)
+                continue
+            match = cls.descriptor_line.match(text)
+            if match:
+                mutant.descriptor = match.group(1).strip()
+
+        if mutant is not None:
+            yield mutant
+
+    @classmethod
+    def parse_status(cls, mutant, text):
+        words = text.lower()
+        if 'anomalous' in words:
+            mutant.status = 'anomalous'
+        elif 'equivalent' in words and 'not equivalent' not in words:
+            mutant.status = 'equivalent'
+        elif 'dead' in words:
+            mutant.status = 'dead'
+            for word, cause in cls.causes:
+                if word in words:
+                    mutant.cause = cause
+                    break
+        else:
+            mutant.status = 'alive'
+        mutant.active = 'inactive' not in words
+
+    @classmethod
+    def load(cls, proteum, f=0, t=0, x="", D="", session=None):
+        """ Run 'muta -l' through a Proteum object and return the list of MutantInfo. """
+        result = proteum.muta_list(f, t, x, D, session)
+        if result is None:
+            return []
+        return list(cls.parse(result.stdout.splitlines()))
@@ -0,0 +1,114 @@
+import random
+from KillMatrix import KillMatrix, popcount
+
+class Subsumption(object):
+    """ Result of a subsumption analysis.
+        Attributes:
+        dominators: numbers of the dominator (minimal) mutants, one for each set of test cases killing them
+        subsumed: numbers of the killed mutants subsumed by some dominator
+        alive: numbers of the mutants never killed (kept, since there is no data about them)
+        total: mutants considered (equivalent, anomalous and inactive mutants are not)
+        drift: mean absolute difference between the mutation score estimated with the kept mutants
+               and with all of them, over random subsets of test cases (see MutantSubsumption.drift)
+    """
+
+    def __init__(self, dominators, subsumed, alive, total, drift=None):
+        self.dominators = dominators
+        self.subsumed = subsumed
+        self.alive = alive
+        self.total = total
+        self.drift = drift
+
+    @property
+    def kept(self):
+        return sorted(self.dominators + self.alive)
+
+    @property
+    def remaining(self):
+        """ Fraction of the mutants left to execute. """
+        return len(self.kept) / float(self.total) if self.total else 0.0
+
+    def __repr__(self):
+        return "Subsumption(%d dominators, %d subsumed, %d alive, %.1f%% remaining, drift=%s)" % (
+            len(self.dominators), len(self.subsumed), len(self.alive), 100 * self.remaining,
+            "%.4f" % self.drift if self.drift is not None else None)
+
+class MutantSubsumption(object):
+    """ Dynamic subsumption of mutants
+        A mutant A subsumes a mutant B when every test case killing A also kills B (and some
+        test case kills A): killing A guarantees killing B, so B adds nothing to the test effort.
+        Using the kill data of a session executed in research mode (a KillMatrix), mutants killed
+        by exactly the same test cases are grouped, and the groups whose test cases do not contain
+        the test cases of another group are the dominators (minimal mutants). One mutant of each
+        is kept, together with the mutants never killed; the others can be made inactive, so later
+        executions only run the dominator set.
+
+        The comparisons are bitset operations: a group r is subsumed when some dominator d has
+        d & ~r == 0, and only dominators need to be checked, since every group contains one.
+    """
+
+    def __init__(self, proteum, D="", session=None, matrix=None):
+        """ Arguments:
+            proteum: Proteum object used to run the commands
+            D: directory where the session is located (default is ".")
+            matrix: KillMatrix of the session (default is loaded from 'muta -l')
+        """
+        self.proteum = proteum
+        self.D = D
+        self.session = session if session is not None else proteum.session
+        self.matrix = matrix if matrix is not None else KillMatrix.load(proteum, D, self.session)
+
+    def analyze(self, samples=100, fraction=0.5, seed=0):
+        """ Find the dominator mutants and estimate the score drift (see drift).
+            Returns a Subsumption.
+        """
+        matrix = self.matrix
+        groups = {}
+        alive = []
+        for i, number in enumerate(matrix.mutants):
+            if not matrix.considered >> i & 1:
+                continue
+            if matrix.rows[i]:
+                groups.setdefault(matrix.rows[i], []).append(number)
+            else:
+                alive.append(number)
+
+        minimal = []
+        for row in sorted(groups, key=popcount):
+            if not any(dominator & ~row == 0 for dominator in minimal):
+                minimal.append(row)
+
+        dominators = sorted(groups[row][0] for row in minimal)
+        kept = set(dominators)
+        subsumed = sorted(number for numbers in groups.values() for number in numbers if number not in kept)
+        total = len(dominators) + len(subsumed) + len(alive)
+        result = Subsumption(dominators, subsumed, alive, total)
+        if samples:
+            result.drift = self.drift(result.kept, samples, fraction, seed)
+        return result
+
+    def drift(self, kept, samples=100, fraction=0.5, seed=0):
+        """ Mean absolute difference between the mutation score on the kept mutants and on all
+            mutants, for random subsets with a fraction of the test cases.
+        """
+        matrix = self.matrix
+        if not matrix.tests:
+            return 0.0
+        generator = random.Random(seed)
+        size = max(1, int(len(matrix.tests) * fraction))
+        total = 0.0
+        for _ in range(samples):
+            tests = generator.sample(matrix.tests, size)
+            total += abs(matrix.score(tests, kept) - matrix.score(tests))
+        return total / samples
+
+    def apply(self, subsumption, inactivate=False):
+        """ Make the subsumed mutants inactive in the session.
+            By default the kept mutants are selected (exemuta -select -x), which makes every other
+            mutant inactive; with inactivate=True only the subsumed ones are inactivated, and all
+            the others keep their state (see Proteum.exemuta_inactivate).
+        """
+        if inactivate:
+            return self.proteum.exemuta_inactivate(subsumption.subsumed, D=self.D, session=self.session)
+        return self.proteum.exemuta_select([{'filter': '-all', 'percent': 1.0}],
+            x=" ".join(str(number) for number in subsumption.kept), D=self.D, session=self.session)
@@ -0,0 +1,90 @@
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
+from SessionWorkspace import SessionWorkspace
+
+class ParallelExecutor(object):
+    """ Parallel Mutant Executor
+        Splits the range of mutants of a test session into shards (using the 'f'/'t'
+        arguments of exemuta) and executes every shard in its own 'exemuta -exec' process,
+        working on an isolated copy of the session directory.
+
+        When all shards are done, the mutant statuses changed by each shard are merged back
+        into the main session (see SessionWorkspace.merge), always in shard order, and
+        'exemuta -update' is called to recompute the counts of live/dead/equivalent mutants.
+        If a shard fails or two shards change the same bytes, RuntimeError is raised and the
+        main session is left as it was.
+    """
+
+    def __init__(self, proteum, workers=None):
+        """ Arguments:
+            proteum: Proteum object used to run the commands
+            workers: how many shards are executed at the same time (default is the number of cpus)
+        """
+        self.proteum = proteum
+        self.workers = workers if workers and workers > 0 else cpu_count()
+
+    def last_mutant(self, D="", session=None):
+        """ Number of the last mutant of the session, taken from its report. """
+        report = self.proteum.report(D=D, session=session)
+        return report.total_mutants - 1
+
+    def shards(self, f, t, size=None):
+        """ Split the range of mutants [f, t] in (at most) one shard per worker, or in shards
+            of size mutants when size is given. Returns a list of (first, last) tuples.
+        """
+        if size:
+            shards = [(first, min(first + size - 1, t)) for first in range(f, t + 1, size)]
+        else:
+            count = t - f + 1
+            n = max(1, min(self.workers, count))
+            size, extra = divmod(count, n)
+            shards = []
+            first = f
+            for i in range(n):
+                last = first + size - 1 + (1 if i < extra else 0)
+                shards.append((first, last))
+                first = last + 1
+
+        # 't' equals to 0 means "up to the last mutant", so mutant 0 cannot be alone in a shard
+        if len(shards) > 1 and shards[0] == (0, 0):
+            shards[0:2] = [(0, shards[1][1])]
+        return shards
+
+    def run(self, trace=True, dual=False, D="", Q=0, f=0, t=0, T=0, v="", seed=0, session=None):
+        """ Execute the mutants from f to t in parallel.
+            Arguments are the same of Proteum.exemuta_exec. If t is 0, all mutants
+            from f up to the last one are executed.
+        """
+        if session is None:
+            session = self.proteum.session
+
+        if t <= 0:
+            t = self.last_mutant(D, session)
+        shards = self.shards(f, t)
+        if len(shards) < 2:
+            return self.proteum.exemuta_exec(trace, dual, D, Q, f, t, T, v, seed, session)
+
+        main = SessionWorkspace(session, D)
+        base = main.snapshot()
+
+        def run_shard(shard):
+            clone = main.clone()
+            try:
+                result = self.proteum.exemuta_exec(trace, dual, clone.directory, Q,
+                    shard[0], shard[1], T, v, seed, session)
+                if result is None or not result.ok:
+                    raise RuntimeError('shard %d-%d of %s failed%s' % (shard[0], shard[1], session,
+                        ': exit code %d' % result.returncode if result is not None else ''))
+                return clone.diff(base)
+            finally:
+                clone.remove()
+
+        pool = ThreadPool(min(self.workers, len(shards)))
+        try:
+            patches = pool.map(run_shard, shards)
+        finally:
+            pool.close()
+            pool.join()
+
+        main.merge(base, patches)
+        return self.proteum.exemuta_update(D=D, session=session)
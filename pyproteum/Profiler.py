@@ -0,0 +1,223 @@
+import functools, json, os, threading, time
+try:
+    import resource
+except ImportError:
+    resource = None
+
+class InvocationRecord(object):
+    """ Measurements of one invocation of a ProteumIM command (or of a profiled block of code).
+        Attributes:
+        command: name of the command, with its main option (e.g. 'exemuta -exec')
+        argv: full command line (empty for profiled blocks)
+        session: test session the command worked on (its last argument, as Proteum.exec_command
+                 appends it), or the one given to a profiled block
+        started: wall clock time when it started
+        wall: elapsed wall time, in seconds
+        user, sys: cpu time of the child process, in seconds (None when not available)
+        max_rss: maximum resident set size of the child, in kilobytes (None when not available, and
+                 for profiled blocks: the only figure there is the peak of the whole process)
+        output_bytes: bytes written to stdout and stderr
+        returncode: exit code of the command
+    """
+
+    __slots__ = ('command', 'argv', 'session', 'started', 'wall', 'user', 'sys', 'max_rss', 'output_bytes', 'returncode')
+
+    # commands whose first option selects what they do
+    subcommands = ('exemuta', 'tcase', 'muta', 'report')
+
+    def __init__(self, command, argv=(), started=0.0, wall=0.0, user=None, sys=None, max_rss=None,
+                 output_bytes=0, returncode=0, session=""):
+        self.command = command
+        self.argv = list(argv)
+        self.session = session
+        self.started = started
+        self.wall = wall
+        self.user = user
+        self.sys = sys
+        self.max_rss = max_rss
+        self.output_bytes = output_bytes
+        self.returncode = returncode
+
+    @classmethod
+    def from_result(cls, result):
+        """ Build a record from a CommandResult. """
+        command = os.path.basename(result.argv[0])
+        if command in cls.subcommands and len(result.argv) > 2 and result.argv[1].startswith('-'):
+            command += ' ' + result.argv[1]
+        rusage = result.rusage
+        return cls(command, result.argv, result.started, result.elapsed,
+            rusage.ru_utime if rusage else None, rusage.ru_stime if rusage else None,
+            rusage.ru_maxrss if rusage else None,
+            len(result.stdout.encode('utf-8')) + len(result.stderr.encode('utf-8')), result.returncode,
+            result.argv[-1] if len(result.argv) > 1 else "")
+
+    def as_dict(self):
+        return dict((name, getattr(self, name)) for name in self.__slots__)
+
+class MemorySink(object):
+    """ Keeps every record in a list. """
+
+    def __init__(self):
+        self.records = []
+
+    def write(self, record):
+        self.records.append(record)
+
+class JsonlSink(object):
+    """ Appends every record as a JSON line to a file. """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def write(self, record):
+        with self.lock:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(record.as_dict()) + '\n')
+
+class PrometheusTextfileSink(object):
+    """ Keeps per-command and session totals and rewrites them, in Prometheus' text format, to a file
+        read by the node exporter's textfile collector.
+    """
+
+    metrics = (
+        ('invocations_total', 'counter', 'Invocations of ProteumIM commands'),
+        ('wall_seconds_total', 'counter', 'Wall time spent in ProteumIM commands'),
+        ('cpu_user_seconds_total', 'counter', 'User cpu time of ProteumIM commands'),
+        ('cpu_system_seconds_total', 'counter', 'System cpu time of ProteumIM commands'),
+        ('output_bytes_total', 'counter', 'Bytes written by ProteumIM commands'),
+        ('max_rss_kilobytes', 'gauge', 'Largest resident set size of ProteumIM commands'),
+    )
+
+    def __init__(self, path, prefix='pyproteum_command_'):
+        self.path = path
+        self.prefix = prefix
+        self.totals = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def label(value):
+        """ Label value escaped as the text format requires (backslash, double quote, newline). """
+        return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    def write(self, record):
+        with self.lock:
+            totals = self.totals.setdefault((record.command, record.session),
+                dict((name, 0) for name, _, _ in self.metrics))
+            totals['invocations_total'] += 1
+            totals['wall_seconds_total'] += record.wall
+            totals['cpu_user_seconds_total'] += record.user or 0
+            totals['cpu_system_seconds_total'] += record.sys or 0
+            totals['output_bytes_total'] += record.output_bytes
+            totals['max_rss_kilobytes'] = max(totals['max_rss_kilobytes'], record.max_rss or 0)
+
+            lines = []
+            for name, kind, description in self.metrics:
+                lines.append('# HELP %s%s %s' % (self.prefix, name, description))
+                lines.append('# TYPE %s%s %s' % (self.prefix, name, kind))
+                for command, session in sorted(self.totals):
+                    lines.append('%s%s{command="%s",session="%s"} %s' % (self.prefix, name, self.label(command),
+                        self.label(session), self.totals[command, session][name]))
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w') as f:
+                f.write('\n'.join(lines) + '\n')
+            os.rename(tmp, self.path)
+
+class Profiler(object):
+    """ Instrumentation of ProteumIM calls
+        Once attached to a Proteum object, records wall time, cpu user/sys time, max RSS and
+        output size of every command it runs, and sends the InvocationRecord to its sinks
+        (MemorySink, JsonlSink, PrometheusTextfileSink or any object with a write(record) method).
+
+        User code can be measured too, with the same records:
+        > with profiler.profile('load reports', session='cal'):
+        >     ...
+        > @profiler.profile('my step')
+        > def step(): ...
+
+        summary() gives a table of the commands which took more time, for each session.
+    """
+
+    def __init__(self, sinks=None):
+        self.sinks = list(sinks) if sinks else []
+        self.totals = {}
+        self.lock = threading.Lock()
+
+    def attach(self, proteum):
+        """ Start recording every command run by a Proteum object. """
+        proteum.runner.listeners.append(self.record_result)
+        return self
+
+    def detach(self, proteum):
+        if self.record_result in proteum.runner.listeners:
+            proteum.runner.listeners.remove(self.record_result)
+
+    def record_result(self, result):
+        self.record(InvocationRecord.from_result(result))
+
+    def record(self, record):
+        with self.lock:
+            totals = self.totals.setdefault((record.session, record.command),
+                {'calls': 0, 'wall': 0.0, 'cpu': 0.0, 'max_rss': 0, 'output_bytes': 0})
+            totals['calls'] += 1
+            totals['wall'] += record.wall
+            totals['cpu'] += (record.user or 0) + (record.sys or 0)
+            totals['max_rss'] = max(totals['max_rss'], record.max_rss or 0)
+            totals['output_bytes'] += record.output_bytes
+        for sink in self.sinks:
+            sink.write(record)
+
+    def profile(self, name, session=""):
+        """ Context manager and decorator measuring a block of user code. """
+        return ProfiledBlock(self, name, session)
+
+    def summary(self, top=10):
+        """ Table of the commands grouped by session: sessions sorted by total wall time, and
+            the top commands of each session sorted by their wall time.
+        """
+        lines = ["%-16s %-24s %7s %10s %10s %10s %10s %12s" % (
+            'session', 'command', 'calls', 'wall (s)', 'mean (s)', 'cpu (s)', 'rss (KB)', 'output (B)')]
+        sessions = {}
+        with self.lock:
+            for (session, command), totals in self.totals.items():
+                sessions.setdefault(session, []).append((command, dict(totals)))
+        for session in sorted(sessions, key=lambda session: -sum(totals['wall'] for _, totals in sessions[session])):
+            ordered = sorted(sessions[session], key=lambda item: -item[1]['wall'])[:top]
+            for command, totals in ordered:
+                lines.append("%-16s %-24s %7d %10.3f %10.3f %10.3f %10d %12d" % (session or '-', command,
+                    totals['calls'], totals['wall'], totals['wall'] / totals['calls'], totals['cpu'],
+                    totals['max_rss'], totals['output_bytes']))
+        return '\n'.join(lines)
+
+class ProfiledBlock(object):
+    """ A block of code measured by a Profiler (see Profiler.profile).
+        Its cpu times are the difference of the process' usage; max_rss is left None, since
+        ru_maxrss is the peak of the whole process and says nothing about the block.
+    """
+
+    def __init__(self, profiler, name, session=""):
+        self.profiler = profiler
+        self.name = name
+        self.session = session
+
+    def __enter__(self):
+        self.started = time.time()
+        self.usage = resource.getrusage(resource.RUSAGE_SELF) if resource else None
+        return self
+
+    def __exit__(self, *exc_info):
+        user = sys = None
+        if resource:
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            user = usage.ru_utime - self.usage.ru_utime
+            sys = usage.ru_stime - self.usage.ru_stime
+        self.profiler.record(InvocationRecord(self.name, (), self.started, time.time() - self.started,
+            user, sys, None, 0, 1 if exc_info[0] else 0, self.session))
+        return False
+
+    def __call__(self, function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with ProfiledBlock(self.profiler, self.name, self.session):
+                return function(*args, **kwargs)
+        return wrapper
@@ -1,7 +1,11 @@
 from __future__ import print_function
-import os, sys
+import os, sys, shlex
 from os.path import isfile
 from ProteumReport import ProteumReport
+from ParallelExecutor import ParallelExecutor
+from CommandRunner import CommandRunner
+from MutantList import MutantList
+from compat import string_types
 
 class Proteum(object):
     """ Python Adapter for Proteum.
@@ -65,6 +69,9 @@ class Proteum(object):
 
         self.bin_dir = ""
         self.if_dir = ""
+        self.runner = CommandRunner()
+        self.report_cache = None
+        self.profiler = None
 
     def set_bin_dir(self, new_bin_dir):
         """In case of Proteum not on PATH."""
@@ -74,6 +81,15 @@ class Proteum(object):
         """In case of Proteum not on PATH."""
         self.if_dir = ""
 
+    def set_profiler(self, profiler):
+        """Record timings and resource usage of every command with a Profiler."""
+        profiler.attach(self)
+        self.profiler = profiler
+
+    def set_report_cache(self, cache):
+        """Use a ReportCache to avoid running report while the session does not change."""
+        self.report_cache = cache
+
     def set_session(self, session):
         """In case when Proteum test session is already created."""
         self.session=session
@@ -111,37 +127,80 @@ class Proteum(object):
             the math library. 
         """
         self.set_session(session)
-        arguments = ''
+        arguments = ['test-new']
         if research:
-            arguments += ' -research'
+            arguments.append('-research')
         if len(S) > 0:
-            arguments += ' -S ' + S
+            arguments += ['-S', S]
         if len(E) > 0:
-            arguments += ' -E ' + E
+            arguments += ['-E', E]
         if len(D) > 0:
-            arguments += ' -D "' + D + '"'
+            arguments += ['-D', D]
         if len(C) > 0:
-            arguments += ' -C "' + C + '"'
+            arguments += ['-C', C]
+
+        return self.exec_command(arguments, session)
 
-        self.echo("%stest-new%s %s" % (self.bin_dir, arguments, session))
-        os.system("%stest-new%s %s" % (self.bin_dir, arguments, session))
+    def command_argv(self, command, session):
+        """ Build the argument list of a command associated to a test session.
+            command can be a list of arguments or a string, which is split like a shell does
+            (without actually using a shell).
+        """
+        argv = shlex.split(command) if isinstance(command, string_types) else list(command)
+        argv[0] = self.bin_dir + argv[0]
+        return argv + [session]
 
-    def exec_command(self, command, session=None, of=None):
-        """ Execute a command using os.system associated to a test session
+    def output_writer(self, of, stream=None):
+        """ Callback used to send the output of a command to the output file (or to stream,
+            stdout by default).
+        """
+        if of:
+            def write(text):
+                with open(of, 'a') as f:
+                    f.write(text)
+        else:
+            stream = stream or sys.stdout
+            def write(text):
+                stream.write(text)
+                stream.flush()
+        return write
+
+    def output_callback(self, of, on_output=None):
+        """ Callback sending the output of a command to the output file (or to stdout) and,
+            when given, to on_output too.
+        """
+        write = self.output_writer(of)
+        if on_output is None:
+            return write
+        def callback(text):
+            write(text)
+            on_output(text)
+        return callback
+
+    def exec_command(self, command, session=None, of=None, input=None, on_output=None, on_start=None,
+                     preexec_fn=None):
+        """ Execute a command associated to a test session
             Arguments:
-            command: command to execute
+            command: command to execute (a string or a list of arguments)
             session: Proteum test session
             of: output file
+            input: text sent to the command's stdin
+            on_output: optional callback receiving the output of the command as it is produced
+            on_start: optional callable receiving the process as soon as the command starts
+            preexec_fn: optional callable run in the child process before the command is executed
+            Returns a CommandResult with the exit code, output and timings of the command.
+            stderr is captured in the result and also sent to the output file (or to stderr).
         """
         if session is None:
             session = self.session
 
         if of is None:
-        	of = self.of
+            of = self.of
         if session:
-            cmd = "%s %s" % (command, session)
-            self.echo('[proteumIM executing]:' + cmd)
-            os.system("%s%s" % (cmd,((" >> %s" % self.of) if self.of else "")))
+            argv = self.command_argv(command, session)
+            self.echo('[proteumIM executing]:' + ' '.join(argv))
+            return self.runner.run(argv, input=input, on_stdout=self.output_callback(of, on_output),
+                on_stderr=self.output_writer(of, sys.stderr), on_start=on_start, preexec_fn=preexec_fn)
         else:
             self.echo('Error: First create a test session with test-new!')
 
@@ -168,7 +227,7 @@ class Proteum(object):
         if len(unit) > 0:
             arguments += ' -unit ' + unit
         if seed != 0:
-            arguments += ' -seed ' + seed
+            arguments += ' -seed ' + str(seed)
         if caller_unit and callee_unit and len(caller_unit) > 0 and len(callee_unit) > 0:
             arguments += " -c %s %s" % (caller_unit, callee_unit)
         if r:
@@ -181,7 +240,47 @@ class Proteum(object):
         ops_str  = '-O ' + O if len(O) > 0 else ''
         ops_str += ' '.join("%s %s %s" % (op['filter'], op['percent'], op['max']) for op in operators)
 
-        self.exec_command( ("muta-gen %s%s" % (ops_str, arguments)), session)
+        return self.exec_command( ("muta-gen %s%s" % (ops_str, arguments)), session)
+
+    def muta(self, arg, f=0, t=0, x="", D="", session=None):
+        """ Manage mutants from test session based on argument passed as arg
+            Arguments:
+            arg: action to perform on the mutants (example: "-l")
+            f: starts a range of mutants to manage (example: 2)
+            t: ends the range of mutants to manage (example: 3)
+            x: specifies the range of mutants to manage (examples: "3 7 8" / "3")
+            D: directory where the test session is located (default is ".")
+            session: test session to work with.
+        """
+        if session is None:
+            session = self.session
+
+        command = ["muta"] + arg.split()
+        if f > 0:
+            command += ["-f", str(f)]
+        if t > 0:
+            command += ["-t", str(t)]
+        if len(x) > 0:
+            command += ["-x", x]
+        if len(D) > 0:
+            command += ["-D", D]
+
+        return self.exec_command(command, session)
+
+    def muta_list(self, f=0, t=0, x="", D="", session=None):
+        """ List mutants from test session, with their status and the test cases which killed them.
+            The output can be parsed with MutantList.
+            Arguments:
+            f: starts a range of mutants (-f 2)
+            t: ends the range of mutants (-t 3)
+            x: specifies the range of mutants (-x "3 7 8")
+            D: directory where the test session is located (default is ".")
+            session: test session to work with.
+        """
+        if session is None:
+            session = self.session
+
+        return self.muta("-l", f, t, x, D, session)
 
     def tcase(self, arg, f=0, t=0, x="", D="", session=None):
         """ Manage test cases from test session based on argument passed as arg
@@ -202,11 +301,11 @@ class Proteum(object):
         if t > 0:
             command += " -t " + str(t)
         if len(x) > 0:
-            command += " -x " + x
+            command += ' -x "' + x + '"'
         if len(D) > 0:
             command += " -D " + D
 
-        self.exec_command(command, session)
+        return self.exec_command(command, session)
 
     def tcase_create(self, D, session=None):
         """ Creates (or recreates) an EMPTY test set
@@ -220,7 +319,7 @@ class Proteum(object):
         if session is None:
             session = self.session
         
-        self.tcase("-create", 0, 0, "", D, session)
+        return self.tcase("-create", 0, 0, "", D, session)
 
     def tcase_list(self, f=0, t=0, x="", D="", session=None):
         """ List test cases from test session
@@ -234,7 +333,7 @@ class Proteum(object):
         if session is None:
             session = self.session
         
-        self.tcase("-l", f, t, x, D, session)
+        return self.tcase("-l", f, t, x, D, session)
         
     def tcase_show(self, f=0, t=0, x="", D="", session=None):
         """ Show test cases from test session
@@ -248,7 +347,7 @@ class Proteum(object):
         if session is None:
             session = self.session
         
-        self.tcase("", f, t, x, D, session)
+        return self.tcase("", f, t, x, D, session)
 
     def tcase_enable(self, f=0, t=0, x="", D="", session=None):
         """ Disable test cases from test session
@@ -262,7 +361,7 @@ class Proteum(object):
         if session is None:
             session = self.session
         
-        self.tcase("-e", f, t, x, D, session)
+        return self.tcase("-e", f, t, x, D, session)
 
     def tcase_disable(self, f=0, t=0, x="", D="", session=None):
         """ Enable test cases from test session
@@ -276,7 +375,7 @@ class Proteum(object):
         if session is None:
             session = self.session
         
-        self.tcase("-i", f, t, x, D, session)
+        return self.tcase("-i", f, t, x, D, session)
 
     def tcase_delete(self, f=0, t=0, x="", D="", session=None):
         """ Delete test cases from test session
@@ -290,9 +389,9 @@ class Proteum(object):
         if session is None:
             session = self.session
         
-        self.tcase("-i", f, t, x, D, session)
+        return self.tcase("-i", f, t, x, D, session)
 
-    def tcase_add(self, p="", trace=False, label="", D="", E="", DD="", EE="", session=None):
+    def tcase_add(self, p="", trace=False, label="", D="", E="", DD="", EE="", session=None, input=None):
         """Add a test case to test set
         Arguments:
         label: name the test case for future use
@@ -303,42 +402,44 @@ class Proteum(object):
         trace: if True, test case will also collect trace data for the test case
         EE: which executable program should be used to collect the execution trace
         session: test session to work with.
+        input: text sent to the program's stdin while the test case is recorded
         """
         if session is None:
             session = self.session
         
-        arguments = ""
+        arguments = []
         if trace:
-            arguments += " -trace "
+            arguments.append("-trace")
 
         if len(label) > 0:
-            arguments += " -label " + label
+            arguments += ["-label", label]
 
         if len(p) > 0:
             if p == "-P":
                 # command line parameters passed via stdin
-                arguments += " -P"
+                arguments.append("-P")
             else:
                 # command line parameters passed as string
-                arguments += " -p " + p
+                arguments += ["-p", p]
 
         if len(D) > 0:
-            arguments += " -D " + D
+            arguments += ["-D", D]
 
         if len(DD) > 0:
-            arguments += " -DD " + DD
+            arguments += ["-DD", DD]
 
         if len(EE) > 0:
-            arguments += " -EE " + EE
+            arguments += ["-EE", EE]
 
         if len(E) > 0:
-            arguments += " -E " + E
-            self.exec_command("tcase -add" + arguments, session)
+            arguments += ["-E", E]
+            return self.exec_command(["tcase", "-add"] + arguments, session, input=input)
         else:
             # if E is not passed, uses the session information
-            self.exec_command("tcase-add" + arguments, session)
+            return self.exec_command(["tcase-add"] + arguments, session, input=input)
 
-    def exemuta(self, command, trace=False, dual=False, D="", Q=0, f=0, t=0, T=0, v="", seed=0, session=None):
+    def exemuta(self, command, trace=False, dual=False, D="", Q=0, f=0, t=0, T=0, v="", seed=0, session=None, x="",
+                on_output=None, on_start=None, preexec_fn=None):
         """Execute an 'exemuta' command, according to what is passed.
         Arguments:
         command: command main argument, could be '-exec', '-compile', '-update', etc.
@@ -356,6 +457,10 @@ class Proteum(object):
         seed: Ramdomly shuffles the order test cases must be executed using this parameter as the ramdom seed.
               If 0 is passed, test cases will executed ordered by their numbers.
         session: test session to work with.
+        x: specifies a list of mutants (example: "3 7 8")
+        on_output: optional callback receiving the output as it is produced (see ExecutionProgress)
+        on_start: optional callable receiving the exemuta process as soon as it starts (see ResourceLimiter)
+        preexec_fn: optional callable run in the exemuta process before it is executed (see ResourceLimiter)
         """
         if session is None:
             session = self.session
@@ -377,10 +482,16 @@ class Proteum(object):
             arguments += " -T " + str(T)
         if len(v) > 0:
             arguments += " -v " + v
+        if seed != 0:
+            arguments += " -seed " + str(seed)
+        if len(x) > 0:
+            arguments += ' -x "' + x + '"'
 
-        self.exec_command( ("exemuta %s%s" % (command, arguments)), session)
+        return self.exec_command( ("exemuta %s%s" % (command, arguments)), session, on_output=on_output,
+            on_start=on_start, preexec_fn=preexec_fn)
 
-    def exemuta_exec(self, trace=True, dual=False, D="", Q=0, f=0, t=0, T=0, v="", seed=0, session=None):
+    def exemuta_exec(self, trace=True, dual=False, D="", Q=0, f=0, t=0, T=0, v="", seed=0, session=None, workers=1,
+                     on_output=None, on_start=None, preexec_fn=None):
         """ Execute mutants and modifies status of each mutant executed to reflect its condition of live or dead.
             Arguments:
             trace: if True, will use the execution trace to avoid execute mutants that are not reached for each test case
@@ -397,11 +508,24 @@ class Proteum(object):
             seed: Ramdomly shuffles the order test cases must be executed using this parameter as the ramdom seed.
                   If 0 is passed, test cases will executed ordered by their numbers.
             session: test session to work with.
+            workers: if greater than 1, the range of mutants is split in shards executed in parallel,
+                     each one on an isolated copy of the session (see ParallelExecutor).
+            on_output: optional callback receiving the output as it is produced (see ExecutionProgress);
+                       not used when workers is greater than 1.
+            on_start: optional callable receiving the exemuta process (see ResourceLimiter);
+                      not used when workers is greater than 1.
+            preexec_fn: optional callable run in the exemuta process before it is executed, such as
+                        setting rlimits its children inherit (see ResourceLimiter); not used when
+                        workers is greater than 1.
         """
         if session is None:
             session = self.session
 
-        self.exemuta('-exec', trace, dual, D, Q, f, t, T, v, seed, session)
+        if workers > 1:
+            return ParallelExecutor(self, workers).run(trace, dual, D, Q, f, t, T, v, seed, session)
+        else:
+            return self.exemuta('-exec', trace, dual, D, Q, f, t, T, v, seed, session, on_output=on_output,
+                on_start=on_start, preexec_fn=preexec_fn)
 
     def exemuta_compile(self, D="", Q=0, f=0, t=0, session=None):
         """ Create and compile mutants but not execute them.
@@ -415,7 +539,7 @@ class Proteum(object):
         if session is None:
             session = self.session
 
-        self.exemuta('-compile', False, False, D, Q, f, t, 0, "", 0, session)
+        return self.exemuta('-compile', False, False, D, Q, f, t, 0, "", 0, session)
 
     def exemuta_update(self, dual=False, D="", Q=0, f=0, t=0, session=None):
         """ Update the counts of live/dead/equivalent mutants.
@@ -431,7 +555,7 @@ class Proteum(object):
         if session is None:
             session = self.session
 
-        self.exemuta('-update', False, dual, D, Q, f, t, 0, "", 0, session)
+        return self.exemuta('-update', False, dual, D, Q, f, t, 0, "", 0, session)
 
     def exemuta_select(self, operators, is_global=False, k=False, D="", O="", DD="", f=0, t=0, x="", seed=0, session=None):
         """ Select a subset of mutants to work with.
@@ -469,26 +593,59 @@ class Proteum(object):
         if k:
             args += " -k"
 
-        args += " ".join("%s %s" % (op['filter'], op['percent']) for op in operators)
+        args += " " + " ".join("%s %s" % (op['filter'], op['percent']) for op in operators)
 
-        self.exemuta(command="-select %s" % args, D=D, f=f, t=t, x=x, seed=seed, session=session)
+        return self.exemuta(command="-select %s" % args, D=D, f=f, t=t, x=x, seed=seed, session=session)
 
-    def exemuta_invert(self, session=None):
+    def exemuta_invert(self, session=None, D=""):
         """ Invert the selection of mutants.
             Active mutants become inactives and inactives mutants become active.
             Argument:
             session: test session to work with.
+            D: directory where test cases and program files are located (default is ".")
         """
         if session is None:
             session = self.session
 
-        self.exemuta("-invert", session)
+        return self.exemuta("-invert", D=D, session=session)
+
+    def exemuta_inactivate(self, numbers, mutants=None, D="", session=None):
+        """ Make a list of mutants inactive, keeping the state of all the others.
+            Done by selecting the given mutants together with the ones already inactive
+            and inverting the selection.
+            Arguments:
+            numbers: numbers of the mutants to inactivate
+            mutants: current list of MutantInfo of the session (listed with muta -l if not given)
+            D: directory where test cases and program files are located (default is ".")
+            session: test session to work with.
+        """
+        if session is None:
+            session = self.session
+        if not numbers:
+            return None
+        if mutants is None:
+            mutants = MutantList.load(self, D=D, session=session)
 
+        inactive = set(numbers) | set(m.number for m in mutants if not m.active)
+        self.exemuta_select([{'filter': '-all', 'percent': 1.0}],
+            x=" ".join(str(n) for n in sorted(inactive)), D=D, session=session)
+        return self.exemuta_invert(session, D)
 
     def report(self, trace=False, D="", S="", L="", session=None):
+        """ Run report and return the loaded ProteumReport of <session>.lst.
+            If a report cache is set (see set_report_cache), the report command is only executed
+            when the session files changed; the caller gets its own copy of the cached report.
+        """
         if session is None:
             session = self.session
 
+        key = None
+        if self.report_cache is not None:
+            key = self.report_cache.fingerprint(session, D, (trace, S, L))
+            cached = self.report_cache.get(key)
+            if cached is not None:
+                return cached.copy()
+
         if trace:
             arguments = '-trace'
         else:
@@ -501,4 +658,9 @@ class Proteum(object):
             arguments += ' -L ' + L
 
         self.exec_command("report %s" % arguments, session)
-        return ProteumReport(os.path.join(D, session + '.lst'))
\ No newline at end of file
+        report = ProteumReport(os.path.join(D, session + '.lst'))
+        report.load()
+        if key is not None:
+            self.report_cache.put(key, report)
+            return report.copy()
+        return report
\ No newline at end of file
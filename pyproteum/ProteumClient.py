@@ -0,0 +1,92 @@
+import inspect, socket, threading
+from Proteum import Proteum
+from ExecutionCoordinator import parse_address, send, receive
+from ProteumDaemon import ProteumDaemon, decode_result, decode_report
+
+class ProteumClient(object):
+    """ Thin client of a ProteumDaemon
+        Mirrors the Proteum API: the same methods, with the same arguments, are executed by the
+        daemon on its warm sessions. Commands return a CommandResult and report() returns a
+        loaded ProteumReport, as with a local Proteum object.
+
+        > proteum = ProteumClient('/tmp/proteum.sock')
+        > proteum.test_new('myprog', D='/path/to/myprog')
+        > proteum.exemuta_exec(D='/path/to/myprog')
+        > proteum.report(D='/path/to/myprog').mutation_score
+
+        A single connection is kept open and shared by the threads using the client.
+        token is the daemon's secret, needed when it listens on TCP.
+    """
+
+    def __init__(self, address, session=None, token=None):
+        self.address = parse_address(address)
+        self.session = session
+        self.token = token
+        self.lock = threading.Lock()
+        self.sock = None
+        self.stream = None
+
+    def connect(self):
+        if isinstance(self.address, tuple):
+            self.sock = socket.create_connection(self.address)
+        else:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(self.address)
+        self.stream = self.sock.makefile('rwb')
+
+    def close(self):
+        if self.sock is not None:
+            self.stream.close()
+            self.sock.close()
+            self.sock = self.stream = None
+
+    def request(self, message):
+        with self.lock:
+            if self.sock is None:
+                self.connect()
+            if self.token is not None:
+                message = dict(message, token=self.token)
+            send(self.stream, message)
+            response = receive(self.stream)
+        if response is None:
+            self.close()
+            raise IOError('connection closed by the Proteum daemon')
+        if 'error' in response:
+            raise RuntimeError(response['error'])
+        return response
+
+    def set_session(self, session):
+        self.session = session
+
+    def call(self, method, *args, **kwargs):
+        if method == 'test_new':
+            self.set_session(args[0] if args else kwargs['session'])
+        elif inspect.getcallargs(getattr(Proteum, method), None, *args, **kwargs).get('session') is None:
+            # the session may also be passed by position
+            kwargs['session'] = self.session
+        response = self.request({'op': 'call', 'method': method, 'args': list(args), 'kwargs': kwargs})
+        if 'command_result' in response:
+            return decode_result(response['command_result'])
+        if 'report' in response:
+            return decode_report(response['report'])
+        return response['result']
+
+    def __getattr__(self, name):
+        if name not in ProteumDaemon.methods:
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self.call(name, *args, **kwargs)
+
+    def report(self, trace=False, D="", S="", L="", session=None, test_cases=True):
+        """ The session report, loaded (served from the daemon's cache while the session does not change).
+            Arguments are the ones of Proteum.report; test_cases=False leaves the test cases out
+            of the response, when only the header is needed.
+        """
+        response = self.request({'op': 'report', 'session': session or self.session, 'trace': trace, 'D': D,
+                                 'S': S, 'L': L, 'test_cases': test_cases})
+        return decode_report(response['report'])
+
+    def operators(self, preffix=None):
+        return self.request({'op': 'operators', 'preffix': preffix})['operators']
+
+    def stats(self):
+        return self.request({'op': 'stats'})
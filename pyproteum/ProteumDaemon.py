@@ -0,0 +1,232 @@
+from __future__ import print_function
+import argparse, copy, hmac, inspect, os, threading, time
+try:
+    import socketserver
+except ImportError:
+    import SocketServer as socketserver
+from Proteum import Proteum
+from ProteumReport import ProteumReport
+from ReportParser import ReportParser
+from ReportCache import ReportCache
+from TestCaseInfo import TestCaseInfo
+from CommandRunner import CommandResult
+from ExecutionCoordinator import parse_address, send, receive
+
+def encode_result(result):
+    return {'argv': result.argv, 'returncode': result.returncode, 'stdout': result.stdout,
+            'stderr': result.stderr, 'started': result.started, 'finished': result.finished}
+
+def decode_result(data):
+    return CommandResult(data['argv'], data['returncode'], data['stdout'], data['stderr'],
+        data['started'], data['finished'])
+
+def encode_report(report, test_cases=True):
+    data = {'lst': report.lst, 'operators': [[op, report.operators[op]] for op in report.ordered_op_keys]}
+    data['header'] = dict((name, getattr(report, name)) for name, _ in ReportParser.header_fields.values()
+                          if hasattr(report, name))
+    if test_cases:
+        columns = report.test_cases.columns
+        data['test_cases'] = dict((name, [str(value) for value in columns[name]] if name in TestCaseInfo.payload_fields
+                                   else list(columns[name])) for name in TestCaseInfo.__slots__)
+    return data
+
+def decode_report(data):
+    report = ProteumReport(data['lst'])
+    for name, value in data['header'].items():
+        setattr(report, name, value)
+    for operator, count in data['operators']:
+        report.ordered_op_keys.append(operator)
+        report.operators[operator] = count
+    columns = data.get('test_cases')
+    if columns:
+        names = list(columns)
+        report.test_cases.extend(dict(zip(names, row)) for row in zip(*[columns[name] for name in names]))
+    return report
+
+class ProteumDaemon(object):
+    """ Long running Proteum service
+        Owns the sessions it is asked about and keeps their parsed state warm between requests:
+        reports (with their test case tables) stay in a ReportCache and are only produced again
+        when the session files change, so queries answer in milliseconds and clients do not pay
+        the start of a Python process (see ProteumClient).
+
+        Requests arrive over a Unix socket (only accessible to its owner), one JSON message per line:
+
+            {"op": "call", "method": "exemuta_exec", "args": [...], "kwargs": {...}}
+                                  ->   {"result": ...} / {"error": ...}
+            {"op": "report", "session": ..., "trace": false, "D": ..., "S": ..., "L": ..., "test_cases": true}
+                                  ->   {"report": ...}
+            {"op": "operators", "preffix": ...}
+                                  ->   {"operators": [...]}
+            {"op": "stats"}       ->   {"cache": ..., "sessions": [...], "requests": n}
+
+        Requests on the same session are serialized by a lock (one for each directory and
+        session); requests on different sessions run concurrently.
+
+        Since clients run ProteumIM commands, a TCP address is only served with a token: every
+        message must then carry it ({"token": ..., "op": ...}), see ProteumClient.
+    """
+
+    # Proteum methods clients may call
+    methods = ('test_new', 'muta_gen', 'muta', 'muta_list', 'tcase', 'tcase_create', 'tcase_list',
+               'tcase_show', 'tcase_enable', 'tcase_disable', 'tcase_delete', 'tcase_add', 'exemuta',
+               'exemuta_exec', 'exemuta_compile', 'exemuta_update', 'exemuta_select', 'exemuta_invert',
+               'exemuta_inactivate', 'report')
+
+    def __init__(self, proteum=None, cache=None, token=None):
+        """ Arguments:
+            proteum: Proteum object used as template for the sessions (bin dir, profiler)
+            cache: ReportCache keeping the reports (default is an in-memory one)
+            token: secret every message must carry (required to listen on TCP)
+        """
+        self.token = token
+        self.proteum = proteum if proteum is not None else Proteum()
+        self.cache = cache if cache is not None else ReportCache()
+        self.proteum.set_report_cache(self.cache)
+        self.proteums = {}
+        self.locks = {}
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.server = None
+
+    def session_state(self, session, D):
+        """ Lock and Proteum object of a session (created on its first request). """
+        key = (os.path.abspath(D or '.'), session)
+        with self.lock:
+            if key not in self.locks:
+                self.locks[key] = threading.Lock()
+                # test_new changes the current session, so every session has its own object
+                self.proteums[key] = copy.copy(self.proteum)
+                self.proteums[key].set_session(session)
+            return self.locks[key], self.proteums[key]
+
+    def call_arguments(self, method, args, kwargs):
+        """ Arguments of a call by name, whether they were passed by position or not. """
+        try:
+            arguments = inspect.getcallargs(getattr(self.proteum, method), *args, **kwargs)
+        except TypeError as e:
+            raise ValueError('%s: %s' % (method, e))
+        arguments.pop('self', None)
+        return arguments
+
+    def call(self, method, args, kwargs):
+        if method not in self.methods:
+            raise ValueError('unknown method: %s' % method)
+        arguments = self.call_arguments(method, args, kwargs)
+        session = arguments.get('session')
+        if not session:
+            raise ValueError('%s needs a session' % method)
+        lock, proteum = self.session_state(session, arguments.get('D') or '')
+        with lock:
+            if method == 'report':
+                report = proteum.report(**arguments)
+                return {'report': encode_report(report)}
+            result = getattr(proteum, method)(**arguments)
+        if isinstance(result, CommandResult):
+            return {'command_result': encode_result(result)}
+        return {'result': result}
+
+    def report(self, session, trace=False, D="", S="", L="", test_cases=True):
+        lock, proteum = self.session_state(session, D)
+        with lock:
+            report = proteum.report(trace=trace, D=D, S=S, L=L, session=session)
+        return {'report': encode_report(report, test_cases)}
+
+    def authorized(self, message):
+        if self.token is None:
+            return True
+        token = message.get('token')
+        # JSON strings are unicode on Python 2 too
+        return isinstance(token, type(u'')) and hmac.compare_digest(token.encode('utf-8'), self.token.encode('utf-8'))
+
+    def reply(self, message):
+        if not self.authorized(message):
+            raise ValueError('invalid token')
+        self.requests += 1
+        op = message.get('op')
+        if op == 'call':
+            return self.call(message['method'], message.get('args', []), message.get('kwargs', {}))
+        if op == 'report':
+            return self.report(message['session'], message.get('trace', False), message.get('D', ''),
+                message.get('S', ''), message.get('L', ''), message.get('test_cases', True))
+        if op == 'operators':
+            return {'operators': Proteum.operators(message.get('preffix'))}
+        if op == 'stats':
+            return {'cache': self.cache.stats(), 'requests': self.requests,
+                    'sessions': [[directory, session] for directory, session in sorted(self.locks)]}
+        raise ValueError('unknown op: %s' % op)
+
+    def handle(self, rfile, wfile):
+        while True:
+            try:
+                message = receive(rfile)
+            except ValueError as e:
+                send(wfile, {'error': 'invalid message: %s' % e})
+                continue
+            if message is None:
+                break
+            try:
+                response = self.reply(message)
+            except Exception as e:
+                response = {'error': '%s: %s' % (type(e).__name__, e)}
+            send(wfile, response)
+
+    def start(self, address):
+        """ Serve requests in background threads. """
+        address = parse_address(address)
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                daemon.handle(self.rfile, self.wfile)
+
+        if isinstance(address, tuple):
+            if not self.token:
+                raise ValueError('a token is required to listen on TCP (%s:%s)' % address)
+            server_class = socketserver.ThreadingTCPServer
+        else:
+            server_class = socketserver.ThreadingUnixStreamServer
+            if os.path.exists(address):
+                os.remove(address)
+        server_class.allow_reuse_address = True
+        server_class.daemon_threads = True
+        # the socket file is created only accessible to its owner
+        umask = os.umask(0o077)
+        try:
+            self.server = server_class(address, Handler)
+        finally:
+            os.umask(umask)
+        self.address = self.server.server_address
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            if isinstance(self.address, str) and os.path.exists(self.address):
+                os.remove(self.address)
+            self.server = None
+
+# Main to run the daemon:
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Proteum daemon keeping the state of test sessions warm.')
+    parser.add_argument('address', help='path of the Unix socket (or host:port, which needs a token)')
+    parser.add_argument('--token', default=os.environ.get('PROTEUM_DAEMON_TOKEN'),
+                        help='secret clients must send (default is $PROTEUM_DAEMON_TOKEN)')
+    parser.add_argument('--bin-dir', default='', help='directory of the ProteumIM binaries')
+    parser.add_argument('--cache-dir', default=None, help='directory where reports are also kept on disk')
+    parser.add_argument('--cache-size', type=int, default=128, help='reports kept in memory')
+    args = parser.parse_args()
+
+    proteum = Proteum()
+    proteum.set_bin_dir(args.bin_dir)
+    daemon = ProteumDaemon(proteum, ReportCache(args.cache_size, args.cache_dir), args.token)
+    daemon.start(args.address)
+    print('Proteum daemon listening on %s' % (daemon.address,))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        daemon.stop()
@@ -1,3 +1,6 @@
+from ReportParser import ReportParser
+from TestCaseTable import TestCaseTable
+
 class ProteumReport:
     """ Proteum Report Handler
         Responsible for parsing relevant information from ProteumIM's output reports
@@ -9,102 +12,55 @@ class ProteumReport:
     
     def __init__(self, lst):
         self.lst = lst
-
-    def load(self):
-        with open(self.lst, 'r') as lst_file:
-            self.load_general(lst_file)
-
-    def load_general(self, f):
-        trash = f.readline()
-        trash = f.readline()
-        trash = f.readline()
-
-        self.program = f.readline().strip().split()[-1]
-
-        trash = f.readline()
-
-        self.source_file = f.readline().strip().split()[-1]
-
-        trash = f.readline()
-
-        self.total_mutants = int(f.readline().strip().split()[-1])
-
-        trash = f.readline()
-
-        self.anomalous_mutants = int(f.readline().strip().split()[-1])
-
-        trash = f.readline()
-
-        self.active_mutants = int(f.readline().strip().split()[-1])
-
-        trash = f.readline()
-
-        self.alive_mutants = int(f.readline().strip().split()[-1])
-
-        trash = f.readline()
-
-        self.equivalent_mutants = int(f.readline().strip().split()[-1])
-
-        trash = f.readline()
-
-        self.mutation_score = float(f.readline().strip().split()[-1])
-
-        trash = f.readline()
-        trash = f.readline()
-
-        #self.operators = []
         self.operators = {}
         self.ordered_op_keys = []
+        self.test_cases = TestCaseTable()
+        self.blob_store = None
+
+    def set_blob_store(self, store):
+        """ Keep the input, output and stderr of the test cases loaded from now on in a BlobStore. """
+        self.blob_store = store
+
+    def copy(self):
+        """ A copy that can be changed without changing this report (test cases included). """
+        report = ProteumReport(self.lst)
+        report.__dict__.update(self.__dict__)
+        report.operators = dict(self.operators)
+        report.ordered_op_keys = list(self.ordered_op_keys)
+        report.test_cases = self.test_cases.copy()
+        return report
 
-        line = f.readline() #2,4,6
-        split = line.split()
-        #print ("line:", line)
-        #print ("split:", split)
-        while line and (len(split) == 3 or len(split) == 5 or len(split) == 7):
-            #print ("while[%d]: %s" % (len(split), line))
-            #print("[%s] = %d" % (split[1], int(split[2])))
-            #self.operators.append({split[1] : int(split[2])})
-            self.operators[split[1]] = int(split[2])
-            self.ordered_op_keys.append(split[1])
-            if len(split) >= 5:
-                #print("[%s] = %d" % (split[3], int(split[4])))
-                #self.operators.append({split[3] : int(split[4])})
-                self.operators[split[3]] = int(split[4])
-                self.ordered_op_keys.append(split[3])
-                if len(split) == 7:
-                    #print("[%s] = %d" % (split[5], int(split[6])))
-                    #self.operators.append({split[5] : int(split[6])})
-                    self.operators[split[5]] = int(split[6])
-                    self.ordered_op_keys.append(split[5])
-            line = f.readline()
-            split = line.split()
+    def load(self):
+        """ Load the whole report: header, operators and test cases. """
+        self.load_records(ReportParser(self.lst).records())
 
-        #print(self.operators)
+    def load_general(self, f):
+        """ Load the header and the operators of a report from an opened file.
+            Reading stops at the first test case.
+        """
+        self.load_records(ReportParser.parse(f, test_cases=False), test_cases=False)
 
     def load_test_cases(self, f):
-        self.test_cases = []
-
-        for line in f:
-            tcase = TestCaseInfo()
-            tcase.number = 0
-            tcase.not_executed_mutants = 0
-            tcase.alive_mutants = 0
-            tcase.dead_by_stdout = 0
-            tcase.dead_by_retcode = 0
-            tcase.dead_by_timeout = 0
-            tcase.dead_by_trap = 0
-            tcase.avoided_mutants = 0
-            tcase.dead_mutants = 0
-            tcase.enabled = True
-            tcase.cpu_exec_time = 0.0
-            tcase.total_exec_time = 0.0
-            tcase.retcode = 0
-            tcase.parameters = ""
-            tcase.input = ""
-            tcase.output = ""
-            tcase.stderr = ""
-
-            self.test_cases.append(tcase)
+        """ Load the test cases of a report from an opened file. """
+        self.load_records(record for record in ReportParser.parse(f) if record.kind == 'tcase')
+
+    def load_records(self, records, test_cases=True):
+        """ Consume ReportRecord objects (see ReportParser). """
+        if test_cases:
+            self.test_cases = TestCaseTable()
+        for record in records:
+            if record.kind == 'header':
+                for name, value in record.data.items():
+                    setattr(self, name, value)
+            elif record.kind == 'operator':
+                operator, count = record.data
+                if operator not in self.operators:
+                    self.ordered_op_keys.append(operator)
+                self.operators[operator] = count
+            elif test_cases:
+                if self.blob_store is not None:
+                    record.data.store_payloads(self.blob_store)
+                self.test_cases.append(record.data)
 
     def str_ops(self, endl="\n"):
         string = ""
@@ -0,0 +1,186 @@
+import fnmatch, glob, itertools, os
+from array import array
+from multiprocessing import Pool
+from ReportParser import ReportParser
+from TestCaseTable import int_typecode
+from compat import cpu_count, string_types
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def summarize(path, operators=True):
+    """ Header fields (and operator counts) of a report, as a dictionary.
+        Parsing stops at the first test case; with operators=False it stops at the operators.
+        Runs in the worker processes of ReportAggregator, so it must stay a module function.
+    """
+    row = {'path': path, 'operators': {}, 'ordered_op_keys': []}
+    try:
+        for record in ReportParser(path).records(test_cases=False):
+            if record.kind == 'header':
+                row.update(record.data)
+            elif record.kind == 'operator' and operators:
+                operator, count = record.data
+                if operator not in row['operators']:
+                    row['ordered_op_keys'].append(operator)
+                row['operators'][operator] = count
+            else:
+                break
+    except (IOError, OSError, UnicodeDecodeError) as e:
+        row['error'] = '%s: %s' % (type(e).__name__, e)
+    if 'error' not in row and 'total_mutants' not in row:
+        row['error'] = 'no report header found'
+    return row
+
+def summarize_args(args):
+    return summarize(*args)
+
+class ReportTable(object):
+    """ Columnar table of report summaries: one row per report, one column per field and one
+        column per operator (zero for reports without it). Numeric columns are typed arrays,
+        exposed as zero-copy NumPy arrays by column() when NumPy is available.
+    """
+
+    text_fields = ('path', 'program', 'source_file')
+    int_fields = ('total_mutants', 'anomalous_mutants', 'active_mutants', 'alive_mutants', 'equivalent_mutants')
+    float_fields = ('mutation_score',)
+
+    def __init__(self):
+        self.columns = {}
+        for name in self.text_fields:
+            self.columns[name] = []
+        for name in self.int_fields:
+            self.columns[name] = array(int_typecode)
+        for name in self.float_fields:
+            self.columns[name] = array('d')
+        self.operators = {}
+        self.ordered_op_keys = []
+
+    def __len__(self):
+        return len(self.columns['path'])
+
+    def append(self, row):
+        """ Add the summary of a report (as returned by summarize). """
+        size = len(self)
+        for name in self.text_fields:
+            self.columns[name].append(row.get(name, ""))
+        for name in self.int_fields:
+            self.columns[name].append(row.get(name, 0))
+        for name in self.float_fields:
+            self.columns[name].append(row.get(name, 0.0))
+        for operator in row.get('ordered_op_keys', ()):
+            if operator not in self.operators:
+                self.ordered_op_keys.append(operator)
+                self.operators[operator] = array(int_typecode, [0] * size)
+        for operator, column in self.operators.items():
+            column.append(row['operators'].get(operator, 0))
+
+    def column(self, name):
+        """ A field column, or the column of an operator's counts. """
+        column = self.columns[name] if name in self.columns else self.operators[name]
+        if numpy is not None and isinstance(column, array):
+            return numpy.frombuffer(column, dtype=column.typecode) if len(column) else numpy.zeros(0)
+        return column
+
+    def total(self, name):
+        if numpy is not None:
+            return self.column(name).sum()
+        return sum(self.column(name))
+
+    def mean(self, name):
+        if not len(self):
+            return 0.0
+        return self.total(name) / float(len(self))
+
+    def row(self, index):
+        """ The summary of a report as a dictionary. """
+        row = dict((name, column[index]) for name, column in self.columns.items())
+        row['operators'] = dict((operator, column[index]) for operator, column in self.operators.items())
+        return row
+
+class ReportAggregator(object):
+    """ Bulk loading of many ProteumIM reports
+        Parses .lst reports (a directory, searched recursively, a glob pattern or a list of paths)
+        in a pool of processes and yields the summary of each one as soon as it is ready, or
+        merges them into a ReportTable.
+
+        Only the header and the operator counts are read (test cases are skipped); with
+        operators=False only the header is read, which stops at the operators section.
+    """
+
+    def __init__(self, workers=None, chunksize=16):
+        """ Arguments:
+            workers: number of processes (default is the number of cpus)
+            chunksize: how many reports each process takes at a time
+        """
+        self.workers = workers or cpu_count()
+        self.chunksize = chunksize
+        self.errors = []
+
+    @staticmethod
+    def paths(source, pattern='*.lst'):
+        """ Report paths of a directory, a glob pattern or an iterable of paths, sorted. """
+        if isinstance(source, string_types):
+            if os.path.isdir(source):
+                return sorted(os.path.join(path, name) for path, _, names in os.walk(source)
+                              for name in fnmatch.filter(names, pattern))
+            try:
+                return sorted(glob.glob(source, recursive=True))
+            except TypeError:
+                return ReportAggregator.walk_glob(source)
+        return list(source)
+
+    @staticmethod
+    def walk_glob(source):
+        """ glob with '**' where glob has no recursive argument (Python 2): the files under the
+            directory before the first wildcard whose path matches source, '**/' matching any
+            number of directories (none included).
+        """
+        if '**' not in source:
+            return sorted(glob.glob(source))
+        parts = source.split(os.sep)
+        fixed = list(itertools.takewhile(lambda part: not glob.has_magic(part), parts))
+        root = os.sep.join(fixed) or ('.' if not os.path.isabs(source) else os.sep)
+        patterns = [source, source.replace('**' + os.sep, '')]
+        found = []
+        for path, _, names in os.walk(root):
+            for name in names:
+                candidate = os.path.join(path, name) if fixed else os.path.relpath(os.path.join(path, name))
+                if any(fnmatch.fnmatch(candidate, pattern) for pattern in patterns):
+                    found.append(candidate)
+        return sorted(found)
+
+    def iterate(self, source, operators=True):
+        """ Yield the summary of every report (see summarize), in completion order. """
+        paths = self.paths(source)
+        if self.workers == 1 or len(paths) <= 1:
+            for path in paths:
+                yield summarize(path, operators)
+            return
+        pool = Pool(min(self.workers, len(paths)))
+        try:
+            for row in pool.imap_unordered(summarize_args, [(path, operators) for path in paths], self.chunksize):
+                yield row
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def aggregate(self, source, operators=True, on_row=None):
+        """ Load every report into a ReportTable, sorted by path. Reports that could not be read
+            are left out and kept in self.errors as (path, error).
+            on_row: optional callback receiving each summary as soon as it is ready
+        """
+        self.errors = []
+        rows = []
+        for row in self.iterate(source, operators):
+            if on_row:
+                on_row(row)
+            if 'error' in row:
+                self.errors.append((row['path'], row['error']))
+            else:
+                rows.append(row)
+        table = ReportTable()
+        for row in sorted(rows, key=lambda row: row['path']):
+            table.append(row)
+        return table
@@ -0,0 +1,132 @@
+import hashlib, os, pickle, tempfile, threading
+from collections import OrderedDict
+from SessionWorkspace import SessionWorkspace
+
+class ReportCache(object):
+    """ Cache of parsed ProteumReport objects
+        Reports are keyed by a fingerprint of the session files (name, size, inode and
+        modification time in nanoseconds of each one, optionally their contents), so while a
+        session does not change the report binary is not executed again. On file systems with
+        a coarse modification time, a file rewritten in place with the same size within the
+        same tick is only noticed with hash_files.
+
+        Entries are kept in memory (LRU, up to 'size' entries) and, when a directory is given,
+        also pickled on disk (LRU by access time, up to 'disk_size' entries), so they survive
+        across processes. A cache can be shared by threads (as ProteumDaemon does).
+    """
+
+    def __init__(self, size=32, directory=None, disk_size=256, hash_files=False):
+        """ Arguments:
+            size: maximum number of reports kept in memory
+            directory: where reports are stored on disk (default is no disk tier)
+            disk_size: maximum number of reports kept on disk
+            hash_files: if True, the fingerprint also hashes the contents of the session files
+        """
+        self.size = size
+        self.directory = directory
+        self.disk_size = disk_size
+        self.hash_files = hash_files
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.lock = threading.RLock()
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def fingerprint(self, session, D="", extra=()):
+        """ Key for the current state of a session. Reports (.lst) are not part of it,
+            since they are written by the report command itself.
+            extra: other values the report depends on (such as the report arguments).
+        """
+        workspace = SessionWorkspace(session, D)
+        key = hashlib.sha1()
+        key.update(repr((session, os.path.abspath(workspace.directory), tuple(extra))).encode())
+        for name in workspace.files():
+            if name.endswith('.lst'):
+                continue
+            st = os.stat(workspace.path(name))
+            mtime = getattr(st, 'st_mtime_ns', st.st_mtime)
+            key.update(repr((name, st.st_size, st.st_ino, mtime)).encode())
+            if self.hash_files:
+                with open(workspace.path(name), 'rb') as f:
+                    for chunk in iter(lambda: f.read(1 << 20), b''):
+                        key.update(chunk)
+        return key.hexdigest()
+
+    def get(self, key):
+        """ The cached report for a key, or None. """
+        with self.lock:
+            if key in self.entries:
+                self.entries[key] = self.entries.pop(key)
+                self.hits += 1
+                return self.entries[key]
+
+            path = self.disk_path(key)
+            if path and os.path.isfile(path):
+                try:
+                    with open(path, 'rb') as f:
+                        report = pickle.load(f)
+                except (IOError, EOFError, pickle.UnpicklingError):
+                    report = None
+                if report is not None:
+                    os.utime(path, None)
+                    self.remember(key, report)
+                    self.disk_hits += 1
+                    return report
+
+            self.misses += 1
+            return None
+
+    def put(self, key, report):
+        with self.lock:
+            self.remember(key, report)
+            path = self.disk_path(key)
+            if path:
+                fd, tmp = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+                try:
+                    with os.fdopen(fd, 'wb') as f:
+                        pickle.dump(report, f, pickle.HIGHEST_PROTOCOL)
+                    os.rename(tmp, path)
+                except BaseException:
+                    os.remove(tmp)
+                    raise
+                self.evict_disk()
+
+    def remember(self, key, report):
+        with self.lock:
+            self.entries.pop(key, None)
+            self.entries[key] = report
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def disk_path(self, key):
+        if not self.directory:
+            return None
+        return os.path.join(self.directory, key + '.report')
+
+    def evict_disk(self):
+        paths = [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                 if name.endswith('.report')]
+        if len(paths) <= self.disk_size:
+            return
+        paths.sort(key=lambda path: os.stat(path).st_atime)
+        for path in paths[:len(paths) - self.disk_size]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            if self.directory:
+                for name in os.listdir(self.directory):
+                    if name.endswith('.report'):
+                        os.remove(os.path.join(self.directory, name))
+
+    def stats(self):
+        """ Hit/miss counters: {'hits': ..., 'disk_hits': ..., 'misses': ..., 'entries': ...} """
+        with self.lock:
+            return {'hits': self.hits, 'disk_hits': self.disk_hits,
+                    'misses': self.misses, 'entries': len(self.entries)}
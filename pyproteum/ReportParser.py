@@ -0,0 +1,156 @@
+import re
+from collections import namedtuple
+from TestCaseInfo import TestCaseInfo
+
+# A record read from a report:
+#   kind: 'header', 'operator' or 'tcase'
+#   data: a dictionary with the header fields, a tuple (operator, count) or a TestCaseInfo
+#   offset: byte offset from where the parsing can be resumed after this record
+ReportRecord = namedtuple('ReportRecord', ['kind', 'data', 'offset'])
+
+class ReportParser(object):
+    """ Streaming parser for ProteumIM's .lst reports
+        Reads the report line by line and yields ReportRecord objects as soon as they are
+        complete, so the whole report is never held in memory.
+
+        A report being written can be tailed: records(offset, final=False) stops at the last
+        complete record and self.offset tells where the next call has to start from.
+        With test_cases=False, parsing stops at the first test case, so reading the header and
+        the operators of a large report costs only its first lines.
+    """
+
+    header_fields = {
+        'PROGRAM TESTE': ('program', str),
+        'SOURCE FILE': ('source_file', str),
+        'TOTAL MUTANTS': ('total_mutants', int),
+        'ANOMALOUS MUTANTS': ('anomalous_mutants', int),
+        'ACTIVE MUTANTS': ('active_mutants', int),
+        'ALIVE MUTANTS': ('alive_mutants', int),
+        'EQUIVALENT MUTANTS': ('equivalent_mutants', int),
+        'MUTATION SCORE': ('mutation_score', float),
+    }
+
+    tcase_fields = {
+        'NOT EXECUTED MUTANTS': ('not_executed_mutants', int),
+        'ALIVE MUTANTS': ('alive_mutants', int),
+        'DEAD BY STDOUT': ('dead_by_stdout', int),
+        'DEAD BY RETURN CODE': ('dead_by_retcode', int),
+        'DEAD BY TIMEOUT': ('dead_by_timeout', int),
+        'DEAD BY TRAP': ('dead_by_trap', int),
+        'AVOIDED MUTANTS': ('avoided_mutants', int),
+        'DEAD MUTANTS': ('dead_mutants', int),
+        'STATUS': ('enabled', lambda value: value.upper().startswith('ENABLE')),
+        'CPU EXECUTION TIME': ('cpu_exec_time', float),
+        'TOTAL EXECUTION TIME': ('total_exec_time', float),
+        'RETURN CODE': ('retcode', int),
+        'PARAMETERS': ('parameters', str),
+        'INPUT': ('input', str),
+        'OUTPUT': ('output', str),
+        'STDERR': ('stderr', str),
+        'LABEL': ('label', str),
+    }
+
+    tcase_start = re.compile(r'TEST\s*CASE\s*#?\s*:?\s*(\d+)', re.IGNORECASE)
+
+    def __init__(self, lst):
+        self.lst = lst
+        self.offset = 0
+
+    def records(self, offset=0, final=True, test_cases=True):
+        """ Yield the records of the report starting from a byte offset.
+            Arguments:
+            offset: where to start reading (0 or a value taken from self.offset / record.offset)
+            final: if True, the report is complete and the last test case is yielded at
+                   the end of the file. If False (tailing a growing report), the last test
+                   case and any incomplete line are left to the next call.
+            test_cases: if False, stop at the first test case (header and operators only)
+        """
+        self.offset = offset
+        with open(self.lst, 'rb') as f:
+            f.seek(offset)
+            for record in self.parse(self.lines(f, offset, final), final, test_cases):
+                self.offset = record.offset
+                yield record
+
+    def tail(self):
+        """ Yield the records appended since the last call. """
+        return self.records(self.offset, final=False)
+
+    @staticmethod
+    def lines(f, offset=0, final=True):
+        """ Yield (line, start, end) for every complete line of a binary file. """
+        for line in iter(f.readline, b''):
+            if not line.endswith(b'\n') and not final:
+                break
+            start = offset
+            offset += len(line)
+            yield line.decode('utf-8', 'replace'), start, offset
+
+    @classmethod
+    def parse(cls, lines, final=True, test_cases=True):
+        """ Parse an iterable of lines.
+            lines can be a text file object or (line, start, end) tuples as yielded by lines().
+            If test_cases is False, no line after the first test case is read.
+        """
+        header = {}
+        tcase = None
+        end = 0
+        for line in lines:
+            if isinstance(line, tuple):
+                line, start, end = line
+            else:
+                start, end = end, end + len(line)
+
+            text = line.strip().lstrip('[]').strip()
+            match = cls.tcase_start.match(text)
+            if match:
+                if header:
+                    yield ReportRecord('header', header, start)
+                    header = {}
+                if not test_cases:
+                    return
+                if tcase is not None:
+                    yield ReportRecord('tcase', TestCaseInfo(**tcase), start)
+                tcase = {'number': int(match.group(1))}
+                continue
+
+            key, sep, value = text.partition(':')
+            key = ' '.join(key.split()).upper()
+            fields = cls.tcase_fields if tcase is not None else cls.header_fields
+            if sep and key in fields:
+                name, convert = fields[key]
+                value = value.strip()
+                try:
+                    value = convert(value if convert is str else value.split()[-1])
+                except (ValueError, IndexError):
+                    continue
+                if tcase is not None:
+                    tcase[name] = value
+                else:
+                    header[name] = value
+                continue
+
+            if tcase is None:
+                operators = cls.operator_counts(text)
+                if operators:
+                    if header:
+                        yield ReportRecord('header', header, start)
+                        header = {}
+                    for operator in operators:
+                        yield ReportRecord('operator', operator, end)
+
+        if header and final:
+            yield ReportRecord('header', header, end)
+        if tcase is not None and final:
+            yield ReportRecord('tcase', TestCaseInfo(**tcase), end)
+
+    @staticmethod
+    def operator_counts(text):
+        """ Parse an operators line ('u-OAAA 3 u-OAAN 0 ...') into a list of (operator, count). """
+        split = text.split()
+        if not split or len(split) % 2:
+            return []
+        try:
+            return [(split[i], int(split[i+1])) for i in range(0, len(split), 2)]
+        except ValueError:
+            return []
@@ -0,0 +1,311 @@
+import json, math, os, shlex, signal, threading
+from collections import namedtuple
+try:
+    import resource
+except ImportError:
+    resource = None
+from MutantList import MutantList
+from ParallelExecutor import ParallelExecutor
+from SessionWorkspace import SessionWorkspace
+
+# Measurements of the original program running one test case: cpu seconds (user + sys),
+# maximum resident set size in kilobytes, bytes written to stdout/stderr and wall seconds
+Baseline = namedtuple('Baseline', 'number cpu max_rss output wall')
+
+class ResourceLimiter(object):
+    """ Resource limits for the execution of mutants
+        Measures the original program once per test case (cpu time, memory and output size,
+        kept in .<session>.baseline) and runs exemuta -exec with rlimits derived from the worst
+        test case: RLIMIT_CPU, RLIMIT_AS, RLIMIT_FSIZE and, optionally, RLIMIT_NPROC.
+
+        RLIMIT_AS, RLIMIT_FSIZE and RLIMIT_NPROC are set in the exemuta process before it is
+        executed (preexec_fn), so every mutant inherits them when it is spawned: a mutant
+        allocating too much fails right away. They apply to exemuta (and the compiler it runs)
+        too, so the address space limit is at least memory_floor and the file size limit at
+        least twice the largest session file.
+        RLIMIT_CPU counts the cpu time of a single process, exemuta's own included, so it is set
+        on each mutant instead: while exemuta runs, its descendant processes are polled (every
+        poll_seconds, through /proc) and the limit is set with resource.prlimit on each one
+        running the session's executable. The cpu time counted from the start of the mutant, the
+        limit is exact as long as it is set before being reached (cpu_floor is much larger than
+        poll_seconds): a mutant in an infinite loop gets SIGXCPU once it spends its budget.
+
+        Mutants are executed one exemuta -exec at a time (mutants 0 and 1 together, since
+        '-t 0' means "up to the last mutant"), so every limited process ending by a limit is
+        attributed to its mutant (see classify): self.causes maps the mutant numbers of the last
+        run to 'timeout' or 'trap', the causes ProteumIM reports, and summary() counts them as
+        dead_by_timeout and dead_by_trap.
+        Limits need Linux and Python 3.4 (resource.prlimit); elsewhere mutants run without them.
+    """
+
+    def __init__(self, proteum, executable, D="", session=None, cpu_factor=10.0, cpu_floor=1,
+                 memory_factor=4.0, memory_floor=256, output_factor=10.0, output_floor=1, nproc=None,
+                 poll_seconds=0.05):
+        """ Arguments:
+            proteum: Proteum object used to run the commands
+            executable: original program, used to measure the baseline of each test case
+            D: directory where the session is located (default is ".")
+            cpu_factor, cpu_floor: cpu limit is cpu_factor times the baseline, at least cpu_floor seconds
+            memory_factor, memory_floor: address space limit is memory_factor times the baseline max RSS,
+                                         at least memory_floor megabytes (exemuta and the compiler
+                                         must fit in it)
+            output_factor, output_floor: file size limit is output_factor times the baseline output,
+                                         at least output_floor megabytes
+            nproc: maximum number of processes of the user (default is no limit)
+            poll_seconds: how often the processes started by exemuta are checked
+        """
+        self.proteum = proteum
+        self.executable = executable
+        self.D = D
+        self.session = session if session is not None else proteum.session
+        self.cpu_factor = cpu_factor
+        self.cpu_floor = cpu_floor
+        self.memory_factor = memory_factor
+        self.memory_floor = memory_floor
+        self.output_factor = output_factor
+        self.output_floor = output_floor
+        self.nproc = nproc
+        self.poll_seconds = poll_seconds
+        self.baselines = {}
+        self.causes = {}
+        self.load()
+
+    def baseline_path(self):
+        return os.path.join(self.D if self.D else ".", ".%s.baseline" % self.session)
+
+    def load(self):
+        if os.path.isfile(self.baseline_path()):
+            with open(self.baseline_path()) as f:
+                self.baselines = dict((int(number), Baseline(*values)) for number, values in json.load(f).items())
+        return self.baselines
+
+    def save(self):
+        tmp = self.baseline_path() + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(dict((str(number), list(baseline)) for number, baseline in self.baselines.items()), f)
+        os.rename(tmp, self.baseline_path())
+
+    def measure(self, tests=None, force=False):
+        """ Run the original program for every test case not measured yet.
+            tests: test cases with number, parameters and input (default is the test cases of the report)
+            force: if True, measure again the test cases already measured
+        """
+        if tests is None:
+            report = self.proteum.report(D=self.D, session=self.session)
+            tests = report.test_cases
+        executable = self.executable if os.path.dirname(self.executable) else os.path.join(".", self.executable)
+
+        for test in tests:
+            if test.number in self.baselines and not force:
+                continue
+            result = self.proteum.runner.run([executable] + shlex.split(test.parameters or ""),
+                input=str(test.input) if test.input else None, cwd=self.D or None)
+            usage = result.rusage
+            self.baselines[test.number] = Baseline(test.number,
+                usage.ru_utime + usage.ru_stime if usage else result.elapsed,
+                usage.ru_maxrss if usage else 0,
+                len(result.stdout.encode('utf-8')) + len(result.stderr.encode('utf-8')),
+                result.elapsed)
+        self.save()
+        return self.baselines
+
+    def limits(self):
+        """ Dictionary {rlimit name: value} of the limits derived from the baselines. """
+        baselines = list(self.baselines.values())
+        cpu = max([b.cpu for b in baselines] or [0])
+        rss = max([b.max_rss for b in baselines] or [0])
+        output = max([b.output for b in baselines] or [0])
+        workspace = SessionWorkspace(self.session, self.D)
+        session_files = max([os.path.getsize(workspace.path(name)) for name in workspace.files()] or [0])
+        limits = {
+            'RLIMIT_CPU': int(max(self.cpu_floor, math.ceil(cpu * self.cpu_factor))),
+            'RLIMIT_AS': int(max(self.memory_floor * 1024 * 1024, rss * 1024 * self.memory_factor)),
+            'RLIMIT_FSIZE': int(max(self.output_floor * 1024 * 1024, output * self.output_factor,
+                                    2 * session_files)),
+        }
+        if self.nproc:
+            limits['RLIMIT_NPROC'] = self.nproc
+        return limits
+
+    @staticmethod
+    def processes():
+        """ {pid: fields of /proc/<pid>/stat after the command name} of every process. """
+        processes = {}
+        for name in os.listdir('/proc'):
+            if not name.isdigit():
+                continue
+            try:
+                with open('/proc/%s/stat' % name) as f:
+                    processes[int(name)] = f.read().rpartition(')')[2].split()
+            except (IOError, OSError):
+                pass
+        return processes
+
+    @staticmethod
+    def descendants(pid, processes):
+        """ Pids of the processes started (directly or not) by pid. """
+        children = {}
+        for child, fields in processes.items():
+            children.setdefault(int(fields[1]), []).append(child)
+        found, pending = [], [pid]
+        while pending:
+            for child in children.get(pending.pop(), []):
+                found.append(child)
+                pending.append(child)
+        return found
+
+    def is_mutant(self, pid):
+        """ True if the process runs the session's executable. """
+        try:
+            path = os.readlink('/proc/%d/exe' % pid)
+        except (IOError, OSError):
+            return False
+        if path.endswith(' (deleted)'):
+            path = path[:-len(' (deleted)')]
+        return os.path.basename(path) == os.path.basename(self.executable)
+
+    @staticmethod
+    def preexec(limits):
+        """ Function setting the limits inherited by a process' children, run in the child
+            between fork and exec (see CommandRunner.run).
+        """
+        limits = [(getattr(resource, name), value) for name, value in limits.items() if name != 'RLIMIT_CPU']
+
+        def limit():
+            for name, value in limits:
+                resource.setrlimit(name, (value, value))
+        return limit
+
+    def apply(self, pid, cpu):
+        """ Set the cpu limit of a process. Returns False if it is gone. """
+        try:
+            # a second more of cpu before SIGKILL, so SIGXCPU arrives first
+            resource.prlimit(pid, resource.RLIMIT_CPU, (cpu, cpu + 1))
+        except OSError:
+            return False
+        return True
+
+    def watch(self, pid, stop, causes):
+        """ Set the cpu limit of every mutant started by the process pid until stop is set,
+            classifying each of them when it ends (see classify) into the list causes.
+            Runs in its own thread (see run).
+        """
+        cpu = self.limits()['RLIMIT_CPU']
+        ticks = float(os.sysconf('SC_CLK_TCK'))
+        limited = {}
+        while True:
+            finished = stop.is_set()
+            processes = self.processes()
+            running = set(self.descendants(pid, processes))
+            for child in running:
+                if child not in limited and self.is_mutant(child) and self.apply(child, cpu):
+                    limited[child] = None
+            for child in list(limited):
+                fields = processes.get(child) if child in running else None
+                if fields and fields[0] != 'Z':
+                    # last known cpu seconds and address space (bytes)
+                    limited[child] = ((int(fields[11]) + int(fields[12])) / ticks, int(fields[20]))
+                    continue
+                # gone (reaped by exemuta) or a zombie, whose exit status is still known
+                status = int(fields[49]) if fields and len(fields) > 49 else None
+                returncode = -(status & 0x7f) if status is not None and status & 0x7f else None
+                cause = self.classify(returncode, *(limited.pop(child) or (None, None)))
+                if cause:
+                    causes.append(cause)
+            if finished:
+                break
+            stop.wait(self.poll_seconds)
+
+    def run(self, f=0, t=0, **exec_args):
+        """ Execute the mutants from f to t (t equals to 0 means up to the last one) under the limits,
+            measuring the baseline first, if needed.
+            exec_args are passed to Proteum.exemuta_exec (trace, T, ...); workers is not supported,
+            since shards are executed without limits.
+            Returns the result of the last exemuta -exec; raises RuntimeError if one fails.
+        """
+        if not self.baselines:
+            self.measure()
+        self.causes = {}
+        if resource is None or not hasattr(resource, 'prlimit') or not os.path.isdir('/proc'):
+            return self.proteum.exemuta_exec(D=self.D, f=f, t=t, session=self.session, **exec_args)
+
+        executor = ParallelExecutor(self.proteum)
+        if t <= 0:
+            t = executor.last_mutant(self.D, self.session)
+        preexec = self.preexec(self.limits())
+        result = None
+        for first, last in executor.shards(f, t, 1):
+            causes = []
+            result = self.limited(first, last, preexec, causes, **exec_args)
+            if result is None or not result.ok:
+                raise RuntimeError('exemuta -exec failed for mutants %d-%d of %s: %s' % (first, last, self.session,
+                    result.stderr.strip() if result is not None else 'no result'))
+            if causes:
+                self.attribute(first, last, causes)
+        return result
+
+    def limited(self, f, t, preexec, causes, **exec_args):
+        """ Run exemuta -exec on mutants f to t under the limits, appending the cause of every
+            mutant process ended by a limit to causes.
+        """
+        stop = threading.Event()
+        watchers = []
+
+        def start(process):
+            watcher = threading.Thread(target=self.watch, args=(process.pid, stop, causes))
+            watcher.daemon = True
+            watcher.start()
+            watchers.append(watcher)
+        try:
+            return self.proteum.exemuta_exec(D=self.D, f=f, t=t, session=self.session, on_start=start,
+                preexec_fn=preexec, **exec_args)
+        finally:
+            stop.set()
+            for watcher in watchers:
+                watcher.join()
+
+    def attribute(self, f, t, causes):
+        """ Attach the cause seen while executing mutants f to t to the ones killed by a signal.
+            A cpu limit counts over the other causes, since it is what ProteumIM misses (it
+            reports a mutant ended by SIGXCPU as a trap).
+        """
+        cause = 'timeout' if 'timeout' in causes else 'trap'
+        for mutant in MutantList.load(self.proteum, f=f, t=t, D=self.D, session=self.session):
+            if mutant.dead and mutant.cause in ('timeout', 'trap'):
+                self.causes[mutant.number] = cause
+
+    timeout_signals = ('SIGXCPU', 'SIGKILL')
+    trap_signals = ('SIGSEGV', 'SIGBUS', 'SIGABRT', 'SIGFPE', 'SIGILL', 'SIGXFSZ')
+
+    def classify(self, returncode, cpu=None, memory=None):
+        """ Why a limited mutant ended, as ProteumIM names the causes: 'timeout' (cpu limit) or
+            'trap' (address space or file size limit, or another fatal signal), None otherwise.
+            returncode is negative for a signal, as in CommandResult (None when it was not seen);
+            cpu and memory are the last cpu seconds and address space (bytes) seen, which are all
+            there is when exemuta reaps the mutant before its status is seen: a mutant that had
+            reached the cpu limit was stopped by it, one close to the address space limit most
+            likely failed to allocate memory ("close" is 90%, since samples are poll_seconds apart).
+        """
+        limits = self.limits()
+        near_cpu = cpu is not None and cpu >= 0.9 * limits['RLIMIT_CPU']
+        near_memory = memory is not None and memory >= 0.9 * limits['RLIMIT_AS']
+        number = -returncode if returncode is not None and returncode < 0 else None
+        if number is None:
+            # reaped before its status was seen (the usual case): judged by the last sample
+            return 'timeout' if near_cpu else 'trap' if near_memory else None
+        if any(getattr(signal, name, None) == number for name in self.timeout_signals):
+            return 'timeout'
+        if any(getattr(signal, name, None) == number for name in self.trap_signals):
+            return 'trap'
+        return None
+
+    def summary(self, f=0, t=0):
+        """ Dead mutants of a range by cause: {'dead_by_timeout': n, 'dead_by_trap': n, ...},
+            with the causes of the last run (self.causes) in place of the ones ProteumIM reports.
+        """
+        counts = {}
+        for mutant in MutantList.load(self.proteum, f=f, t=t, D=self.D, session=self.session):
+            if mutant.dead:
+                cause = 'dead_by_' + (self.causes.get(mutant.number) or mutant.cause or 'unknown')
+                counts[cause] = counts.get(cause, 0) + 1
+        return counts
@@ -0,0 +1,250 @@
+import copy, os, threading, time
+try:
+    import resource
+except ImportError:
+    resource = None
+from TestCaseImporter import TestCaseImporter
+from compat import cpu_count, string_types
+
+class SessionSpec(object):
+    """ Description of the mutation testing of one program (one test session).
+        Attributes:
+        session: name of the test session
+        D: directory where the program and the session are located
+        test_new: dictionary of other arguments to Proteum.test_new (S, E, C, research)
+        operators: operators passed to Proteum.muta_gen (see its documentation)
+        tests: path of a .jsonl/.csv file or iterable of test case records (see TestCaseImporter)
+        exec_args: arguments passed to Proteum.exemuta_exec (trace, T, workers, ...)
+        cost: estimated cost, used to run short jobs first (default is estimated from the source size)
+        memory: estimated memory used while it runs, in megabytes
+        files: estimated open files while it runs
+    """
+
+    def __init__(self, session, D="", test_new=None, operators=None, tests=None, exec_args=None,
+                 cost=None, memory=256, files=32):
+        self.session = session
+        self.D = D
+        self.test_new = test_new or {}
+        self.operators = operators or [{'filter': '-all', 'percent': 100, 'max': 0}]
+        self.tests = tests
+        self.exec_args = exec_args or {}
+        self.cost = cost
+        self.memory = memory
+        self.files = files
+
+    @property
+    def cores(self):
+        return max(1, self.exec_args.get('workers', 1))
+
+    def estimated_cost(self):
+        """ The cost given or, when unknown, size of the source times the number of operators. """
+        if self.cost is not None:
+            return self.cost
+        source = self.test_new.get('S') or self.session
+        path = os.path.join(self.D, source if source.endswith('.c') else source + '.c')
+        size = os.path.getsize(path) if os.path.isfile(path) else 0
+        return size * len(self.operators)
+
+class SessionResult(object):
+    """ Outcome of a session run by SessionScheduler.
+        report is the loaded ProteumReport (None if the session failed, see error).
+        queued, started and finished are wall clock times.
+    """
+
+    def __init__(self, spec, queued):
+        self.spec = spec
+        self.session = spec.session
+        self.report = None
+        self.error = None
+        self.queued = queued
+        self.started = None
+        self.finished = None
+
+    @property
+    def waited(self):
+        return self.started - self.queued
+
+    @property
+    def elapsed(self):
+        return self.finished - self.started
+
+    @property
+    def completion(self):
+        return self.finished - self.queued
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        if not self.ok:
+            return "SessionResult(%s, error=%r)" % (self.session, self.error)
+        return "SessionResult(%s, score=%s, elapsed=%.2fs)" % (self.session, self.report.mutation_score, self.elapsed)
+
+class SessionScheduler(object):
+    """ Concurrent mutation testing of many test sessions
+        Runs the whole pipeline of each SessionSpec (test-new, muta-gen, test case import,
+        exemuta -exec and report) concurrently with the others, while the sessions running
+        fit in the limits of cpu cores, memory and open files.
+
+        Among the sessions waiting, the one with the smallest estimated cost that fits is started
+        first (shortest job first), which reduces the mean completion time. A session larger than
+        the limits runs alone.
+    """
+
+    def __init__(self, proteum, cores=None, memory=None, files=None):
+        """ Arguments:
+            proteum: Proteum object used as template (bin dir, output file, profiler, cache)
+            cores: cores available (default is the number of cpus)
+            memory: memory available, in megabytes (default is the available memory of the machine)
+            files: open files available (default is 80% of the soft limit of the process)
+        """
+        self.proteum = proteum
+        self.limits = {
+            'cores': cores or cpu_count(),
+            'memory': memory or self.available_memory(),
+            'files': files or self.available_files(),
+        }
+        self.used = dict((name, 0) for name in self.limits)
+        self.condition = threading.Condition()
+        self.on_result = None
+
+    @staticmethod
+    def available_memory():
+        """ MemAvailable of /proc/meminfo in megabytes (unlimited where it is not available). """
+        try:
+            with open('/proc/meminfo') as f:
+                for line in f:
+                    if line.startswith('MemAvailable:'):
+                        return int(line.split()[1]) // 1024
+        except IOError:
+            pass
+        return float('inf')
+
+    @staticmethod
+    def available_files():
+        if resource is None:
+            return 512
+        soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft == resource.RLIM_INFINITY:
+            return 4096
+        return max(1, int(soft * 0.8))
+
+    def demand(self, spec):
+        """ Resources of a spec, clamped to the limits so that every spec can run (alone). """
+        demand = {'cores': spec.cores, 'memory': spec.memory, 'files': spec.files}
+        return dict((name, min(value, self.limits[name])) for name, value in demand.items())
+
+    def fits(self, demand):
+        return all(self.used[name] + value <= self.limits[name] for name, value in demand.items())
+
+    def acquire(self, demand):
+        for name, value in demand.items():
+            self.used[name] += value
+
+    def release(self, demand):
+        with self.condition:
+            for name, value in demand.items():
+                self.used[name] -= value
+            self.condition.notify_all()
+
+    @staticmethod
+    def check(result, command, session):
+        if result is None or not result.ok:
+            raise RuntimeError('%s failed for session %s: %s' % (command, session,
+                result.stderr.strip() if result is not None else 'no result'))
+
+    def pipeline(self, proteum, spec):
+        """ Run every step of a session and return its loaded report.
+            Raises RuntimeError as soon as a step fails.
+        """
+        self.check(proteum.test_new(spec.session, D=spec.D, **spec.test_new), 'test-new', spec.session)
+        self.check(proteum.muta_gen(operators=spec.operators, D=spec.D, session=spec.session), 'muta-gen',
+            spec.session)
+        if spec.tests is not None:
+            importer = TestCaseImporter(proteum, spec.D, spec.session)
+            if isinstance(spec.tests, string_types):
+                stats = importer.import_file(spec.tests)
+            else:
+                stats = importer.run(spec.tests)
+            if stats.failed:
+                raise RuntimeError('%d of %d test cases could not be added to session %s' % (stats.failed,
+                    stats.added + stats.failed, spec.session))
+        self.check(proteum.exemuta_exec(D=spec.D, session=spec.session, **spec.exec_args), 'exemuta -exec',
+            spec.session)
+        self.check(proteum.exemuta_update(D=spec.D, session=spec.session), 'exemuta -update', spec.session)
+        report = proteum.report(D=spec.D, session=spec.session)
+        return report
+
+    def execute(self, result, demand, done):
+        # every job has its own Proteum object (test_new changes the current session),
+        # sharing the runner, so listeners such as a Profiler see every command
+        proteum = copy.copy(self.proteum)
+        try:
+            result.report = self.pipeline(proteum, result.spec)
+        except Exception as e:
+            result.error = e
+        finally:
+            result.finished = time.time()
+            with self.condition:
+                done.append(result)
+            self.release(demand)
+            if self.on_result:
+                self.on_result(result)
+
+    def run(self, specs, on_result=None):
+        """ Run the sessions of a list of SessionSpecs.
+            on_result: optional callback receiving each SessionResult as soon as it is finished
+            Returns the list of SessionResults, in completion order.
+        """
+        self.on_result = on_result
+        queued = time.time()
+        waiting = sorted(((spec.estimated_cost(), index, spec) for index, spec in enumerate(specs)),
+            key=lambda item: item[:2])
+        done, threads = [], []
+
+        with self.condition:
+            while waiting:
+                chosen = None
+                for position, (_, _, spec) in enumerate(waiting):
+                    if self.fits(self.demand(spec)):
+                        chosen = position
+                        break
+                if chosen is None:
+                    self.condition.wait()
+                    continue
+                _, _, spec = waiting.pop(chosen)
+                demand = self.demand(spec)
+                self.acquire(demand)
+                result = SessionResult(spec, queued)
+                result.started = time.time()
+                thread = threading.Thread(target=self.execute, args=(result, demand, done))
+                thread.daemon = True
+                thread.start()
+                threads.append(thread)
+
+        for thread in threads:
+            thread.join()
+        return done
+
+    @staticmethod
+    def combine(results):
+        """ Totals of many sessions: mutants, alive and dead mutants, overall mutation score,
+            failed sessions and mean completion time.
+        """
+        reports = [result.report for result in results if result.ok]
+        total = sum(report.total_mutants for report in reports)
+        alive = sum(report.alive_mutants for report in reports)
+        equivalent = sum(report.equivalent_mutants for report in reports)
+        anomalous = sum(report.anomalous_mutants for report in reports)
+        dead = total - alive - equivalent - anomalous
+        considered = total - equivalent - anomalous
+        return {
+            'sessions': len(results),
+            'failed': [result.session for result in results if not result.ok],
+            'total_mutants': total,
+            'alive_mutants': alive,
+            'dead_mutants': dead,
+            'mutation_score': dead / float(considered) if considered else 0.0,
+            'mean_completion': sum(result.completion for result in results) / len(results) if results else 0.0,
+        }
@@ -0,0 +1,196 @@
+import os, shutil, tempfile
+from os.path import isfile
+
+class SessionWorkspace(object):
+    """ Proteum Test Session Workspace
+        Handles the files of a test session stored in a directory, so that the session
+        can be cloned to an isolated directory, modified there by ProteumIM and merged back.
+
+        Merging is done byte by byte: every clone is compared against a snapshot of the
+        session taken before the clone, and only the bytes changed by ProteumIM are written
+        back. Clones working on disjoint mutant ranges change disjoint records, so they
+        merge without conflicts. When two clones change the same byte to different values,
+        or both change the size of the same file (e.g. both append to it), the merge fails
+        and the session is left untouched.
+    """
+
+    block_size = 4096
+    chunk_size = 64
+
+    def __init__(self, session, D=""):
+        """ Arguments:
+            session: Proteum test session
+            D: directory where the session files are located (default is ".")
+        """
+        self.session = session
+        self.directory = D if D else "."
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def valid_name(self, name):
+        """ True if name is a plain file name of this session (<session>.*, no directory). """
+        return (name.startswith(self.session + '.') and os.path.basename(name) == name and
+                not (os.altsep and os.altsep in name) and '\0' not in name)
+
+    def files(self):
+        """ Names of the session files (<session>.*) found in the directory, sorted. """
+        preffix = self.session + '.'
+        return sorted(name for name in os.listdir(self.directory)
+                      if name.startswith(preffix) and isfile(self.path(name)))
+
+    def snapshot(self):
+        """ Read every session file into a dictionary {name: bytes}. """
+        snapshot = {}
+        for name in self.files():
+            with open(self.path(name), 'rb') as f:
+                snapshot[name] = f.read()
+        return snapshot
+
+    def clone(self, dest=None):
+        """ Copy the whole directory to dest (a new temporary directory by default)
+            and return the workspace for the copy.
+        """
+        if dest is None:
+            dest = tempfile.mkdtemp(prefix='%s-' % self.session)
+            os.rmdir(dest)
+        shutil.copytree(self.directory, dest, symlinks=True)
+        return SessionWorkspace(self.session, dest)
+
+    def remove(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def diff(self, base):
+        """ Compare the session files against a snapshot.
+            Returns a patch: {name: (size, [(offset, bytes), ...])} listing, for each
+            changed file, its new size and the runs of bytes that differ from base.
+        """
+        return self.changes(base, self.snapshot())
+
+    @classmethod
+    def changes(cls, base, files):
+        """ Patch (as returned by diff) from a snapshot to another one. """
+        patch = {}
+        for name in sorted(files):
+            old = base.get(name, b"")
+            if files[name] != old:
+                patch[name] = (len(files[name]), list(cls.runs(old, files[name])))
+        return patch
+
+    @classmethod
+    def runs(cls, old, new):
+        """ Yield (offset, bytes) for every run of bytes in new that differs from old. """
+        common = min(len(old), len(new))
+        start = None
+        for block in range(0, common, cls.block_size):
+            end = min(block + cls.block_size, common)
+            if old[block:end] == new[block:end]:
+                if start is not None:
+                    yield start, new[start:block]
+                    start = None
+                continue
+            for chunk in range(block, end, cls.chunk_size):
+                chunk_end = min(chunk + cls.chunk_size, end)
+                if old[chunk:chunk_end] == new[chunk:chunk_end]:
+                    if start is not None:
+                        yield start, new[start:chunk]
+                        start = None
+                    continue
+                for i in range(chunk, chunk_end):
+                    if old[i:i+1] != new[i:i+1]:
+                        if start is None:
+                            start = i
+                    elif start is not None:
+                        yield start, new[start:i]
+                        start = None
+        if start is not None:
+            yield start, new[start:common]
+        if len(new) > common:
+            yield common, new[common:]
+
+    def merged(self, base, patches):
+        """ Apply a sequence of patches (as returned by diff) on top of the base snapshot,
+            in the order given, without writing anything.
+            Returns ({name: bytes}, conflicts), conflicts being a list of (name, offset) tuples:
+            bytes changed to different values by two patches, a file resized by more than one
+            patch or bytes written past the final size of a file.
+        """
+        files = {}
+        conflicts = []
+        names = sorted(set(name for patch in patches for name in patch))
+        for name in names:
+            merged = bytearray(base.get(name, b""))
+            touched = bytearray(len(merged))
+            size = len(merged)
+            resized = False
+            ends = []
+            for patch in patches:
+                if name not in patch:
+                    continue
+                new_size, runs = patch[name]
+                if new_size != len(base.get(name, b"")):
+                    if resized:
+                        conflicts.append((name, min(size, new_size)))
+                    resized = True
+                    size = new_size
+                for offset, data in runs:
+                    end = offset + len(data)
+                    if end > len(merged):
+                        merged.extend(b"\0" * (end - len(merged)))
+                        touched.extend(b"\0" * (end - len(touched)))
+                    if 1 in touched[offset:end] and merged[offset:end] != data:
+                        conflicts.append((name, offset))
+                    merged[offset:end] = data
+                    touched[offset:end] = b"\1" * len(data)
+                    ends.append((end, offset))
+            conflicts.extend((name, offset) for end, offset in ends if end > size)
+            files[name] = bytes(merged[:size])
+        return files, conflicts
+
+    def merge(self, base, patches):
+        """ Apply a sequence of patches (as returned by diff) on top of the base snapshot
+            and write the result into this workspace. Patches are applied in the order
+            given, so the merge is deterministic.
+            Raises RuntimeError if the patches conflict (see merged); nothing is written then.
+            Returns the names of the files written.
+        """
+        files, conflicts = self.merged(base, patches)
+        if conflicts:
+            raise RuntimeError('%d conflicting changes while merging %s: %s' % (len(conflicts), self.session,
+                ', '.join('%s@%d' % conflict for conflict in conflicts[:10])))
+        for name in sorted(files):
+            self.write(name, files[name])
+        return sorted(files)
+
+    def apply(self, patch):
+        """ Apply a single patch directly on the current session files. """
+        for name in sorted(patch):
+            size, runs = patch[name]
+            data = b""
+            if isfile(self.path(name)):
+                with open(self.path(name), 'rb') as f:
+                    data = f.read()
+            data = bytearray(data)
+            for offset, chunk in runs:
+                end = offset + len(chunk)
+                if end > len(data):
+                    data.extend(b"\0" * (end - len(data)))
+                data[offset:end] = chunk
+            self.write(name, bytes(data[:size]))
+
+    def restore(self, snapshot):
+        """ Bring the session files back to a snapshot, removing the ones created since then. """
+        for name in self.files():
+            if name not in snapshot:
+                os.remove(self.path(name))
+        for name in sorted(snapshot):
+            self.write(name, snapshot[name])
+
+    def write(self, name, data):
+        """ Atomically replace a session file. """
+        tmp = self.path('.%s.tmp' % name)
+        with open(tmp, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.rename(tmp, self.path(name))
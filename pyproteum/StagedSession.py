@@ -0,0 +1,238 @@
+import json, os, shutil, tempfile, time
+from os.path import isfile
+
+class StagedSession(object):
+    """ Session staged in a RAM-backed directory
+        Copies the session directory to tmpfs (/dev/shm by default) so that exemuta's heavy small
+        file I/O (mutant sources, binaries, outputs) happens in memory, and copies the changed
+        files back when sync() is called (at checkpoints) and when the staging is closed.
+
+        > with StagedSession(proteum, D='/nfs/myprog') as staged:
+        >     staged.exemuta_compile()
+        >     staged.exemuta_exec(trace=False)
+        >     staged.sync()
+        >     ...
+        > print(staged.savings())
+
+        When the directory does not fit in the space available (or in max_bytes), nothing is
+        staged and the commands run on the original directory.
+
+        Sync writes every changed file to a temporary name first, records the whole set of
+        renames and removals in a journal (.<session>.sync-journal, next to the session) and
+        then applies it. If the process dies while applying it, the next StagedSession on the
+        directory finishes the job (see recover), so the original directory gets either all of
+        the changes of a sync or none of them.
+
+        If the block fails (including KeyboardInterrupt), the changes since the last sync are
+        not copied back, but the staged copy is kept (its path is in kept and is printed).
+    """
+
+    probe_files = 32
+    probe_size = 4096
+
+    def __init__(self, proteum, D="", session=None, root='/dev/shm', max_bytes=None, headroom=0.5):
+        """ Arguments:
+            proteum: Proteum object used to run the commands
+            D: directory where the session is located (default is ".")
+            root: RAM-backed directory where the session is staged
+            max_bytes: largest directory staged (default is limited by the free space of root only)
+            headroom: fraction of the directory size that must also be free, for the files created
+        """
+        self.proteum = proteum
+        self.D = D if D else "."
+        self.session = session if session is not None else proteum.session
+        self.root = root
+        self.max_bytes = max_bytes
+        self.headroom = headroom
+        self.directory = self.D
+        self.kept = None
+        self.staged = False
+        self.used_memory = False
+        self.synced = {}
+        self.size = 0
+        self.writes = 0
+        self.timings = {'stage': 0.0, 'sync': 0.0, 'commands': 0.0}
+
+    @staticmethod
+    def tree(directory):
+        """ Dictionary {relative path: (size, mtime)} of the files of a directory. """
+        files = {}
+        for path, _, names in os.walk(directory):
+            for name in names:
+                full = os.path.join(path, name)
+                if isfile(full) and not os.path.islink(full):
+                    st = os.stat(full)
+                    files[os.path.relpath(full, directory)] = (st.st_size, getattr(st, 'st_mtime_ns', st.st_mtime))
+        return files
+
+    def fits(self):
+        self.size = sum(size for size, _ in self.tree(self.D).values())
+        if self.max_bytes is not None and self.size > self.max_bytes:
+            return False
+        if not os.path.isdir(self.root):
+            return False
+        st = os.statvfs(self.root)
+        return self.size * (1 + self.headroom) <= st.f_bavail * st.f_frsize
+
+    def stage(self):
+        """ Copy the session directory to the RAM-backed root, if it fits. Returns True if staged. """
+        if self.staged:
+            return True
+        self.recover()
+        if not self.fits():
+            return False
+        started = time.time()
+        dest = tempfile.mkdtemp(prefix='pyproteum-%s-' % self.session, dir=self.root)
+        os.rmdir(dest)
+        shutil.copytree(self.D, dest, symlinks=True)
+        self.directory = dest
+        self.staged = self.used_memory = True
+        self.synced = self.tree(dest)
+        self.timings['stage'] += time.time() - started
+        return True
+
+    def sync(self):
+        """ Copy the files changed since the last sync back to the original directory.
+            Returns how many files were written.
+        """
+        if not self.staged:
+            return 0
+        started = time.time()
+        current = self.tree(self.directory)
+        changed = sorted(name for name, state in current.items() if self.synced.get(name) != state)
+        removed = sorted(name for name in self.synced if name not in current)
+
+        for name in changed:
+            target = os.path.join(self.D, name)
+            if not os.path.isdir(os.path.dirname(target)):
+                os.makedirs(os.path.dirname(target))
+            tmp = self.sync_path(name)
+            shutil.copy2(os.path.join(self.directory, name), tmp)
+            with open(tmp, 'rb+') as f:
+                os.fsync(f.fileno())
+        self.write_journal({'changed': changed, 'removed': removed})
+        self.commit()
+
+        self.synced = current
+        self.writes += len(changed)
+        self.timings['sync'] += time.time() - started
+        return len(changed)
+
+    def sync_path(self, name):
+        """ Temporary name of a file of the original directory while it is synced. """
+        target = os.path.join(self.D, name)
+        return os.path.join(os.path.dirname(target), '.%s.sync' % os.path.basename(name))
+
+    def journal_path(self):
+        return os.path.join(self.D, '.%s.sync-journal' % self.session)
+
+    def write_journal(self, journal):
+        tmp = self.journal_path() + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(journal, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.rename(tmp, self.journal_path())
+
+    def commit(self):
+        """ Apply the journal of a sync: rename the files written to their temporary names
+            and remove the files removed. Files already renamed are skipped, so an interrupted
+            commit can simply run again.
+        """
+        with open(self.journal_path()) as f:
+            journal = json.load(f)
+        for name in journal['changed']:
+            if isfile(self.sync_path(name)):
+                os.rename(self.sync_path(name), os.path.join(self.D, name))
+        for name in journal['removed']:
+            if isfile(os.path.join(self.D, name)):
+                os.remove(os.path.join(self.D, name))
+        os.remove(self.journal_path())
+
+    def recover(self):
+        """ Finish a sync interrupted while its journal was applied. Returns True if there was one. """
+        if not isfile(self.journal_path()):
+            return False
+        self.commit()
+        return True
+
+    def close(self, sync=True, keep=False):
+        """ Sync (unless sync is False) and remove the staged copy (unless keep is True, then
+            its path is left in kept).
+        """
+        if self.staged:
+            try:
+                if sync:
+                    self.sync()
+            finally:
+                if keep:
+                    self.kept = self.directory
+                else:
+                    shutil.rmtree(self.directory, ignore_errors=True)
+                self.directory = self.D
+                self.staged = False
+
+    def __enter__(self):
+        self.stage()
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        # on errors the changes since the last sync() are not copied back, but kept staged
+        failed = exc_type is not None
+        self.close(sync=not failed, keep=failed)
+        if self.kept:
+            self.proteum.echo('Session %s was not synced; its staged copy is kept in %s' % (self.session, self.kept))
+        return False
+
+    def command(self, method, **kwargs):
+        """ Run a Proteum method (by name) on the staged directory. """
+        started = time.time()
+        try:
+            return getattr(self.proteum, method)(D=self.directory, session=self.session, **kwargs)
+        finally:
+            self.timings['commands'] += time.time() - started
+
+    def exemuta_exec(self, **kwargs):
+        return self.command('exemuta_exec', **kwargs)
+
+    def exemuta_compile(self, **kwargs):
+        return self.command('exemuta_compile', **kwargs)
+
+    def exemuta_update(self, **kwargs):
+        return self.command('exemuta_update', **kwargs)
+
+    @classmethod
+    def probe(cls, directory):
+        """ Seconds spent writing, syncing, reading and removing a small file in a directory. """
+        data = b'\0' * cls.probe_size
+        probe_dir = tempfile.mkdtemp(prefix='.pyproteum-probe-', dir=directory)
+        started = time.time()
+        try:
+            for i in range(cls.probe_files):
+                path = os.path.join(probe_dir, str(i))
+                with open(path, 'wb') as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                with open(path, 'rb') as f:
+                    f.read()
+                os.remove(path)
+        finally:
+            shutil.rmtree(probe_dir, ignore_errors=True)
+        return (time.time() - started) / cls.probe_files
+
+    def savings(self):
+        """ Timings of the staging and an estimate of the I/O time saved: the files written by the
+            commands (counted at each sync) times the difference of the cost of a small file I/O
+            on disk and in memory (see probe), minus the time spent staging and syncing.
+        """
+        report = dict(self.timings, staged=self.used_memory, size=self.size, files_written=self.writes)
+        if not report['staged']:
+            report['io_seconds_saved'] = 0.0
+            return report
+        disk = self.probe(self.D)
+        memory = self.probe(self.root)
+        report['disk_seconds_per_file'] = disk
+        report['memory_seconds_per_file'] = memory
+        report['io_seconds_saved'] = self.writes * (disk - memory) - self.timings['stage'] - self.timings['sync']
+        return report
@@ -0,0 +1,147 @@
+from __future__ import print_function
+import argparse, csv, io, json, sys, time
+from multiprocessing.pool import ThreadPool
+from Proteum import Proteum
+from compat import string_types
+
+class ImportStats(object):
+    """ Counters of a bulk import. """
+
+    def __init__(self):
+        self.added = 0
+        self.failed = 0
+        self.started = time.time()
+        self.finished = self.started
+
+    @property
+    def elapsed(self):
+        return self.finished - self.started
+
+    @property
+    def throughput(self):
+        """ Test cases added per second. """
+        return self.added / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __repr__(self):
+        return "%d test cases added (%d failed) in %.2fs, %.2f test cases/s" % (
+            self.added, self.failed, self.elapsed, self.throughput)
+
+class TestCaseImporter(object):
+    """ Bulk import of test cases
+        Reads test case definitions from JSONL or CSV files (or any iterator of dictionaries)
+        with the keys 'parameters', 'stdin' and 'label', and adds them to a session.
+
+        tcase -add takes a single test case, so every test case costs one tcase -add process
+        (fed directly through its stdin, no shell is involved); there is no batching. Records
+        are streamed, and progress_every only sets how often on_progress is called.
+        Additions to the same session are serialized, since tcase -add appends to the session
+        files; different sessions are imported in parallel with import_sessions.
+    """
+
+    fields = {'parameters': ('parameters', 'p', 'params'), 'stdin': ('stdin', 'input'), 'label': ('label',)}
+
+    def __init__(self, proteum, D="", session=None, progress_every=500, trace=False, on_progress=None):
+        """ Arguments:
+            proteum: Proteum object used to add the test cases
+            D: directory where test cases are located (default is ".")
+            progress_every: how many test cases are added between two on_progress calls; it does
+                not change the number of tcase processes (one per test case)
+            trace: if True, test cases also collect trace data
+            on_progress: optional callback receiving the ImportStats every progress_every test cases
+        """
+        self.proteum = proteum
+        self.D = D
+        self.session = session if session is not None else proteum.session
+        self.progress_every = progress_every
+        self.trace = trace
+        self.on_progress = on_progress
+
+    @staticmethod
+    def read_jsonl(f):
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+    @staticmethod
+    def read_csv(f):
+        return csv.DictReader(f)
+
+    @classmethod
+    def read_file(cls, path):
+        """ Test cases of a .jsonl or .csv file. """
+        with io.open(path, newline='') as f:
+            if path.endswith('.csv'):
+                for record in cls.read_csv(f):
+                    yield record
+            else:
+                for record in cls.read_jsonl(f):
+                    yield record
+
+    @classmethod
+    def normalize(cls, record):
+        """ Map a record to {'parameters', 'stdin', 'label'}, accepting a few aliases. """
+        normalized = {}
+        for field, aliases in cls.fields.items():
+            value = next((record[alias] for alias in aliases if record.get(alias) is not None), "")
+            normalized[field] = value if isinstance(value, string_types) else str(value)
+        return normalized
+
+    def add(self, record):
+        result = self.proteum.tcase_add(p=record['parameters'], trace=self.trace, label=record['label'],
+            D=self.D, session=self.session, input=record['stdin'] if record['stdin'] else None)
+        return result is not None and result.ok
+
+    def run(self, records):
+        """ Add the test cases of an iterable of dictionaries. Returns the ImportStats. """
+        stats = ImportStats()
+        for count, record in enumerate(records, 1):
+            if self.add(self.normalize(record)):
+                stats.added += 1
+            else:
+                stats.failed += 1
+            if self.on_progress and count % self.progress_every == 0:
+                stats.finished = time.time()
+                self.on_progress(stats)
+        stats.finished = time.time()
+        return stats
+
+    def import_file(self, path):
+        return self.run(self.read_file(path))
+
+    @classmethod
+    def import_sessions(cls, proteum, sources, D="", workers=4, **kwargs):
+        """ Import into several sessions in parallel.
+            sources: dictionary {session: path of a .jsonl/.csv file or iterable of records}
+            Returns a dictionary {session: ImportStats}.
+        """
+        def import_one(item):
+            session, source = item
+            importer = cls(proteum, D, session, **kwargs)
+            if isinstance(source, string_types):
+                return session, importer.import_file(source)
+            return session, importer.run(source)
+
+        pool = ThreadPool(max(1, min(workers, len(sources))))
+        try:
+            return dict(pool.map(import_one, sorted(sources.items())))
+        finally:
+            pool.close()
+            pool.join()
+
+# Main to import test cases from the command line:
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Bulk import of test cases into a Proteum test session.')
+    parser.add_argument('session', help='test session')
+    parser.add_argument('file', help='.jsonl or .csv file with parameters, stdin and label of each test case')
+    parser.add_argument('-D', default='', help='directory where the session is located')
+    parser.add_argument('--progress-every', type=int, default=500,
+                        help='print the progress every N test cases (each test case is still one tcase -add)')
+    parser.add_argument('--trace', action='store_true', help='also collect trace data')
+    parser.add_argument('--bin-dir', default='', help='directory of the ProteumIM binaries')
+    args = parser.parse_args()
+
+    proteum = Proteum()
+    proteum.set_bin_dir(args.bin_dir)
+    importer = TestCaseImporter(proteum, args.D, args.session, args.progress_every, args.trace,
+        on_progress=lambda stats: print(stats, file=sys.stderr))
+    print(importer.import_file(args.file))
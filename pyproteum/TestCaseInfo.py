@@ -1,19 +1,53 @@
-class TestCaseInfo:
-    """ Not implemented yet. """
-    def __init__(self):
-        self.not_executed_mutants = 0
-        self.alive_mutants = 0
-        self.dead_by_stdout = 0
-        self.dead_by_retcode = 0
-        self.dead_by_timeout = 0
-        self.dead_by_trap = 0
-        self.avoided_mutants = 0
-        self.dead_mutants = 0
-        self.enabled = True
-        self.cpu_exec_time = 0.0
-        self.total_exec_time = 0.0
-        self.retcode = 0
-        self.parameters = ""
-        self.input = ""
-        self.output = ""
-        self.stderr = ""
\ No newline at end of file
+from compat import string_types
+
+class TestCaseInfo(object):
+    """ Information about a test case, as found in ProteumIM's reports.
+        Uses __slots__ to keep each record small. For large collections of test cases
+        see TestCaseTable, which stores the same fields in columns.
+    """
+
+    __slots__ = ('number', 'not_executed_mutants', 'alive_mutants', 'dead_by_stdout',
+                 'dead_by_retcode', 'dead_by_timeout', 'dead_by_trap', 'avoided_mutants',
+                 'dead_mutants', 'enabled', 'cpu_exec_time', 'total_exec_time', 'retcode',
+                 'parameters', 'input', 'output', 'stderr', 'label')
+
+    # fields which may hold large payloads, kept as BlobRefs by store_payloads
+    payload_fields = ('input', 'output', 'stderr')
+
+    def __init__(self, number=0, not_executed_mutants=0, alive_mutants=0, dead_by_stdout=0,
+                 dead_by_retcode=0, dead_by_timeout=0, dead_by_trap=0, avoided_mutants=0,
+                 dead_mutants=0, enabled=True, cpu_exec_time=0.0, total_exec_time=0.0,
+                 retcode=0, parameters="", input="", output="", stderr="", label=""):
+        self.number = number
+        self.not_executed_mutants = not_executed_mutants
+        self.alive_mutants = alive_mutants
+        self.dead_by_stdout = dead_by_stdout
+        self.dead_by_retcode = dead_by_retcode
+        self.dead_by_timeout = dead_by_timeout
+        self.dead_by_trap = dead_by_trap
+        self.avoided_mutants = avoided_mutants
+        self.dead_mutants = dead_mutants
+        self.enabled = enabled
+        self.cpu_exec_time = cpu_exec_time
+        self.total_exec_time = total_exec_time
+        self.retcode = retcode
+        self.parameters = parameters
+        self.input = input
+        self.output = output
+        self.stderr = stderr
+        self.label = label
+
+    def store_payloads(self, store):
+        """ Move input, output and stderr to a BlobStore, keeping only BlobRefs (empty ones stay ""). """
+        for name in self.payload_fields:
+            value = getattr(self, name)
+            if isinstance(value, string_types) and value:
+                setattr(self, name, store.ref(value))
+        return self
+
+    def same_output(self, other):
+        """ True if two test cases (TestCaseInfo or TestCaseView) have the same return code,
+            output and stderr. Payloads in a BlobStore are compared by digest, without loading them.
+        """
+        return (self.retcode == other.retcode and self.output == other.output
+                and self.stderr == other.stderr)
@@ -0,0 +1,156 @@
+from array import array
+from TestCaseInfo import TestCaseInfo
+from compat import string_types
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# 64-bit integers ('q' is not available on Python 2, where 'l' has 64 bits on LP64 systems)
+try:
+    int_typecode = array('q').typecode
+except ValueError:
+    int_typecode = 'l'
+
+class TestCaseTable(object):
+    """ Columnar storage for a collection of test cases.
+        Counters and times are kept in typed arrays (one per field), text fields in lists.
+        Indexing the table returns a TestCaseView, which gives the same attribute access
+        as a TestCaseInfo, so code iterating over report.test_cases keeps working.
+
+        Aggregates (total, mean) run over the arrays without Python loops (on a temporary
+        zero-copy NumPy view when NumPy is installed); column() returns a copy of a column.
+    """
+
+    int_fields = ('number', 'not_executed_mutants', 'alive_mutants', 'dead_by_stdout',
+                  'dead_by_retcode', 'dead_by_timeout', 'dead_by_trap', 'avoided_mutants',
+                  'dead_mutants', 'retcode')
+    float_fields = ('cpu_exec_time', 'total_exec_time')
+    bool_fields = ('enabled',)
+    text_fields = ('parameters', 'input', 'output', 'stderr', 'label')
+
+    typecodes = dict([(name, int_typecode) for name in int_fields] +
+                     [(name, 'd') for name in float_fields] +
+                     [(name, 'b') for name in bool_fields])
+
+    def __init__(self, test_cases=()):
+        self.columns = {}
+        for name, typecode in self.typecodes.items():
+            self.columns[name] = array(typecode)
+        for name in self.text_fields:
+            self.columns[name] = []
+        self.extend(test_cases)
+
+    def append(self, tcase):
+        """ Add a test case (a TestCaseInfo, a TestCaseView or a dictionary of fields). """
+        get = tcase.get if isinstance(tcase, dict) else lambda name, default: getattr(tcase, name, default)
+        for name in TestCaseInfo.__slots__:
+            self.columns[name].append(get(name, self.default(name)))
+
+    def extend(self, test_cases):
+        for tcase in test_cases:
+            self.append(tcase)
+
+    def copy(self):
+        table = TestCaseTable()
+        for name, column in self.columns.items():
+            table.columns[name] = column[:]
+        return table
+
+    def default(self, name):
+        if name in self.text_fields:
+            return ""
+        if name in self.bool_fields:
+            return True
+        if name in self.float_fields:
+            return 0.0
+        return 0
+
+    def __len__(self):
+        return len(self.columns['number'])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [TestCaseView(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('test case index out of range')
+        return TestCaseView(self, index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield TestCaseView(self, index)
+
+    def store_payloads(self, store):
+        """ Keep input, output and stderr of every test case in a BlobStore (see TestCaseInfo.store_payloads). """
+        for name in TestCaseInfo.payload_fields:
+            column = self.columns[name]
+            for index, value in enumerate(column):
+                if isinstance(value, string_types) and value:
+                    column[index] = store.ref(value)
+
+    def get(self, index, name):
+        value = self.columns[name][index]
+        return bool(value) if name in self.bool_fields else value
+
+    def set(self, index, name, value):
+        self.columns[name][index] = value
+
+    def record(self, index):
+        """ A standalone TestCaseInfo copy of a test case. """
+        return TestCaseInfo(**dict((name, self.get(index, name)) for name in TestCaseInfo.__slots__))
+
+    def column(self, name):
+        """ A copy of the column of a field: a NumPy array for numeric fields when NumPy is
+            available, a typed array (or a list, for text fields) otherwise.
+            It is a copy because a view of the array would make every later append fail
+            (BufferError) while the view is alive.
+        """
+        column = self.columns[name]
+        if name not in self.typecodes:
+            return list(column)
+        if numpy is not None:
+            return numpy.array(column, dtype=column.typecode)
+        return array(column.typecode, column)
+
+    def total(self, name):
+        column = self.columns[name]
+        if numpy is not None and len(column):
+            # temporary zero-copy view, released before returning
+            return numpy.frombuffer(column, dtype=column.typecode).sum().item()
+        return sum(column)
+
+    def mean(self, name):
+        if not len(self):
+            return 0.0
+        return self.total(name) / float(len(self))
+
+    @property
+    def total_dead_mutants(self):
+        return self.total('dead_mutants')
+
+    @property
+    def mean_exec_time(self):
+        return self.mean('cpu_exec_time')
+
+class TestCaseView(object):
+    """ A row of a TestCaseTable, with the attributes of a TestCaseInfo. """
+
+    __slots__ = ('table', 'index')
+
+    def __init__(self, table, index):
+        object.__setattr__(self, 'table', table)
+        object.__setattr__(self, 'index', index)
+
+    def __getattr__(self, name):
+        try:
+            return self.table.get(self.index, name)
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        if name not in self.table.columns:
+            raise AttributeError(name)
+        self.table.set(self.index, name, value)
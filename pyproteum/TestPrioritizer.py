@@ -0,0 +1,145 @@
+import json, os, random
+from KillMatrix import popcount
+
+class TestPrioritizer(object):
+    """ Kill-history-driven test case prioritization
+        Records, across runs, how many mutants each test case killed, how many mutants it
+        executed and its cost (cpu_exec_time). Test cases are then ordered by kills per
+        execution divided by cost, so cheap test cases killing many mutants come first.
+
+        In test mode, a mutant is no longer executed once some test case kills it, so running
+        good test cases first avoids executions. ProteumIM always runs the enabled test cases
+        in numeric (or seed) order, so the order is enforced by running exemuta -exec in tiers:
+        only the test cases of the first tier are enabled, then the next tier is enabled
+        and the mutants still alive are executed again, and so on.
+
+        The history is stored in a small JSON file next to the session.
+    """
+
+    def __init__(self, proteum, D="", session=None):
+        self.proteum = proteum
+        self.D = D
+        self.session = session if session is not None else proteum.session
+        self.history = {}
+        self.load()
+
+    def path(self):
+        return os.path.join(self.D if self.D else ".", ".%s.history" % self.session)
+
+    def load(self):
+        if os.path.isfile(self.path()):
+            with open(self.path()) as f:
+                self.history = dict((int(test), entry) for test, entry in json.load(f).items())
+
+    def save(self):
+        tmp = self.path() + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(dict((str(test), entry) for test, entry in self.history.items()), f)
+        os.rename(tmp, self.path())
+
+    def record(self, report, before=None):
+        """ Add the results of a run (a loaded ProteumReport) to the history.
+            The dead and alive counts of a report are cumulative over every run of the session,
+            so only the difference from before (the report taken just before the run) is added.
+        """
+        previous = dict((tcase.number, tcase) for tcase in before.test_cases) if before is not None else {}
+        for tcase in report.test_cases:
+            entry = self.history.setdefault(tcase.number,
+                {'runs': 0, 'kills': 0, 'executions': 0, 'cpu_time': 0.0})
+            old = previous.get(tcase.number)
+            kills = tcase.dead_mutants - (old.dead_mutants if old is not None else 0)
+            executed = tcase.dead_mutants + tcase.alive_mutants
+            if old is not None:
+                executed -= old.dead_mutants + old.alive_mutants
+            entry['runs'] += 1
+            entry['kills'] += max(kills, 0)
+            entry['executions'] += max(executed, 0)
+            entry['cpu_time'] += tcase.cpu_exec_time
+        self.save()
+
+    def priority(self, test, default=0.0):
+        """ Kills per execution per second of cpu time (default for test cases without history). """
+        entry = self.history.get(test)
+        if entry is None or entry['runs'] == 0:
+            return default
+        kill_rate = entry['kills'] / float(entry['executions']) if entry['executions'] else 0.0
+        cost = entry['cpu_time'] / entry['runs']
+        return kill_rate / max(cost, 1e-6)
+
+    def order(self, tests):
+        """ Test case numbers sorted by priority (highest first, ties by number).
+            Test cases without history get the average priority, so they are neither
+            starved nor favored.
+        """
+        known = [self.priority(test) for test in self.history if self.history[test]['runs']]
+        default = sum(known) / len(known) if known else 0.0
+        priorities = dict((test, self.priority(test, default)) for test in tests)
+        return sorted(tests, key=lambda test: (-priorities[test], test))
+
+    @staticmethod
+    def check(result, command, session):
+        if result is None or not result.ok:
+            raise RuntimeError('%s failed for session %s: %s' % (command, session,
+                result.stderr.strip() if result is not None else 'no result'))
+
+    def tiers(self, tests, count):
+        order = self.order(tests)
+        size = max(1, (len(order) + count - 1) // count)
+        return [order[i:i + size] for i in range(0, len(order), size)]
+
+    def run(self, tests, tiers=4, **exec_args):
+        """ Execute the mutants in test mode with the test cases in priority order.
+            Arguments:
+            tests: numbers of the test cases to use (they are left enabled at the end)
+            tiers: in how many groups the ordered test cases are split (each one is an exemuta -exec)
+            exec_args: other arguments passed to Proteum.exemuta_exec
+            Returns the loaded ProteumReport of the run, whose kills are also added to the history.
+            Raises RuntimeError if a tcase or exemuta command fails.
+        """
+        before = self.proteum.report(D=self.D, session=self.session)
+        x = " ".join(str(test) for test in sorted(tests))
+        self.check(self.proteum.tcase_disable(x=x, D=self.D, session=self.session), 'tcase', self.session)
+        for tier in self.tiers(tests, tiers):
+            self.check(self.proteum.tcase_enable(x=" ".join(str(test) for test in sorted(tier)),
+                                                 D=self.D, session=self.session), 'tcase', self.session)
+            self.check(self.proteum.exemuta_exec(D=self.D, session=self.session, **exec_args),
+                       'exemuta -exec', self.session)
+
+        report = self.proteum.report(D=self.D, session=self.session)
+        self.record(report, before)
+        return report
+
+    @staticmethod
+    def executions(matrix, order, costs=None):
+        """ Mutant executions (and their cost) needed in test mode to run a test order, using
+            the kills of a KillMatrix. Returns (executions, cost).
+        """
+        alive = matrix.considered
+        executions = 0
+        cost = 0.0
+        for test in order:
+            count = popcount(alive)
+            executions += count
+            if costs:
+                cost += count * costs.get(test, 0.0)
+            alive &= ~matrix.cols[matrix.test_index[test]]
+            if not alive:
+                break
+        return executions, cost
+
+    def savings(self, matrix, seed=0):
+        """ Compare the priority order with the numeric order and a seed-shuffled one.
+            Returns a dictionary with the executions of each order and the executions saved.
+        """
+        costs = dict((test, entry['cpu_time'] / entry['runs'])
+                     for test, entry in self.history.items() if entry['runs'])
+        numeric = sorted(matrix.tests)
+        shuffled = list(numeric)
+        random.Random(seed).shuffle(shuffled)
+
+        results = {}
+        for name, order in (('priority', self.order(numeric)), ('numeric', numeric), ('seed', shuffled)):
+            results[name], results[name + '_cost'] = self.executions(matrix, order, costs)
+        results['saved_vs_numeric'] = results['numeric'] - results['priority']
+        results['saved_vs_seed'] = results['seed'] - results['priority']
+        return results
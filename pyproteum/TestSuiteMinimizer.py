@@ -0,0 +1,141 @@
+import heapq, json
+from KillMatrix import KillMatrix, popcount
+
+class Minimization(object):
+    """ Result of a test suite minimization.
+        Attributes:
+        tests: test cases considered
+        selected: test cases kept, in the order they were chosen
+        killed: mutants killed by the selected test cases (the same killed by all of them)
+    """
+
+    def __init__(self, tests, selected, killed):
+        self.tests = list(tests)
+        self.selected = list(selected)
+        self.killed = killed
+
+    @property
+    def removed(self):
+        selected = set(self.selected)
+        return [test for test in self.tests if test not in selected]
+
+    @property
+    def reduction(self):
+        """ Fraction of the test cases removed. """
+        return 1.0 - len(self.selected) / float(len(self.tests)) if self.tests else 0.0
+
+    def __repr__(self):
+        return "Minimization(%d of %d test cases kept, %.1f%% smaller, %d mutants killed)" % (
+            len(self.selected), len(self.tests), 100 * self.reduction, self.killed)
+
+class TestSuiteMinimizer(object):
+    """ Test suite minimization
+        Finds a small subset of test cases killing the same mutants as the whole test set, with
+        the greedy set cover algorithm over the bitsets of a KillMatrix: test cases are chosen by
+        how many mutants they kill that are not killed yet (lazily re-evaluated from a heap, since
+        that number only decreases), and test cases made redundant by later choices are removed.
+
+        The result can be applied to the session (every other test case of the session is
+        disabled, including those killing no mutant, see apply) or
+        exported as a new test set (see export), and later exemuta -exec runs do proportionally
+        less work. The kill matrix should come from a session executed in research mode.
+    """
+
+    def __init__(self, proteum, D="", session=None, matrix=None):
+        """ Arguments:
+            proteum: Proteum object used to run the commands
+            D: directory where the session is located (default is ".")
+            matrix: KillMatrix of the session (default is loaded from 'muta -l')
+        """
+        self.proteum = proteum
+        self.D = D
+        self.session = session if session is not None else proteum.session
+        self.matrix = matrix if matrix is not None else KillMatrix.load(proteum, D, self.session)
+
+    def minimize(self, tests=None, costs=None):
+        """ Minimize a set of test cases (default is every test case of the kill matrix).
+            costs: optional dictionary {test: cost}; test cases killing more mutants per cost are preferred
+            Returns a Minimization.
+        """
+        matrix = self.matrix
+        tests = list(matrix.tests if tests is None else tests)
+        cols = dict((test, matrix.cols[matrix.test_index[test]] & matrix.considered) for test in tests)
+        cost = lambda test: float(costs.get(test, 1.0)) if costs else 1.0
+        universe = 0
+        for col in cols.values():
+            universe |= col
+
+        heap = [(-popcount(cols[test]) / cost(test), index, test) for index, test in enumerate(tests) if cols[test]]
+        heapq.heapify(heap)
+        uncovered = universe
+        selected = []
+        while uncovered and heap:
+            _, index, test = heapq.heappop(heap)
+            current = -popcount(cols[test] & uncovered) / cost(test)
+            if current == 0:
+                continue
+            if heap and current > heap[0][0]:
+                heapq.heappush(heap, (current, index, test))
+                continue
+            selected.append(test)
+            uncovered &= ~cols[test]
+
+        # drop test cases whose mutants are all killed by the other selected ones
+        for test in reversed(list(selected)):
+            others = 0
+            for other in selected:
+                if other != test:
+                    others |= cols[other]
+            if others & universe == universe:
+                selected.remove(test)
+
+        return Minimization(tests, selected, popcount(universe))
+
+    @staticmethod
+    def ranges(numbers):
+        """ Consecutive numbers as a list of (first, last) ranges. """
+        ranges = []
+        for number in sorted(numbers):
+            if ranges and ranges[-1][1] == number - 1:
+                ranges[-1] = (ranges[-1][0], number)
+            else:
+                ranges.append((number, number))
+        return ranges
+
+    def toggle(self, command, numbers):
+        # '-f 0' and '-t 0' mean "not given", so ranges from 0 and single test cases go in -x
+        x = []
+        for first, last in self.ranges(numbers):
+            if first > 0 and last > first:
+                command(f=first, t=last, D=self.D, session=self.session)
+            else:
+                x.extend(range(first, last + 1))
+        if x:
+            command(x=" ".join(str(number) for number in x), D=self.D, session=self.session)
+
+    def session_tests(self):
+        """ Numbers of every test case of the session. """
+        report = self.proteum.report(D=self.D, session=self.session)
+        return [test.number for test in report.test_cases]
+
+    def apply(self, minimization):
+        """ Keep only the selected test cases enabled in the session: every other test case of
+            the session is disabled, even one left out of the minimization.
+        """
+        selected = set(minimization.selected)
+        self.toggle(self.proteum.tcase_enable, minimization.selected)
+        self.toggle(self.proteum.tcase_disable, [test for test in self.session_tests() if test not in selected])
+
+    def export(self, minimization, path, report=None):
+        """ Write the selected test cases to a .jsonl file, which can be imported in another session
+            with TestCaseImporter. report: loaded ProteumReport with the test cases (default runs report).
+        """
+        if report is None:
+            report = self.proteum.report(D=self.D, session=self.session)
+        selected = set(minimization.selected)
+        with open(path, 'w') as f:
+            for test in report.test_cases:
+                if test.number in selected:
+                    f.write(json.dumps({'parameters': test.parameters, 'stdin': str(test.input),
+                        'label': 'tc%d' % test.number}) + '\n')
+        return path
@@ -1,6 +1,37 @@
 """ proteum_adapter package
     Author: Geraldo B. Landre (geraldo@facom.ufms.br)
+
+    The asyncio modules (AsyncProteum, ExecutionProgress) need Python 3 and are not
+    imported here, so the package still imports on Python 2.
 """
 from Proteum import Proteum
 from ProteumReport import ProteumReport
 from TestCaseInfo import TestCaseInfo
+from TestCaseTable import TestCaseTable, TestCaseView
+from SessionWorkspace import SessionWorkspace
+from ParallelExecutor import ParallelExecutor
+from CommandRunner import CommandRunner, CommandResult
+from ReportParser import ReportParser, ReportRecord
+from MutantList import MutantList, MutantInfo
+from KillMatrix import KillMatrix
+from ReportCache import ReportCache
+from IncrementalRunner import IncrementalRunner, IncrementalPlan
+from TestPrioritizer import TestPrioritizer
+from ExecutionCoordinator import ExecutionCoordinator
+from ExecutionWorker import ExecutionWorker
+from MutantCompiler import MutantCompiler
+from ExecutionPipeline import ExecutionPipeline, StageMetrics
+from TestCaseImporter import TestCaseImporter, ImportStats
+from Profiler import Profiler, InvocationRecord, MemorySink, JsonlSink, PrometheusTextfileSink
+from CheckpointedExecutor import CheckpointedExecutor
+from SessionScheduler import SessionScheduler, SessionSpec, SessionResult
+from ResourceLimiter import ResourceLimiter, Baseline
+from TestSuiteMinimizer import TestSuiteMinimizer, Minimization
+from MutantSubsumption import MutantSubsumption, Subsumption
+from AdaptiveSampler import AdaptiveSampler, ScoreEstimate
+from ProteumDaemon import ProteumDaemon
+from ProteumClient import ProteumClient
+from StagedSession import StagedSession
+from MutantIndex import MutantIndex
+from ReportAggregator import ReportAggregator, ReportTable
+from BlobStore import BlobStore, BlobRef
@@ -0,0 +1,22 @@
+""" Helpers for the code that runs on both Python 2 and Python 3. """
+import multiprocessing
+
+try:
+    string_types = (str, unicode)
+except NameError:
+    string_types = (str,)
+
+def cpu_count():
+    """ Number of cpus (os.cpu_count is Python 3 only), 1 when it is unknown. """
+    try:
+        return multiprocessing.cpu_count()
+    except NotImplementedError:
+        return 1
+
+def int_to_bytes(value, length):
+    """ Little-endian bytes of a non-negative integer (int.to_bytes is Python 3 only). """
+    data = bytearray(length)
+    for i in range(length):
+        data[i] = value & 0xff
+        value >>= 8
+    return bytes(data)
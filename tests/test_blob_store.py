@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+import os, shutil, sys, tempfile, unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pyproteum'))
+
+from BlobStore import BlobStore, BlobRef
+from ProteumReport import ProteumReport
+import BlobStore as store_module
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'session.lst')
+
+class BlobStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def codec(self, store, digest):
+        with open(store.path(digest), 'rb') as f:
+            return f.read(1)
+
+    def check_round_trip(self, compression):
+        store = BlobStore(os.path.join(self.directory, str(compression)), compression)
+        output = u'February 2020 — Su Mo Tu We Th Fr Sa\n' * 50
+        digest = store.put(output)
+        self.assertEqual(store.text(digest), output)
+        self.assertEqual(store.get(store.put(b'\x00\xff' * 40)), b'\x00\xff' * 40)
+        self.assertEqual(store.text(store.put(u'é')), u'é')
+        self.assertIn(digest, store)
+        if compression:
+            self.assertLess(os.path.getsize(store.path(digest)), len(output.encode('utf-8')))
+        return store, digest
+
+    def test_zlib(self):
+        store, digest = self.check_round_trip('zlib')
+        self.assertEqual(self.codec(store, digest), b'z')
+        # small payloads are not compressed
+        self.assertEqual(self.codec(store, store.put('2020')), b'n')
+
+    def test_no_compression(self):
+        store, digest = self.check_round_trip(None)
+        self.assertEqual(self.codec(store, digest), b'n')
+
+    @unittest.skipUnless(store_module.lzma, 'lzma is not available')
+    def test_lzma(self):
+        store, digest = self.check_round_trip('lzma')
+        self.assertEqual(self.codec(store, digest), b'x')
+
+    def test_lzma_missing(self):
+        lzma = store_module.lzma
+        store_module.lzma = None
+        try:
+            self.assertRaises(ImportError, BlobStore, self.directory, 'lzma')
+        finally:
+            store_module.lzma = lzma
+
+    def test_incompressible_payloads_are_kept_as_they_are(self):
+        store = BlobStore(self.directory)
+        data = os.urandom(4096)
+        digest = store.put(data)
+        self.assertEqual(self.codec(store, digest), b'n')
+        self.assertEqual(store.get(digest), data)
+
+    def test_deduplication(self):
+        store = BlobStore(self.directory)
+        refs = [store.ref('February 2020\n' * 10) for _ in range(5)] + [store.ref('March 2020\n' * 10)]
+        self.assertEqual(len(set(refs)), 2)
+        stats = store.stats()
+        self.assertEqual((stats['stored'], stats['deduplicated'], stats['blobs']), (2, 4, 2))
+        self.assertEqual(refs[0], refs[1])
+        self.assertNotEqual(refs[0], refs[-1])
+        self.assertEqual(refs[0], 'February 2020\n' * 10)
+        self.assertNotEqual(refs[0], 'February 2021\n')
+        self.assertEqual(str(refs[-1]), 'March 2020\n' * 10)
+        # another store on the same directory finds the blobs
+        self.assertEqual(BlobRef(BlobStore(self.directory), refs[0].digest).text, 'February 2020\n' * 10)
+
+    def test_report_payloads(self):
+        store = BlobStore(self.directory)
+        report = ProteumReport(FIXTURE)
+        report.set_blob_store(store)
+        report.load()
+        first, second, third = report.test_cases
+        self.assertIsInstance(first.output, BlobRef)
+        self.assertEqual(first.output.text, 'February 2020')
+        self.assertEqual(first.input, '')
+        self.assertEqual(second.stderr.text, 'cal: 13 is neither a month number (1..12) nor a name')
+        # third has the same input and output: one blob
+        self.assertEqual(third.input, third.output)
+        self.assertEqual(store.stats()['deduplicated'], 1)
+        self.assertTrue(report.test_cases.record(0).same_output(first))
+        self.assertFalse(report.test_cases.record(0).same_output(third))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+import os, sys, unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pyproteum'))
+
+from CommandRunner import CommandRunner
+
+class CommandRunnerTest(unittest.TestCase):
+
+    def test_characters_split_between_chunks(self):
+        runner = CommandRunner()
+        # 3-byte reads split every other 2-byte character of the output
+        runner.chunk_size = 3
+        chunks = []
+        script = "import sys; getattr(sys.stdout, 'buffer', sys.stdout).write(u'\\u00e9'.encode('utf-8') * 11)"
+        result = runner.run([sys.executable, '-c', script], on_stdout=chunks.append)
+        self.assertTrue(result.ok)
+        self.assertEqual(result.stdout, u'é' * 11)
+        self.assertEqual(u''.join(chunks), result.stdout)
+
+    def test_invalid_bytes_are_replaced(self):
+        script = "import sys; getattr(sys.stdout, 'buffer', sys.stdout).write(b'a\\xffb\\xc3')"
+        result = CommandRunner().run([sys.executable, '-c', script])
+        self.assertEqual(result.stdout, u'a�b�')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os, sys, unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pyproteum'))
+
+from MutantList import MutantInfo
+from KillMatrix import KillMatrix, popcount
+import KillMatrix as matrix_module
+
+def mutants():
+    """ Mutants 10-16 of a session with test cases 1-4 (4 kills nothing). """
+    return [
+        MutantInfo(10, 'u-OAAA', status='dead', killed_by=[1, 2]),
+        MutantInfo(11, 'u-OAAA', status='dead', killed_by=[1]),
+        MutantInfo(12, 'u-OAAN', status='dead', killed_by=[2, 3]),
+        MutantInfo(13, 'u-ORRN', status='dead', killed_by=[1, 2, 3]),
+        MutantInfo(14, 'u-ORRN'),
+        MutantInfo(15, 'u-ORRN', status='equivalent'),
+        MutantInfo(16, 'u-OAAN', status='dead', active=False, killed_by=[1]),
+    ]
+
+class KillMatrixTest(unittest.TestCase):
+
+    def setUp(self):
+        self.matrix = KillMatrix(mutants(), [1, 2, 3, 4])
+
+    def test_bitsets(self):
+        matrix = self.matrix
+        self.assertEqual(matrix.rows[:5], [0b011, 0b001, 0b110, 0b111, 0])
+        self.assertEqual(matrix.cols, [0b1001011, 0b0001101, 0b0001100, 0])
+        self.assertEqual(matrix.numbers(matrix.considered), [10, 11, 12, 13, 14])
+        self.assertEqual(matrix.numbers(matrix.mutant_mask([16, 12])), [12, 16])
+        self.assertEqual(popcount(matrix.killed()), 5)
+        self.assertEqual(KillMatrix(mutants()).tests, [1, 2, 3])
+
+    def test_kills_and_killers(self):
+        matrix = self.matrix
+        # inactive and equivalent mutants are left out of the kills
+        self.assertEqual(matrix.kills(1), [10, 11, 13])
+        self.assertEqual(matrix.kills(4), [])
+        self.assertEqual(matrix.killers(13), [1, 2, 3])
+        self.assertEqual(matrix.killers(16), [1])
+        self.assertEqual(matrix.killers(14), [])
+
+    def test_scores(self):
+        matrix = self.matrix
+        self.assertAlmostEqual(matrix.score(), 0.8)
+        self.assertAlmostEqual(matrix.score([1]), 0.6)
+        self.assertAlmostEqual(matrix.score([3], [12, 13, 14]), 2 / 3.0)
+        self.assertEqual(matrix.score([4], [15, 16]), 0.0)
+        self.assertEqual(matrix.score_by_operator([1]), {'u-OAAA': 1.0, 'u-OAAN': 0.0, 'u-ORRN': 0.5})
+        self.assertEqual(matrix.score_by_operator(preffix='u-OAA'), {'u-OAAA': 1.0, 'u-OAAN': 1.0})
+        self.assertEqual(matrix.score_by_group(['u-OAA', 'u-ORR', 'u-S']), {'u-OAA': 1.0, 'u-ORR': 0.5})
+
+    @unittest.skipUnless(matrix_module.numpy, 'NumPy is not installed')
+    def test_as_numpy(self):
+        array = self.matrix.as_numpy()
+        self.assertEqual(array.shape, (7, 1))
+        unpacked = matrix_module.numpy.unpackbits(array, axis=1, bitorder='little')[:, :4]
+        self.assertEqual(unpacked[3].tolist(), [1, 1, 1, 0])
+        self.assertEqual(unpacked[2].tolist(), [0, 1, 1, 0])
+
+    def test_as_numpy_without_numpy(self):
+        numpy = matrix_module.numpy
+        matrix_module.numpy = None
+        try:
+            self.assertRaises(ImportError, self.matrix.as_numpy)
+        finally:
+            matrix_module.numpy = numpy
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import os, shutil, sys, tempfile, unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pyproteum'))
+
+from MutantList import MutantInfo
+from MutantIndex import MutantIndex
+import MutantIndex as index_module
+
+MUTANTS = [
+    MutantInfo(1, 'u-SSDL', 'main', 'alive'),
+    MutantInfo(2, 'u-SSDL', 'main', 'dead', 'stdout', killed_by=[3, 1]),
+    MutantInfo(4, 'u-OAAA', 'jan1', 'dead', 'trap', active=False, killed_by=[2]),
+    MutantInfo(5, 'u-OAAA', 'main', 'equivalent'),
+    MutantInfo(6, 'u-ORRN', 'jan1', 'alive'),
+]
+
+class MutantIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = MutantIndex.write(os.path.join(self.directory, 's.midx'), MUTANTS)
+        self.index = MutantIndex(self.path)
+        self.numpy = index_module.numpy
+
+    def tearDown(self):
+        index_module.numpy = self.numpy
+        self.index.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_records(self):
+        index = self.index
+        self.assertEqual(len(index), 7)
+        self.assertEqual(os.listdir(self.directory), ['s.midx'])
+        mutant = index[2]
+        self.assertEqual((mutant.number, mutant.operator, mutant.unit, mutant.status, mutant.cause),
+                         (2, 'u-SSDL', 'main', 'dead', 'stdout'))
+        self.assertEqual(mutant.killed_by, [1])
+        self.assertFalse(index[4].active)
+        self.assertEqual(index[6].killed_by, [])
+        self.assertEqual([index.status(number) for number in range(7)],
+                         [None, 'alive', 'dead', None, 'dead', 'equivalent', 'alive'])
+        self.assertRaises(KeyError, index.__getitem__, 3)
+        self.assertRaises(IndexError, index.raw, 7)
+
+    def test_not_an_index(self):
+        path = os.path.join(self.directory, 'other')
+        with open(path, 'wb') as f:
+            f.write(b'\0' * 64)
+        self.assertRaises(ValueError, MutantIndex, path)
+
+    def check_select(self):
+        index = self.index
+        self.assertEqual(index.select(), [1, 2, 4, 5, 6])
+        self.assertEqual(index.select(status='alive'), [1, 6])
+        self.assertEqual(index.select(status='dead', operator='u-SSDL'), [2])
+        self.assertEqual(index.select(operator=['u-OAAA', 'u-ORRN', 'u-STRP']), [4, 5, 6])
+        self.assertEqual(index.select(operator='u-STRP'), [])
+        self.assertEqual(index.select(cause='trap', active=False), [4])
+        self.assertEqual(index.select(unit='jan1', active=True), [6])
+        self.assertEqual(index.select(unit='other'), [])
+        self.assertEqual(index.counts(), {'alive': 2, 'dead': 2, 'equivalent': 1, 'anomalous': 0})
+        self.assertEqual(index.counts('operator'), {'u-SSDL': 2, 'u-OAAA': 2, 'u-ORRN': 1})
+
+    @unittest.skipUnless(index_module.numpy, 'NumPy is not installed')
+    def test_select_with_numpy(self):
+        self.check_select()
+        records = self.index.as_numpy()
+        self.assertEqual(records['killer'].tolist(), [-1, -1, 1, -1, 2, -1, -1])
+        del records
+
+    def test_select_without_numpy(self):
+        index_module.numpy = None
+        self.check_select()
+        self.assertRaises(ImportError, self.index.as_numpy)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import os, sys, unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pyproteum'))
+
+from MutantList import MutantInfo
+from KillMatrix import KillMatrix
+from MutantSubsumption import MutantSubsumption
+
+class FakeProteum(object):
+    """ Records the selection commands. """
+    session = 's'
+
+    def __init__(self):
+        self.calls = []
+
+    def exemuta_select(self, filters, x="", D="", session=None):
+        self.calls.append(('select', x, session))
+
+    def exemuta_inactivate(self, mutants, D="", session=None):
+        self.calls.append(('inactivate', list(mutants), session))
+
+class MutantSubsumptionTest(unittest.TestCase):
+
+    def setUp(self):
+        mutants = [
+            MutantInfo(10, 'u-OAAA', status='dead', killed_by=[1, 2]),
+            MutantInfo(11, 'u-OAAA', status='dead', killed_by=[1]),
+            MutantInfo(12, 'u-OAAN', status='dead', killed_by=[2, 3]),
+            MutantInfo(13, 'u-ORRN', status='dead', killed_by=[1, 2, 3]),
+            MutantInfo(14, 'u-ORRN'),
+            MutantInfo(15, 'u-ORRN', status='equivalent'),
+            MutantInfo(16, 'u-OAAN', status='dead', active=False, killed_by=[1]),
+            MutantInfo(17, 'u-ORRN', status='dead', killed_by=[1]),
+        ]
+        self.proteum = FakeProteum()
+        self.subsumption = MutantSubsumption(self.proteum, matrix=KillMatrix(mutants, [1, 2, 3]))
+
+    def test_dominators(self):
+        result = self.subsumption.analyze(samples=0)
+        # 11 and 17 are killed by the same test case; {1} and {2, 3} are not subsumed by each other
+        self.assertEqual(result.dominators, [11, 12])
+        self.assertEqual(result.subsumed, [10, 13, 17])
+        self.assertEqual(result.alive, [14])
+        self.assertEqual(result.kept, [11, 12, 14])
+        self.assertEqual(result.total, 6)
+        self.assertAlmostEqual(result.remaining, 0.5)
+        self.assertIsNone(result.drift)
+
+    def test_drift(self):
+        matrix = self.subsumption.matrix
+        result = self.subsumption.analyze(samples=20, seed=1)
+        self.assertEqual(result.drift, self.subsumption.drift(result.kept, 20, seed=1))
+        self.assertTrue(0.0 <= result.drift <= 1.0)
+        self.assertEqual(self.subsumption.drift(matrix.numbers(matrix.considered)), 0.0)
+
+    def test_subsumed_mutants_have_a_dominator(self):
+        matrix = self.subsumption.matrix
+        result = self.subsumption.analyze(samples=0)
+        # a test case killing the dominator also kills the subsumed mutant
+        for number in result.subsumed:
+            self.assertTrue(any(set(matrix.killers(dominator)) <= set(matrix.killers(number))
+                                for dominator in result.dominators), number)
+        for dominator in result.dominators:
+            self.assertFalse(any(set(matrix.killers(other)) < set(matrix.killers(dominator))
+                                 for other in result.dominators), dominator)
+
+    def test_apply(self):
+        result = self.subsumption.analyze(samples=0)
+        self.subsumption.apply(result)
+        self.subsumption.apply(result, inactivate=True)
+        self.assertEqual(self.proteum.calls, [('select', '11 12 14', 's'), ('inactivate', [10, 13, 17], 's')])
+
+if __name__ == '__main__':
+    unittest.main()
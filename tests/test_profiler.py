@@ -0,0 +1,34 @@
+import os, shutil, sys, tempfile, unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pyproteum'))
+
+from Profiler import Profiler, MemorySink, PrometheusTextfileSink, InvocationRecord
+
+class ProfilerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_prometheus_labels_are_escaped(self):
+        path = os.path.join(self.directory, 'proteum.prom')
+        sink = PrometheusTextfileSink(path, prefix='test_')
+        sink.write(InvocationRecord('exemuta -exec', wall=1.5, session='a "b"\\c\nd'))
+        with open(path) as f:
+            lines = f.read().splitlines()
+        self.assertIn('test_wall_seconds_total{command="exemuta -exec",session="a \\"b\\"\\\\c\\nd"} 1.5', lines)
+        self.assertEqual(len([line for line in lines if not line.startswith('#')]), len(sink.metrics))
+
+    def test_blocks_have_no_max_rss(self):
+        sink = MemorySink()
+        profiler = Profiler([sink])
+        with profiler.profile('step', session='cal'):
+            pass
+        record, = sink.records
+        self.assertEqual((record.command, record.session, record.returncode), ('step', 'cal', 0))
+        self.assertIsNone(record.max_rss)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import os, shutil, sys, tempfile, unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pyproteum'))
+
+from Proteum import Proteum
+from CommandRunner import CommandResult
+from ProteumDaemon import ProteumDaemon
+from ProteumClient import ProteumClient
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'session.lst')
+
+class FakeProteum(Proteum):
+    """ Proteum recording its commands instead of running them; report copies the fixture report. """
+
+    def __init__(self):
+        Proteum.__init__(self)
+        self.commands = []
+
+    def exec_command(self, command, session=None, of=None, input=None, on_output=None, on_start=None,
+                     preexec_fn=None):
+        argv = self.command_argv(command, session or self.session)
+        self.commands.append(argv)
+        if argv[0] == 'report':
+            shutil.copyfile(FIXTURE, os.path.join(argv[argv.index('-D') + 1], argv[-1] + '.lst'))
+        return CommandResult(argv, 0, 'done', '', 0.0, 0.0)
+
+class ProteumDaemonTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.sockets = tempfile.mkdtemp()
+        self.address = os.path.join(self.sockets, 'daemon')
+        self.proteum = FakeProteum()
+        self.daemon = None
+        self.client = None
+
+    def tearDown(self):
+        if self.client is not None:
+            self.client.close()
+        if self.daemon is not None:
+            self.daemon.stop()
+        shutil.rmtree(self.directory, ignore_errors=True)
+        shutil.rmtree(self.sockets, ignore_errors=True)
+
+    def start(self, token=None, client_token=None):
+        self.daemon = ProteumDaemon(self.proteum, token=token)
+        self.daemon.start(self.address)
+        self.client = ProteumClient(self.address, session='s', token=client_token)
+        return self.client
+
+    def test_call(self):
+        client = self.start()
+        result = client.exemuta_exec(D=self.directory, f=3, t=7)
+        self.assertTrue(result.ok)
+        self.assertEqual(result.stdout, 'done')
+        self.assertEqual(self.proteum.commands[-1],
+                         ['exemuta', '-exec', '-trace', '-D', self.directory, '-f', '3', '-t', '7', 's'])
+
+    def test_report(self):
+        client = self.start()
+        report = client.report(True, self.directory, 'cal.c', 'main')
+        self.assertEqual(self.proteum.commands[-1],
+                         ['report', '-trace', '-D', self.directory, '-S', 'cal.c', '-L', 'main', 's'])
+        self.assertEqual(report.total_mutants, 40)
+        self.assertEqual(report.ordered_op_keys, ['u-OAAA', 'u-OAAN', 'u-ORRN'])
+        self.assertEqual([test.number for test in report.test_cases], [1, 2, 3])
+        self.assertEqual(report.test_cases[0].output, 'February 2020')
+
+        header = client.report(D=self.directory, test_cases=False)
+        self.assertEqual(self.proteum.commands[-1], ['report', '-tcase', '-D', self.directory, 's'])
+        self.assertEqual(header.mutation_score, report.mutation_score)
+        self.assertEqual(len(header.test_cases), 0)
+
+    def test_report_is_cached(self):
+        client = self.start()
+        client.report(D=self.directory)
+        client.report(D=self.directory)
+        self.assertEqual(len(self.proteum.commands), 1)
+        self.assertEqual(client.stats()['cache']['hits'], 1)
+
+    def test_token(self):
+        client = self.start(token='secret', client_token='secret')
+        self.assertTrue(client.exemuta_update(D=self.directory).ok)
+
+    def test_missing_token(self):
+        client = self.start(token='secret')
+        self.assertRaises(RuntimeError, client.exemuta_update, D=self.directory)
+        self.assertRaises(RuntimeError, client.report, D=self.directory)
+        self.assertEqual(self.proteum.commands, [])
+
+    def test_wrong_token(self):
+        client = self.start(token='secret', client_token='guess')
+        self.assertRaises(RuntimeError, client.stats)
+
+    def test_tcp_needs_a_token(self):
+        daemon = ProteumDaemon(self.proteum)
+        self.assertRaises(ValueError, daemon.start, 'localhost:0')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import os, shutil, sys, tempfile, unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pyproteum'))
+
+from ReportAggregator import ReportAggregator, summarize
+import ReportAggregator as aggregator_module
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'session.lst')
+
+class ReportAggregatorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        with open(FIXTURE) as f:
+            text = f.read()
+        self.write(os.path.join('a', 's1.lst'), text)
+        self.write(os.path.join('b', 'c', 's2.lst'), text.replace('TOTAL MUTANTS: 40', 'TOTAL MUTANTS: 50')
+                   .replace('u-ORRN              20', 'u-SSDL               5'))
+        self.write(os.path.join('b', 'broken.lst'), 'not a report\n')
+        self.write(os.path.join('b', 'notes.txt'), text)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def write(self, name, text):
+        path = os.path.join(self.directory, name)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def path(self, *names):
+        return os.path.join(self.directory, *names)
+
+    def test_paths(self):
+        expected = [self.path('a', 's1.lst'), self.path('b', 'broken.lst'), self.path('b', 'c', 's2.lst')]
+        self.assertEqual(ReportAggregator.paths(self.directory), expected)
+        self.assertEqual(ReportAggregator.paths(self.path('**', '*.lst')), expected)
+        self.assertEqual(ReportAggregator.walk_glob(self.path('**', '*.lst')), expected)
+        self.assertEqual(ReportAggregator.paths(self.path('b', '*.lst')), [self.path('b', 'broken.lst')])
+
+    def test_summarize(self):
+        row = summarize(self.path('a', 's1.lst'))
+        self.assertEqual((row['program'], row['total_mutants'], row['equivalent_mutants']), ('cal', 40, 3))
+        self.assertEqual(row['ordered_op_keys'], ['u-OAAA', 'u-OAAN', 'u-ORRN'])
+        self.assertEqual(summarize(self.path('a', 's1.lst'), operators=False)['operators'], {})
+        self.assertEqual(summarize(self.path('b', 'broken.lst'))['error'], 'no report header found')
+        self.assertIn('error', summarize(self.path('missing.lst')))
+
+    def check_aggregate(self, workers):
+        rows = []
+        aggregator = ReportAggregator(workers=workers, chunksize=1)
+        table = aggregator.aggregate(self.directory, on_row=rows.append)
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(aggregator.errors, [(self.path('b', 'broken.lst'), 'no report header found')])
+        self.assertEqual(len(table), 2)
+        self.assertEqual(table.columns['path'], [self.path('a', 's1.lst'), self.path('b', 'c', 's2.lst')])
+        self.assertEqual(list(table.column('total_mutants')), [40, 50])
+        self.assertEqual(table.mean('total_mutants'), 45.0)
+        self.assertAlmostEqual(table.total('mutation_score'), 2 * 0.714286)
+        self.assertEqual(table.ordered_op_keys, ['u-OAAA', 'u-OAAN', 'u-ORRN', 'u-SSDL'])
+        self.assertEqual(list(table.column('u-ORRN')), [20, 0])
+        self.assertEqual(list(table.column('u-SSDL')), [0, 5])
+        self.assertEqual(table.row(1)['operators'], {'u-OAAA': 12, 'u-OAAN': 8, 'u-ORRN': 0, 'u-SSDL': 5})
+
+    def test_aggregate_in_this_process(self):
+        self.check_aggregate(1)
+
+    def test_aggregate_in_a_pool(self):
+        self.check_aggregate(2)
+
+    def test_aggregate_without_numpy(self):
+        numpy = aggregator_module.numpy
+        aggregator_module.numpy = None
+        try:
+            self.check_aggregate(1)
+        finally:
+            aggregator_module.numpy = numpy
+
+if __name__ == '__main__':
+    unittest.main()
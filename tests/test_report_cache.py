@@ -0,0 +1,105 @@
+import os, shutil, sys, tempfile, unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pyproteum'))
+
+from Proteum import Proteum
+from ReportCache import ReportCache
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'session.lst')
+
+class FakeProteum(Proteum):
+    """ Proteum whose report command copies the fixture report to <session>.lst. """
+
+    def __init__(self):
+        Proteum.__init__(self)
+        self.commands = []
+
+    def exec_command(self, command, session, of=None, input=None, on_output=None, on_start=None):
+        self.commands.append(command)
+        directory = command.split(' -D ')[1].split()[0]
+        shutil.copyfile(FIXTURE, os.path.join(directory, session + '.lst'))
+
+class ReportCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache_dir = tempfile.mkdtemp()
+        for name in ('s.MUT', 's.tcs'):
+            self.write(name, 'original')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def write(self, name, text):
+        with open(os.path.join(self.directory, name), 'w') as f:
+            f.write(text)
+
+    def fingerprint(self, cache):
+        return cache.fingerprint('s', self.directory)
+
+    def test_fingerprint_changes_with_the_session(self):
+        cache = ReportCache()
+        key = self.fingerprint(cache)
+        self.assertEqual(self.fingerprint(cache), key)
+
+        # same size, written again
+        self.write('s.MUT', 'modified')
+        changed = self.fingerprint(cache)
+        self.assertNotEqual(changed, key)
+
+        # replaced by another file with the same contents and modification time
+        path = os.path.join(self.directory, 's.MUT')
+        st = os.stat(path)
+        shutil.copyfile(path, path + '.new')
+        os.rename(path + '.new', path)
+        os.utime(path, (st.st_atime, st.st_mtime))
+        self.assertNotEqual(self.fingerprint(cache), changed)
+
+        self.write('s.pn', 'new')
+        self.assertNotEqual(self.fingerprint(cache), changed)
+
+    def test_report_files_are_not_part_of_the_fingerprint(self):
+        cache = ReportCache()
+        key = self.fingerprint(cache)
+        self.write('s.lst', 'report')
+        self.assertEqual(self.fingerprint(cache), key)
+
+    def test_disk_round_trip(self):
+        proteum = FakeProteum()
+        proteum.set_report_cache(ReportCache(directory=self.cache_dir))
+        report = proteum.report(D=self.directory, session='s')
+        self.assertEqual(len(proteum.commands), 1)
+
+        # another process: a new cache on the same directory
+        other = FakeProteum()
+        other.set_report_cache(ReportCache(directory=self.cache_dir))
+        cached = other.report(D=self.directory, session='s')
+        self.assertEqual(other.commands, [])
+        self.assertEqual(other.report_cache.stats()['disk_hits'], 1)
+        self.assertEqual(cached.total_mutants, report.total_mutants)
+        self.assertEqual(cached.ordered_op_keys, report.ordered_op_keys)
+        self.assertEqual([test.number for test in cached.test_cases], [1, 2, 3])
+        self.assertEqual(cached.test_cases[1].stderr, report.test_cases[1].stderr)
+        self.assertEqual([name for name in os.listdir(self.cache_dir) if not name.endswith('.report')], [])
+
+        self.write('s.MUT', 'modified')
+        other.report(D=self.directory, session='s')
+        self.assertEqual(len(other.commands), 1)
+
+    def test_callers_get_a_copy(self):
+        proteum = FakeProteum()
+        proteum.set_report_cache(ReportCache())
+        report = proteum.report(D=self.directory, session='s')
+        report.test_cases.set(0, 'dead_mutants', 0)
+        report.operators['u-OAAA'] = 0
+        report.total_mutants = 0
+
+        cached = proteum.report(D=self.directory, session='s')
+        self.assertEqual(len(proteum.commands), 1)
+        self.assertEqual(cached.test_cases[0].dead_mutants, 18)
+        self.assertEqual(cached.operators['u-OAAA'], 12)
+        self.assertEqual(cached.total_mutants, 40)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import io, os, shutil, sys, tempfile, unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pyproteum'))
+
+from ReportParser import ReportParser
+from ProteumReport import ProteumReport
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'session.lst')
+
+def values(record):
+    """ Comparable form of a record's data. """
+    if record.kind == 'tcase':
+        return dict((name, getattr(record.data, name)) for name in record.data.__slots__)
+    return record.data
+
+class ReportParserTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        with open(FIXTURE, 'rb') as f:
+            self.content = f.read()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_records(self):
+        records = list(ReportParser(FIXTURE).records())
+        self.assertEqual([record.kind for record in records], ['header'] + ['operator'] * 3 + ['tcase'] * 3)
+        header = records[0].data
+        self.assertEqual((header['program'], header['source_file'], header['total_mutants']), ('cal', 'cal.c', 40))
+        self.assertAlmostEqual(header['mutation_score'], 0.714286)
+        self.assertEqual([record.data for record in records[1:4]], [('u-OAAA', 12), ('u-OAAN', 8), ('u-ORRN', 20)])
+
+        first, second, third = [record.data for record in records[4:]]
+        self.assertEqual((first.number, first.dead_mutants, first.dead_by_trap, first.label), (1, 18, 3, 'february'))
+        self.assertEqual((first.parameters, first.output, first.cpu_exec_time), ('2 2020', 'February 2020', 0.01))
+        self.assertFalse(second.enabled)
+        self.assertEqual(second.stderr, 'cal: 13 is neither a month number (1..12) nor a name')
+        self.assertEqual((third.input, third.output, third.not_executed_mutants), ('2020', '2020', 28))
+
+        # a text file object gives the same records
+        with io.open(FIXTURE) as f:
+            self.assertEqual([values(record) for record in ReportParser.parse(f)],
+                             [values(record) for record in records])
+
+    def test_resume_from_an_offset(self):
+        parser = ReportParser(FIXTURE)
+        records = list(parser.records())
+        self.assertEqual(parser.offset, len(self.content))
+        for i, record in enumerate(records[:-1]):
+            # the operators of a line share the offset of its end
+            if record.offset == records[i + 1].offset:
+                continue
+            resumed = list(ReportParser(FIXTURE).records(record.offset))
+            self.assertEqual([values(other) for other in resumed], [values(other) for other in records[i + 1:]])
+
+    def test_tail_a_growing_report(self):
+        path = os.path.join(self.directory, 's.lst')
+        parser = ReportParser(path)
+        tailed = []
+        # append the report in pieces cutting lines and test cases anywhere
+        for end in list(range(0, len(self.content), 97)) + [len(self.content)]:
+            with open(path, 'wb') as f:
+                f.write(self.content[:end])
+            tailed += list(parser.tail())
+            self.assertLessEqual(parser.offset, end)
+        # the last test case is only complete once the report is
+        self.assertEqual([record.kind for record in tailed][-2:], ['tcase', 'tcase'])
+        tailed += list(parser.records(parser.offset))
+        self.assertEqual([values(record) for record in tailed],
+                         [values(record) for record in ReportParser(FIXTURE).records()])
+
+    def test_header_only(self):
+        read = []
+        def lines():
+            for line in io.open(FIXTURE):
+                read.append(line)
+                yield line
+        records = list(ReportParser.parse(lines(), test_cases=False))
+        self.assertEqual([record.kind for record in records], ['header'] + ['operator'] * 3)
+        self.assertTrue(read[-1].strip().endswith('TEST CASE # 1'))
+
+        report = ProteumReport(FIXTURE)
+        with io.open(FIXTURE) as f:
+            report.load_general(f)
+            self.assertIn('STATUS: ENABLED', f.readline())
+        self.assertEqual((report.total_mutants, report.ordered_op_keys), (40, ['u-OAAA', 'u-OAAN', 'u-ORRN']))
+        self.assertEqual(len(report.test_cases), 0)
+
+if __name__ == '__main__':
+    unittest.main()
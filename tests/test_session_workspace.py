@@ -0,0 +1,294 @@
+import os, shutil, socket, sys, tempfile, threading, time, unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pyproteum'))
+
+from SessionWorkspace import SessionWorkspace
+from ParallelExecutor import ParallelExecutor
+from ExecutionPipeline import ExecutionPipeline
+from CheckpointedExecutor import CheckpointedExecutor
+from ExecutionCoordinator import ExecutionCoordinator, send, receive, encode_patch
+from ExecutionWorker import ExecutionWorker
+from CommandRunner import CommandResult
+
+class FakeProteum(object):
+    """ Stands for ProteumIM: exemuta -exec marks mutants f..t as dead ('d') in <session>.MUT,
+        one byte per mutant, and optionally appends a line to <session>.log.
+    """
+
+    def __init__(self, session, append=False, fail=None):
+        self.session = session
+        self.append = append
+        self.fail = fail
+        self.updates = 0
+        self.directories = set()
+
+    def exemuta_compile(self, D="", f=0, t=0, session=None):
+        self.directories.add(D)
+        return CommandResult(['exemuta', '-compile'], 0, '', '', 0.0, 0.0)
+
+    def exemuta_exec(self, trace=True, dual=False, D="", Q=0, f=0, t=0, T=0, v="", seed=0, session=None):
+        if self.fail is not None and f <= self.fail <= t:
+            return CommandResult(['exemuta', '-exec'], 1, '', 'crashed', 0.0, 0.0)
+        path = os.path.join(D, session + '.MUT')
+        with open(path, 'rb') as fp:
+            data = bytearray(fp.read())
+        data[f:t + 1] = b'd' * (t - f + 1)
+        with open(path, 'wb') as fp:
+            fp.write(data)
+        if self.append:
+            with open(os.path.join(D, session + '.log'), 'a') as fp:
+                fp.write('executed %d-%d\n' % (f, t))
+        return CommandResult(['exemuta', '-exec'], 0, '', '', 0.0, 0.0)
+
+    def exemuta_update(self, D="", session=None):
+        self.updates += 1
+        return CommandResult(['exemuta', '-update'], 0, '', '', 0.0, 0.0)
+
+class SessionWorkspaceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.workspace = SessionWorkspace('s', self.directory)
+        self.write('s.MUT', b'a' * 100)
+        self.write('s.log', b'created\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def write(self, name, data):
+        with open(os.path.join(self.directory, name), 'wb') as f:
+            f.write(data)
+
+    def read(self, name):
+        with open(os.path.join(self.directory, name), 'rb') as f:
+            return f.read()
+
+    def test_runs(self):
+        old = b'a' * 10000
+        new = bytearray(old)
+        new[5:7] = b'bb'
+        new[9000] = ord('c')
+        new += b'tail'
+        self.assertEqual(list(SessionWorkspace.runs(old, bytes(new))),
+                         [(5, b'bb'), (9000, b'c'), (10000, b'tail')])
+
+    def test_diff_apply(self):
+        base = self.workspace.snapshot()
+        self.write('s.MUT', b'a' * 10 + b'dd' + b'a' * 88)
+        patch = self.workspace.diff(base)
+        self.assertEqual(patch, {'s.MUT': (100, [(10, b'dd')])})
+
+        self.write('s.MUT', b'a' * 100)
+        self.workspace.apply(patch)
+        self.assertEqual(self.read('s.MUT'), b'a' * 10 + b'dd' + b'a' * 88)
+
+    def test_merge_disjoint(self):
+        base = self.workspace.snapshot()
+        patches = [{'s.MUT': (100, [(0, b'dd')])}, {'s.MUT': (100, [(50, b'd')])}]
+        self.assertEqual(self.workspace.merge(base, patches), ['s.MUT'])
+        self.assertEqual(self.read('s.MUT'), b'dd' + b'a' * 48 + b'd' + b'a' * 49)
+
+    def test_merge_same_change(self):
+        base = self.workspace.snapshot()
+        patches = [{'s.MUT': (100, [(3, b'x')])}, {'s.MUT': (100, [(3, b'x')])}]
+        self.workspace.merge(base, patches)
+        self.assertEqual(self.read('s.MUT'), b'aaax' + b'a' * 96)
+
+    def test_merge_is_ordered(self):
+        base = self.workspace.snapshot()
+        patches = [{'s.MUT': (100, [(0, b'x')])}, {'s.MUT': (120, [(100, b'y' * 20)])}]
+        files, conflicts = self.workspace.merged(base, patches)
+        self.assertEqual(conflicts, [])
+        self.assertEqual(files['s.MUT'], b'x' + b'a' * 99 + b'y' * 20)
+
+    def test_merge_conflicting_bytes(self):
+        base = self.workspace.snapshot()
+        patches = [{'s.MUT': (100, [(3, b'x')])}, {'s.MUT': (100, [(3, b'y')])}]
+        self.assertEqual(self.workspace.merged(base, patches)[1], [('s.MUT', 3)])
+        self.assertRaises(RuntimeError, self.workspace.merge, base, patches)
+        self.assertEqual(self.read('s.MUT'), b'a' * 100)
+
+    def test_merge_both_append(self):
+        # both patches append the same bytes: a serial run would have both lines
+        base = self.workspace.snapshot()
+        line = b'executed\n'
+        patches = [{'s.log': (8 + len(line), [(8, line)])}, {'s.log': (8 + len(line), [(8, line)])}]
+        self.assertRaises(RuntimeError, self.workspace.merge, base, patches)
+        self.assertEqual(self.read('s.log'), b'created\n')
+
+    def test_merge_write_past_truncation(self):
+        base = self.workspace.snapshot()
+        patches = [{'s.MUT': (50, [])}, {'s.MUT': (100, [(80, b'd')])}]
+        self.assertEqual(self.workspace.merged(base, patches)[1], [('s.MUT', 80)])
+
+    def test_merge_leaves_session_untouched_on_conflict(self):
+        base = self.workspace.snapshot()
+        patches = [{'s.MUT': (100, [(0, b'd')]), 's.log': (8, [(0, b'C')])},
+                   {'s.log': (8, [(0, b'X')])}]
+        self.assertRaises(RuntimeError, self.workspace.merge, base, patches)
+        self.assertEqual(self.read('s.MUT'), b'a' * 100)
+        self.assertEqual(self.read('s.log'), b'created\n')
+
+class SessionTest(unittest.TestCase):
+    """ A session with 40 mutants, none executed. """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        with open(os.path.join(self.directory, 's.MUT'), 'wb') as f:
+            f.write(b'a' * 40)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def read(self):
+        with open(os.path.join(self.directory, 's.MUT'), 'rb') as f:
+            return f.read()
+
+class ParallelExecutorTest(SessionTest):
+
+    def test_shards(self):
+        executor = ParallelExecutor(FakeProteum('s'), 4)
+        self.assertEqual(executor.shards(0, 9), [(0, 2), (3, 5), (6, 7), (8, 9)])
+        self.assertEqual(executor.shards(0, 3), [(0, 1), (2, 2), (3, 3)])
+
+    def test_matches_serial_run(self):
+        proteum = FakeProteum('s')
+        ParallelExecutor(proteum, 4).run(D=self.directory, f=5, t=29, session='s')
+        self.assertEqual(self.read(), b'a' * 5 + b'd' * 25 + b'a' * 10)
+        self.assertEqual(proteum.updates, 1)
+
+    def test_failed_shard(self):
+        proteum = FakeProteum('s', fail=20)
+        self.assertRaises(RuntimeError, ParallelExecutor(proteum, 4).run, D=self.directory, f=0, t=39, session='s')
+        self.assertEqual(self.read(), b'a' * 40)
+        self.assertEqual(proteum.updates, 0)
+
+    def test_shards_appending_to_the_same_file(self):
+        with open(os.path.join(self.directory, 's.log'), 'w') as f:
+            f.write('created\n')
+        proteum = FakeProteum('s', append=True)
+        self.assertRaises(RuntimeError, ParallelExecutor(proteum, 2).run, D=self.directory, f=0, t=39, session='s')
+        self.assertEqual(self.read(), b'a' * 40)
+
+    def test_shards_of_size(self):
+        executor = ParallelExecutor(FakeProteum('s'))
+        self.assertEqual(executor.shards(0, 9, 4), [(0, 3), (4, 7), (8, 9)])
+        self.assertEqual(executor.shards(0, 9, 1)[:2], [(0, 1), (2, 2)])
+
+class ExecutionPipelineTest(SessionTest):
+
+    def test_pipeline_reuses_clones(self):
+        proteum = FakeProteum('s')
+        pipeline = ExecutionPipeline(proteum, batch_size=3, queue_size=1, D=self.directory, session='s')
+        pipeline.run(f=0, t=39)
+        self.assertEqual(self.read(), b'd' * 40)
+        self.assertTrue(len(proteum.directories) <= 3)
+        self.assertEqual(pipeline.metrics['exec'].batches, 14)
+
+    def test_pipeline_failed_batch(self):
+        proteum = FakeProteum('s', fail=20)
+        pipeline = ExecutionPipeline(proteum, batch_size=5, D=self.directory, session='s')
+        self.assertRaises(RuntimeError, pipeline.run, f=0, t=39)
+        self.assertEqual(self.read(), b'a' * 40)
+        self.assertEqual(os.listdir(self.directory), ['s.MUT'])
+
+class CheckpointedExecutorTest(SessionTest):
+
+    def test_failed_chunk_is_not_journaled(self):
+        proteum = FakeProteum('s', fail=20)
+        executor = CheckpointedExecutor(proteum, D=self.directory, session='s', chunk_size=10, max_chunk_size=10)
+        self.assertRaises(RuntimeError, executor.start, 0, 39)
+        self.assertEqual(executor.progress()['done'], 20)
+
+        proteum.fail = None
+        self.assertEqual(executor.resume()['done'], 40)
+        self.assertEqual(self.read(), b'd' * 40)
+        self.assertEqual(proteum.updates, 1)
+
+class ExecutionCoordinatorTest(SessionTest):
+
+    def setUp(self):
+        SessionTest.setUp(self)
+        self.sockets = tempfile.mkdtemp()
+        self.address = os.path.join(self.sockets, 'coordinator')
+        self.errors = []
+
+    def tearDown(self):
+        SessionTest.tearDown(self)
+        shutil.rmtree(self.sockets, ignore_errors=True)
+
+    def start(self, coordinator, timeout=10):
+        def run():
+            try:
+                coordinator.run(self.address, f=0, t=39, timeout=timeout)
+            except Exception as e:
+                self.errors.append(e)
+        thread = threading.Thread(target=run)
+        thread.start()
+        while not os.path.exists(self.address):
+            time.sleep(0.01)
+        return thread
+
+    def workers(self, count, token='secret', append=False):
+        workers = [ExecutionWorker(self.address, FakeProteum('s', append=append), poll=0.01, token=token)
+                   for _ in range(count)]
+        threads = [threading.Thread(target=worker.run) for worker in workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return workers
+
+    def test_several_workers(self):
+        proteum = FakeProteum('s')
+        thread = self.start(ExecutionCoordinator(proteum, unit_size=4, D=self.directory, session='s', token='secret'))
+        workers = self.workers(3)
+        thread.join()
+        self.assertEqual(self.errors, [])
+        self.assertEqual(self.read(), b'd' * 40)
+        self.assertEqual(sum(worker.executed for worker in workers), 10)
+        self.assertEqual(proteum.updates, 1)
+
+    def test_units_of_a_worker_append_to_the_same_file(self):
+        with open(os.path.join(self.directory, 's.log'), 'w') as f:
+            f.write('created\n')
+        thread = self.start(ExecutionCoordinator(FakeProteum('s'), unit_size=10, D=self.directory, session='s',
+                                                 token='secret'))
+        self.workers(1, append=True)
+        thread.join()
+        self.assertEqual(self.errors, [])
+        with open(os.path.join(self.directory, 's.log')) as f:
+            self.assertEqual(f.read(), 'created\nexecuted 0-9\nexecuted 10-19\nexecuted 20-29\nexecuted 30-39\n')
+
+    def test_invalid_token(self):
+        thread = self.start(ExecutionCoordinator(FakeProteum('s'), D=self.directory, session='s', token='secret'),
+                            timeout=0.5)
+        worker = ExecutionWorker(self.address, FakeProteum('s'), token='guess')
+        self.assertRaises(RuntimeError, worker.run)
+        self.assertRaises(RuntimeError, ExecutionWorker(self.address, FakeProteum('s')).run)
+        thread.join()
+        self.assertEqual(self.read(), b'a' * 40)
+
+    def test_tcp_needs_a_token(self):
+        coordinator = ExecutionCoordinator(FakeProteum('s'), D=self.directory, session='s')
+        self.assertRaises(ValueError, coordinator.run, 'localhost:0', f=0, t=39, timeout=0.5)
+
+    def test_patch_outside_the_session(self):
+        thread = self.start(ExecutionCoordinator(FakeProteum('s'), D=self.directory, session='s', token='secret'),
+                            timeout=0.5)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(self.address)
+        stream = sock.makefile('rwb')
+        send(stream, {'op': 'next', 'token': 'secret'})
+        unit = receive(stream)
+        send(stream, {'op': 'result', 'token': 'secret', 'unit': unit['unit'], 'revision': unit['revision'],
+                      'patch': encode_patch({'../s.MUT': (1, [(0, b'x')])})})
+        self.assertIn('error', receive(stream))
+        stream.close()
+        sock.close()
+        thread.join()
+        self.assertFalse(os.path.exists(os.path.join(os.path.dirname(self.directory), 's.MUT')))
+        self.assertEqual(self.read(), b'a' * 40)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import os, shutil, sys, tempfile, unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pyproteum'))
+
+from StagedSession import StagedSession
+
+class FakeProteum(object):
+    session = 's'
+
+    def __init__(self):
+        self.messages = []
+
+    def echo(self, msg):
+        self.messages.append(msg)
+
+class StagedSessionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.root = tempfile.mkdtemp()
+        for name in ('s.MUT', 's.log'):
+            self.write(self.directory, name, 'original')
+        self.proteum = FakeProteum()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def write(self, directory, name, text):
+        with open(os.path.join(directory, name), 'w') as f:
+            f.write(text)
+
+    def read(self, name):
+        with open(os.path.join(self.directory, name)) as f:
+            return f.read()
+
+    def test_sync(self):
+        with StagedSession(self.proteum, D=self.directory, session='s', root=self.root) as staged:
+            self.assertTrue(staged.staged)
+            self.write(staged.directory, 's.MUT', 'executed')
+            os.remove(os.path.join(staged.directory, 's.log'))
+        self.assertEqual(self.read('s.MUT'), 'executed')
+        self.assertFalse(os.path.exists(os.path.join(self.directory, 's.log')))
+        self.assertEqual(os.listdir(self.root), [])
+
+    def test_failure_keeps_the_staged_copy(self):
+        staged = StagedSession(self.proteum, D=self.directory, session='s', root=self.root)
+        try:
+            with staged:
+                self.write(staged.directory, 's.MUT', 'executed')
+                raise KeyboardInterrupt()
+        except KeyboardInterrupt:
+            pass
+        self.assertEqual(self.read('s.MUT'), 'original')
+        with open(os.path.join(staged.kept, 's.MUT')) as f:
+            self.assertEqual(f.read(), 'executed')
+        self.assertIn(staged.kept, self.proteum.messages[0])
+
+    def test_interrupted_sync_is_finished(self):
+        staged = StagedSession(self.proteum, D=self.directory, session='s', root=self.root)
+        staged.stage()
+        self.write(staged.directory, 's.MUT', 'executed')
+        self.write(staged.directory, 's.log', 'executed')
+        commit = staged.commit
+        staged.commit = lambda: None
+        staged.sync()
+        # the journal was written but not applied: nothing changed yet
+        self.assertEqual(self.read('s.MUT'), 'original')
+        os.rename(staged.sync_path('s.MUT'), os.path.join(self.directory, 's.MUT'))
+
+        self.assertTrue(StagedSession(self.proteum, D=self.directory, session='s', root=self.root).recover())
+        self.assertEqual(self.read('s.MUT'), 'executed')
+        self.assertEqual(self.read('s.log'), 'executed')
+        self.assertFalse(os.path.exists(staged.journal_path()))
+        staged.commit = commit
+        staged.close(sync=False)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import io, os, shutil, sys, tempfile, unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pyproteum'))
+
+from Proteum import Proteum
+from CommandRunner import CommandResult
+from TestCaseImporter import TestCaseImporter as CaseImporter
+
+class FakeProteum(Proteum):
+    """ Proteum recording its commands instead of running them; parameters 'fail' make tcase fail. """
+
+    def __init__(self):
+        Proteum.__init__(self)
+        self.commands = []
+
+    def exec_command(self, command, session=None, of=None, input=None, on_output=None, on_start=None,
+                     preexec_fn=None):
+        argv = self.command_argv(command, session or self.session)
+        self.commands.append((argv, input))
+        return CommandResult(argv, 1 if 'fail' in argv else 0, '', '', 0.0, 0.0)
+
+class TestCaseImporterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.proteum = FakeProteum()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_one_process_per_test_case(self):
+        progress = []
+        importer = CaseImporter(self.proteum, self.directory, 's', progress_every=2,
+                                on_progress=lambda stats: progress.append(stats.added + stats.failed))
+        stats = importer.run([{'p': '2 2020'}, {'parameters': 'fail'}, {'params': 3, 'input': 'x'},
+                              {'parameters': '4', 'label': 'april'}, {'parameters': '5'}])
+        self.assertEqual((stats.added, stats.failed), (4, 1))
+        self.assertEqual(progress, [2, 4])
+        self.assertEqual(len(self.proteum.commands), 5)
+        self.assertEqual(self.proteum.commands[2][1], 'x')
+        self.assertTrue(all(argv[0] == 'tcase-add' and argv[-1] == 's' for argv, _ in self.proteum.commands))
+
+    def test_normalize_keeps_text(self):
+        record = CaseImporter.normalize({'parameters': u'févr', 'stdin': 12})
+        self.assertEqual(record, {'parameters': u'févr', 'stdin': '12', 'label': ''})
+
+    def test_import_sessions(self):
+        path = os.path.join(self.directory, 'tests.jsonl')
+        with io.open(path, 'w') as f:
+            f.write(u'{"parameters": "1"}\n\n{"parameters": "2"}\n')
+        # a unicode path on Python 2 is still a file name
+        stats = CaseImporter.import_sessions(self.proteum, {'a': u'' + path, 'b': [{'parameters': '3'}]},
+                                             self.directory)
+        self.assertEqual((stats['a'].added, stats['b'].added), (2, 1))
+
+if __name__ == '__main__':
+    unittest.main()
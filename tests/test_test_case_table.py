@@ -0,0 +1,62 @@
+import os, sys, unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pyproteum'))
+
+from TestCaseInfo import TestCaseInfo as CaseInfo
+from TestCaseTable import TestCaseTable as CaseTable
+import TestCaseTable as table_module
+
+def fields(tcase):
+    return dict((name, getattr(tcase, name)) for name in CaseInfo.__slots__)
+
+class TestCaseTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cases = [
+            CaseInfo(1, alive_mutants=20, dead_mutants=18, cpu_exec_time=0.01, parameters='2 2020',
+                     output='February 2020', label='february'),
+            CaseInfo(2, not_executed_mutants=18, dead_mutants=10, enabled=False, retcode=1, cpu_exec_time=0.02,
+                     stderr='cal: 13 is neither a month number (1..12) nor a name'),
+            CaseInfo(3, dead_mutants=2 ** 40, cpu_exec_time=0.03, input='2020'),
+        ]
+
+    def test_round_trip(self):
+        table = CaseTable(self.cases)
+        table.append({'number': 4, 'label': 'empty'})
+        self.assertEqual(len(table), 4)
+        for tcase, view in zip(self.cases, table):
+            self.assertEqual(fields(view), fields(tcase))
+            self.assertEqual(fields(table.record(view.index)), fields(tcase))
+        self.assertIs(table[1].enabled, False)
+        self.assertEqual(fields(table[-1]), fields(CaseInfo(4, label='empty')))
+        self.assertEqual([view.number for view in table[1:3]], [2, 3])
+        self.assertRaises(IndexError, table.__getitem__, 4)
+
+    def test_views_write_through_and_copies_do_not(self):
+        table = CaseTable(self.cases)
+        copy = table.copy()
+        table[0].dead_mutants = 1
+        self.assertEqual(table.get(0, 'dead_mutants'), 1)
+        self.assertEqual(copy[0].dead_mutants, 18)
+        self.assertRaises(AttributeError, setattr, table[0], 'unknown', 1)
+        self.assertRaises(AttributeError, getattr, table[0], 'unknown')
+
+    def test_aggregates(self):
+        table = CaseTable(self.cases)
+        self.assertEqual(table.total_dead_mutants, 28 + 2 ** 40)
+        self.assertAlmostEqual(table.mean_exec_time, 0.02)
+        self.assertEqual(list(table.column('number')), [1, 2, 3])
+        self.assertEqual(table.column('label'), ['february', '', ''])
+        self.assertEqual(CaseTable().mean('cpu_exec_time'), 0.0)
+
+        # the same without NumPy
+        numpy = table_module.numpy
+        table_module.numpy = None
+        try:
+            self.assertEqual(table.total_dead_mutants, 28 + 2 ** 40)
+            self.assertEqual(list(table.column('dead_mutants')), [18, 10, 2 ** 40])
+        finally:
+            table_module.numpy = numpy
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import os, shutil, sys, tempfile, unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pyproteum'))
+
+from Proteum import Proteum
+from CommandRunner import CommandResult
+from TestPrioritizer import TestPrioritizer as Prioritizer
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'session.lst')
+
+class FakeProteum(Proteum):
+    """ Proteum recording its commands; report writes the fixture, with test case 1 killing
+        `killed` more of its alive mutants, and commands in `failing` fail.
+    """
+
+    def __init__(self, directory):
+        Proteum.__init__(self)
+        self.directory = directory
+        self.commands = []
+        self.failing = ()
+        self.killed = 0
+
+    def exec_command(self, command, session=None, of=None, input=None, on_output=None, on_start=None,
+                     preexec_fn=None):
+        argv = self.command_argv(command, session or self.session)
+        self.commands.append(argv)
+        if argv[0] == 'report':
+            with open(FIXTURE) as f:
+                text = f.read()
+            text = text.replace('ALIVE MUTANTS: 20', 'ALIVE MUTANTS: %d' % (20 - self.killed), 1)
+            text = text.replace('DEAD MUTANTS: 18', 'DEAD MUTANTS: %d' % (18 + self.killed), 1)
+            with open(os.path.join(self.directory, argv[-1] + '.lst'), 'w') as f:
+                f.write(text)
+        elif argv[0] == 'exemuta':
+            self.killed += 5
+        return CommandResult(argv, 1 if argv[1] in self.failing else 0, '', 'error', 0.0, 0.0)
+
+class TestPrioritizerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.proteum = FakeProteum(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_run_records_only_new_kills(self):
+        prioritizer = Prioritizer(self.proteum, self.directory, 's')
+        prioritizer.run([1, 2, 3], tiers=2)
+        self.assertEqual([argv[:2] for argv in self.proteum.commands],
+                         [['report', '-tcase'], ['tcase', '-i'], ['tcase', '-e'], ['exemuta', '-exec'],
+                          ['tcase', '-e'], ['exemuta', '-exec'], ['report', '-tcase']])
+        self.assertEqual(prioritizer.history[1]['kills'], 10)
+        self.assertEqual(prioritizer.history[1]['executions'], 0)
+        self.assertEqual(prioritizer.history[2]['kills'], 0)
+
+        prioritizer.run([1, 2, 3], tiers=1)
+        self.assertEqual(prioritizer.history[1]['kills'], 15)
+        self.assertEqual(prioritizer.history[1]['runs'], 2)
+        self.assertEqual(Prioritizer(self.proteum, self.directory, 's').history, prioritizer.history)
+
+    def test_failed_commands_raise(self):
+        prioritizer = Prioritizer(self.proteum, self.directory, 's')
+        for command in ('-i', '-e', '-exec'):
+            self.proteum.failing = (command,)
+            self.assertRaises(RuntimeError, prioritizer.run, [1, 2, 3])
+        self.assertEqual(prioritizer.history, {})
+
+if __name__ == '__main__':
+    unittest.main()
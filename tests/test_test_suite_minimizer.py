@@ -0,0 +1,66 @@
+import os, sys, unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pyproteum'))
+
+from MutantList import MutantInfo
+from KillMatrix import KillMatrix
+from TestCaseInfo import TestCaseInfo as CaseInfo
+from TestSuiteMinimizer import TestSuiteMinimizer as Minimizer
+
+class FakeReport(object):
+
+    def __init__(self, numbers):
+        self.test_cases = [CaseInfo(number=number) for number in numbers]
+
+    def load(self):
+        pass
+
+class FakeProteum(object):
+    """ A session with test cases 1 to 5; test cases 4 and 5 kill no mutant. """
+
+    session = 's'
+
+    def __init__(self):
+        self.enabled = set()
+        self.disabled = set()
+
+    def report(self, D="", session=None):
+        return FakeReport([1, 2, 3, 4, 5])
+
+    @staticmethod
+    def numbers(f=0, t=0, x=""):
+        return set(range(f, t + 1) if t else []) | set(int(number) for number in x.split())
+
+    def tcase_enable(self, f=0, t=0, x="", D="", session=None):
+        self.enabled |= self.numbers(f, t, x)
+
+    def tcase_disable(self, f=0, t=0, x="", D="", session=None):
+        self.disabled |= self.numbers(f, t, x)
+
+class TestSuiteMinimizerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.proteum = FakeProteum()
+        mutants = [MutantInfo(0, status='dead', killed_by=[1, 2]),
+                   MutantInfo(1, status='dead', killed_by=[2]),
+                   MutantInfo(2, status='dead', killed_by=[3])]
+        self.matrix = KillMatrix(mutants, [test.number for test in self.proteum.report().test_cases])
+
+    def test_disables_test_cases_killing_nothing(self):
+        minimizer = Minimizer(self.proteum, session='s', matrix=self.matrix)
+        minimization = minimizer.minimize()
+        self.assertEqual(sorted(minimization.selected), [2, 3])
+        self.assertEqual(minimization.removed, [1, 4, 5])
+
+        minimizer.apply(minimization)
+        self.assertEqual(self.proteum.enabled, set([2, 3]))
+        self.assertEqual(self.proteum.disabled, set([1, 4, 5]))
+
+    def test_apply_disables_test_cases_left_out(self):
+        minimizer = Minimizer(self.proteum, session='s', matrix=self.matrix)
+        minimizer.apply(minimizer.minimize(tests=[1, 3]))
+        self.assertEqual(self.proteum.enabled, set([1, 3]))
+        self.assertEqual(self.proteum.disabled, set([2, 4, 5]))
+
+if __name__ == '__main__':
+    unittest.main()